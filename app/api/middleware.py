@@ -0,0 +1,55 @@
+from fastapi import HTTPException
+from starlette.responses import JSONResponse
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+
+class RequestSizeLimitMiddleware:
+    """
+    Reject request bodies larger than ``max_size`` before they are fully received.
+
+    Requests that declare a Content-Length are refused up front. Chunked requests
+    are counted as they stream in and aborted as soon as they cross the limit, so
+    the multipart parser never spools an oversized body to disk.
+    """
+
+    def __init__(self, app: ASGIApp, max_size: int, methods=("POST", "PUT", "PATCH")):
+        self.app = app
+        self.max_size = max_size
+        self.methods = set(methods)
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http" or scope["method"] not in self.methods:
+            await self.app(scope, receive, send)
+            return
+
+        headers = dict(scope.get("headers") or [])
+        content_length = headers.get(b"content-length")
+        if content_length is not None:
+            try:
+                declared = int(content_length)
+            except ValueError:
+                declared = None
+
+            if declared is not None and declared > self.max_size:
+                response = JSONResponse(
+                    status_code=413,
+                    content={"detail": f"Request body exceeds the {self.max_size} byte limit"}
+                )
+                await response(scope, receive, send)
+                return
+
+        received = 0
+
+        async def limited_receive() -> Message:
+            nonlocal received
+            message = await receive()
+            if message["type"] == "http.request":
+                received += len(message.get("body", b""))
+                if received > self.max_size:
+                    raise HTTPException(
+                        status_code=413,
+                        detail=f"Request body exceeds the {self.max_size} byte limit"
+                    )
+            return message
+
+        await self.app(scope, limited_receive, send)
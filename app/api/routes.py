@@ -1,11 +1,28 @@
-from fastapi import APIRouter, Depends, UploadFile, File, HTTPException
+import logging
+from fastapi import APIRouter, Depends, UploadFile, File, HTTPException, Header, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from fastapi.responses import StreamingResponse
+from starlette.background import BackgroundTask
 from sqlalchemy.orm import Session
-from typing import List
+from typing import Dict, List, Literal, Optional
+from datetime import date
 from pydantic import BaseModel
 
-from ..models.database import get_db, init_db
+from ..models.database import (
+    DEDICATED_TENANTS, DEFAULT_TENANT, get_engine, init_db, tenant_session, validate_tenant_id
+)
 from ..services.document_service import DocumentService
 from ..services.query_service import QueryService
+from ..services.dashboard_service import DashboardService
+from ..services.rollup_service import RollupService
+from ..services.export_service import ExportService
+from ..services.search_service import SearchService
+from ..services.llm_scheduler import get_scheduler
+from ..services.section_service import SectionService
+from ..services.tenant_move import stranded_documents
+from ..services.sse import SSE_HEADERS, event_stream
+
+logger = logging.getLogger(__name__)
 
 router = APIRouter()
 
@@ -16,6 +33,12 @@ init_db()
 class QueryRequest(BaseModel):
     question: str
 
+class QueryResponse(BaseModel):
+    status: Literal["ok", "no_plan", "error"]
+    plan: Optional[dict] = None
+    results: List[dict]
+    message: Optional[str] = None
+
 class UploadResponse(BaseModel):
     message: str
     processed: int
@@ -27,22 +50,115 @@ class DashboardResponse(BaseModel):
     industries: dict
     geographies: dict
 
+class SectionResponse(BaseModel):
+    id: int
+    position: int
+    kind: str
+    number: Optional[str] = None
+    title: Optional[str] = None
+    level: int
+    page: Optional[int] = None
+    start_offset: int
+    end_offset: int
+    text: Optional[str] = None
+
+class DocumentUpdate(BaseModel):
+    filename: Optional[str] = None
+    agreement_type: Optional[str] = None
+    governing_law: Optional[str] = None
+    industry: Optional[str] = None
+    geography: Optional[str] = None
+
+class DeleteResponse(BaseModel):
+    deleted: int
+
+class TimeseriesResponse(BaseModel):
+    granularity: str
+    facet: str
+    buckets: List[str]
+    series: Dict[str, List[int]]
+
 # Initialize services
 document_service = DocumentService()
 query_service = QueryService()
+dashboard_service = DashboardService()
+rollup_service = RollupService()
+export_service = ExportService()
+search_service = SearchService()
+section_service = SectionService()
+
+# Open the dedicated tenant databases now, so init_db migrates and builds them before the first request
+for _tenant_id in sorted(DEDICATED_TENANTS):
+    get_engine(_tenant_id)
+    _stranded = stranded_documents(_tenant_id)
+    if _stranded:
+        logger.warning(
+            f"{_stranded} documents of dedicated tenant {_tenant_id} are still in the shared database; "
+            f"run python move_tenant.py {_tenant_id}"
+        )
+
+def get_tenant(x_tenant_id: Optional[str] = Header(None)) -> str:
+    """Tenant named by the X-Tenant-ID header, or the default tenant without one"""
+    if x_tenant_id is None:
+        return DEFAULT_TENANT
+    try:
+        return validate_tenant_id(x_tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def streaming_session(tenant_id: str) -> Session:
+    """Session for a StreamingResponse body
+    
+    The body is produced after the handler returns, when request-scoped
+    dependencies such as get_tenant_db may already have closed their session.
+    """
+    return tenant_session(tenant_id)
+
+def get_tenant_db(tenant_id: str = Depends(get_tenant)):
+    """Dependency to get a session on the database holding the request tenant's documents"""
+    db = tenant_session(tenant_id)
+    try:
+        yield db
+    finally:
+        db.close()
 
 @router.post("/upload", response_model=UploadResponse)
 async def upload_documents(
+    request: Request,
     files: List[UploadFile] = File(...),
-    db: Session = Depends(get_db)
+    stream: bool = Query(False, description="Report per-file progress as server-sent events"),
+    tenant_id: str = Depends(get_tenant)
 ):
-    """Upload multiple legal documents"""
+    """Upload multiple legal documents
+    
+    With ``stream=true`` (or ``Accept: text/event-stream``) the response is an
+    event stream with received, extracted, metadata, committed or failed events
+    per file as it is processed, and a final done event with the totals.
+    """
     try:
         if not files:
             raise HTTPException(status_code=400, detail="No files provided")
         
+        if stream or "text/event-stream" in request.headers.get("accept", ""):
+            # Read the files now: the uploads are closed once the handler returns
+            spooled = await document_service.spool_uploads(files)
+            
+            async def produce(emit):
+                with streaming_session(tenant_id) as db:
+                    result = await document_service.process_spooled(spooled, db, progress=emit, tenant_id=tenant_id)
+                emit("done", result)
+            
+            return StreamingResponse(
+                event_stream(produce),
+                media_type="text/event-stream",
+                headers=SSE_HEADERS,
+                # Temporary files of uploads never reached if the client disconnects
+                background=BackgroundTask(document_service.discard_spooled, spooled)
+            )
+        
         # Process uploaded files
-        result = await document_service.process_upload(files, db)
+        with tenant_session(tenant_id) as db:
+            result = await document_service.process_upload(files, db, tenant_id=tenant_id)
         
         return UploadResponse(
             message="Documents uploaded successfully",
@@ -53,69 +169,92 @@ async def upload_documents(
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Upload failed: {str(e)}")
 
-@router.post("/query")
+@router.post("/query", response_model=QueryResponse)
 async def query_documents(
     request: QueryRequest,
-    db: Session = Depends(get_db)
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
 ):
     """Query documents using natural language"""
     try:
         if not request.question.strip():
             raise HTTPException(status_code=400, detail="Question cannot be empty")
         
-        # Process query
-        results = query_service.process_query(request.question, db)
+        # Process query; planning blocks on the LLM, so it runs in a worker thread
+        response = await run_in_threadpool(query_service.process_query, request.question, db, tenant_id)
+        if response["status"] == "error":
+            raise HTTPException(status_code=502, detail=response)
         
-        return results
+        return response
         
+    except HTTPException:
+        raise
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Query failed: {str(e)}")
 
 @router.get("/dashboard", response_model=DashboardResponse)
-async def get_dashboard_data(db: Session = Depends(get_db)):
-    """Get dashboard analytics data"""
+async def get_dashboard_data(
+    response: Response,
+    if_none_match: Optional[str] = Header(None),
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
+):
+    """Get dashboard analytics data for the request's tenant
+    
+    The ETag is the tenant's documents data version, so polls with a matching
+    If-None-Match get a 304 without touching the database.
+    """
     try:
-        # Get all documents
-        documents = document_service.get_all_documents(db)
+        etag = f'W/"dashboard-{tenant_id}-{dashboard_service.get_version(tenant_id)}"'
+        if _etag_matches(if_none_match, etag):
+            return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache", "Vary": "X-Tenant-ID"})
         
-        # Aggregate data
-        agreement_types = {}
-        governing_laws = {}
-        industries = {}
-        geographies = {}
-
-        for doc in documents:
-            # Count agreement types
-            if doc.agreement_type:
-                agreement_types[doc.agreement_type] = agreement_types.get(doc.agreement_type, 0) + 1
-            
-            # Count governing_laws
-            if doc.governing_law:
-                governing_laws[doc.governing_law] = governing_laws.get(doc.governing_law, 0) + 1
-            
-            # Count industries
-            if doc.industry:
-                industries[doc.industry] = industries.get(doc.industry, 0) + 1
-
-
-            if doc.geography:
-                geographies[doc.geography] = geographies.get(doc.geography, 0) + 1
+        version, data = dashboard_service.get_dashboard(db, tenant_id)
         
-        return DashboardResponse(
-            agreement_types=agreement_types,
-            governing_laws=governing_laws,
-            industries=industries,
-            geographies=geographies
-        )
+        response.headers["ETag"] = f'W/"dashboard-{tenant_id}-{version}"'
+        response.headers["Cache-Control"] = "no-cache"
+        response.headers["Vary"] = "X-Tenant-ID"
+        return DashboardResponse(**data)
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Dashboard data failed: {str(e)}")
 
+@router.get("/dashboard/timeseries", response_model=TimeseriesResponse)
+async def get_dashboard_timeseries(
+    granularity: Literal["week", "month"] = "month",
+    facet: Literal["total", "agreement_type", "governing_law", "industry", "geography"] = "total",
+    start: Optional[date] = Query(None, description="Include buckets from this date"),
+    end: Optional[date] = Query(None, description="Include buckets up to this date"),
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
+):
+    """Get document counts over time, per value of a metadata field"""
+    try:
+        return TimeseriesResponse(**rollup_service.get_timeseries(db, granularity, facet, start, end, tenant_id))
+        
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Timeseries data failed: {str(e)}")
+
+def _etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """Check an If-None-Match header against an ETag (weak comparison)"""
+    if not if_none_match:
+        return False
+    
+    candidates = [tag.strip() for tag in if_none_match.split(",")]
+    return "*" in candidates or any(tag.removeprefix("W/") == etag.removeprefix("W/") for tag in candidates)
+
+@router.get("/llm/metrics")
+async def get_llm_metrics():
+    """Queue depth, concurrency and wait times of the LLM scheduler, per priority class"""
+    return get_scheduler().metrics()
+
 @router.get("/documents")
-async def get_documents(db: Session = Depends(get_db)):
-    """Get all documents (for debugging)"""
+async def get_documents(tenant_id: str = Depends(get_tenant), db: Session = Depends(get_tenant_db)):
+    """Get all of the tenant's documents (for debugging)"""
     try:
-        documents = document_service.get_all_documents(db)
+        documents = document_service.get_all_documents(db, tenant_id)
         
         return [
             {
@@ -131,3 +270,133 @@ async def get_documents(db: Session = Depends(get_db)):
         
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Failed to get documents: {str(e)}")
+
+@router.patch("/documents/{document_id}")
+async def update_document(
+    document_id: int,
+    update: DocumentUpdate,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
+):
+    """Correct a document's filename or metadata; dashboards and search follow immediately"""
+    changes = update.model_dump(exclude_unset=True)
+    if not changes:
+        raise HTTPException(status_code=400, detail="No fields to update")
+    
+    document = document_service.update_document(document_id, changes, db, tenant_id)
+    if document is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return {
+        "id": document.id,
+        "filename": document.filename,
+        "agreement_type": document.agreement_type,
+        "governing_law": document.governing_law,
+        "industry": document.industry,
+        "geography": document.geography,
+        "uploaded_at": document.uploaded_at.isoformat() if document.uploaded_at else None
+    }
+
+@router.delete("/documents/{document_id}", response_model=DeleteResponse)
+async def delete_document(document_id: int, tenant_id: str = Depends(get_tenant), db: Session = Depends(get_tenant_db)):
+    """Delete a document with its sections, index entries and dashboard counts"""
+    if not document_service.delete_document(document_id, db, tenant_id):
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return DeleteResponse(deleted=1)
+
+@router.delete("/documents", response_model=DeleteResponse)
+async def delete_documents(
+    agreement_type: Optional[str] = None,
+    governing_law: Optional[str] = None,
+    industry: Optional[str] = None,
+    geography: Optional[str] = None,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
+):
+    """Delete every document matching all the given metadata values, in one transaction"""
+    filters = {
+        field: value for field, value in {
+            "agreement_type": agreement_type,
+            "governing_law": governing_law,
+            "industry": industry,
+            "geography": geography,
+        }.items() if value
+    }
+    try:
+        deleted = await run_in_threadpool(document_service.delete_documents, filters, db, tenant_id)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    return DeleteResponse(deleted=deleted)
+
+@router.get("/documents/{document_id}/sections", response_model=List[SectionResponse])
+async def get_document_sections(
+    document_id: int,
+    title: Optional[str] = Query(None, description="Only sections whose title contains this"),
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
+):
+    """Outline of a document: its clauses and sections with offsets, without their text"""
+    if document_service.get_document_by_id(document_id, db, tenant_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    return [_section_response(section) for section in section_service.list_sections(db, document_id, title)]
+
+@router.get("/documents/{document_id}/sections/{section_id}", response_model=SectionResponse)
+async def get_document_section(
+    document_id: int,
+    section_id: int,
+    tenant_id: str = Depends(get_tenant),
+    db: Session = Depends(get_tenant_db)
+):
+    """A single section of a document, including its text"""
+    if document_service.get_document_by_id(document_id, db, tenant_id) is None:
+        raise HTTPException(status_code=404, detail="Document not found")
+    
+    section = section_service.get_section(db, document_id, section_id)
+    if section is None:
+        raise HTTPException(status_code=404, detail="Section not found")
+    
+    return _section_response(section, include_text=True)
+
+def _section_response(section, include_text: bool = False) -> SectionResponse:
+    return SectionResponse(
+        id=section.id,
+        position=section.position,
+        kind=section.kind,
+        number=section.number,
+        title=section.title,
+        level=section.level,
+        page=section.page,
+        start_offset=section.start_offset,
+        end_offset=section.end_offset,
+        text=section.text if include_text else None
+    )
+
+@router.get("/export")
+async def export_documents(
+    format: Literal["csv", "jsonl", "parquet", "arrow"] = "jsonl",
+    fields: Optional[str] = Query(None, description="Comma-separated columns to export"),
+    include_content: bool = False,
+    compression: Optional[str] = Query(None, description="gzip for csv/jsonl; snappy, gzip or zstd for parquet; zstd or lz4 for arrow"),
+    tenant_id: str = Depends(get_tenant)
+):
+    """Stream all of the tenant's documents and their metadata as a file"""
+    selected = [field.strip() for field in fields.split(",") if field.strip()] if fields else None
+    try:
+        export_service.validate(format, compression)
+        export_service.resolve_fields(selected, include_content)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    
+    def stream():
+        with streaming_session(tenant_id) as db:
+            yield from export_service.iter_export(db, format, selected, include_content, compression, tenant_id=tenant_id)
+    
+    filename = f"documents.{export_service.file_extension(format, compression)}"
+    return StreamingResponse(
+        stream(),
+        media_type=export_service.media_type(format, compression),
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
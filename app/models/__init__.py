@@ -1,4 +1,8 @@
 from .document import Document
+from .rollup import DocumentRollup
+from .section import DocumentSection
+from .derived import DerivedBuild
+from . import search_index  # noqa: F401 - registers the full-text index DDL
 from .database import Base, engine
 
-__all__ = ["Document", "Base", "engine"]
+__all__ = ["Document", "DocumentRollup", "DocumentSection", "DerivedBuild", "Base", "engine"]
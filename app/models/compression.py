@@ -0,0 +1,225 @@
+import os
+import zlib
+import random
+import importlib.util
+import struct
+import logging
+import threading
+from typing import Optional, Sequence, Union
+from sqlalchemy import LargeBinary, text
+from sqlalchemy.engine import Engine
+from sqlalchemy.types import TypeDecorator
+
+logger = logging.getLogger(__name__)
+
+# Codec for newly written content: zlib (stdlib), zstd (needs zstandard) or none.
+# Without zstandard installed, zstd falls back to zlib for writes; reading zstd rows needs it.
+CONTENT_COMPRESSION = os.getenv("CONTENT_COMPRESSION", "zlib")
+# Optional zstd dictionary trained on the corpus (see compress_content.py --train-dict)
+CONTENT_ZSTD_DICT = os.getenv("CONTENT_ZSTD_DICT")
+ZLIB_LEVEL = 6
+ZSTD_LEVEL = 9
+
+# Texts shorter than this are not worth compressing
+MIN_COMPRESS_SIZE = 64
+
+# First byte of every stored value
+RAW = b"\x00"
+ZLIB = b"\x01"
+ZSTD = b"\x02"  # followed by the 4-byte dictionary id (0 = no dictionary)
+
+
+class _Zstd:
+    """Lazily created zstd (de)compressors; zstandard objects are not thread-safe, so one set per thread"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._loaded = False
+        self.dictionary = None
+        self.dict_id = 0
+
+    def _load(self):
+        with self._lock:
+            if self._loaded:
+                return
+            import zstandard
+
+            if CONTENT_ZSTD_DICT:
+                with open(CONTENT_ZSTD_DICT, "rb") as f:
+                    self.dictionary = zstandard.ZstdCompressionDict(f.read())
+                self.dictionary.precompute_compress(level=ZSTD_LEVEL)
+                self.dict_id = self.dictionary.dict_id()
+            self._loaded = True
+
+    def _codecs(self):
+        codecs = getattr(self._local, "codecs", None)
+        if codecs is None:
+            import zstandard
+
+            if not self._loaded:
+                self._load()
+            codecs = {
+                "compressor": zstandard.ZstdCompressor(level=ZSTD_LEVEL, dict_data=self.dictionary),
+                "decompressor": zstandard.ZstdDecompressor(),
+                "dict_decompressor": zstandard.ZstdDecompressor(dict_data=self.dictionary) if self.dictionary else None,
+            }
+            self._local.codecs = codecs
+        return codecs
+
+    def compress(self, data: bytes) -> bytes:
+        compressed = self._codecs()["compressor"].compress(data)
+        return ZSTD + struct.pack(">I", self.dict_id) + compressed
+
+    def decompress(self, payload: bytes) -> bytes:
+        codecs = self._codecs()
+        (dict_id,) = struct.unpack(">I", payload[:4])
+        if not dict_id:
+            return codecs["decompressor"].decompress(payload[4:])
+        if dict_id != self.dict_id:
+            raise ValueError(f"Content was compressed with zstd dictionary {dict_id}; set CONTENT_ZSTD_DICT to it")
+        return codecs["dict_decompressor"].decompress(payload[4:])
+
+
+_zstd = _Zstd()
+_zstd_fallback_warned = False
+
+
+def zstd_available() -> bool:
+    return importlib.util.find_spec("zstandard") is not None
+
+
+def use_zstd_dictionary(path: Optional[str]):
+    """Switch the zstd dictionary used by this process (e.g. right after training one)"""
+    global CONTENT_ZSTD_DICT, _zstd
+    CONTENT_ZSTD_DICT = path
+    _zstd = _Zstd()
+
+
+def train_zstd_dictionary(
+    engine: Union[Engine, Sequence[Engine]],
+    path: str,
+    samples: int = 2000,
+    dict_size: int = 112640
+) -> int:
+    """
+    Train a zstd dictionary on a sample of stored documents and write it to ``path``.
+
+    ``engine`` may be a list of databases (the shared one and the dedicated
+    tenants'), as one dictionary serves every database the server writes.
+
+    Returns:
+        int: The dictionary id recorded in every value compressed with it
+    """
+    import zstandard
+
+    corpus = []
+    for source in [engine] if isinstance(engine, Engine) else engine:
+        with source.connect() as conn:
+            rows = conn.execute(
+                text("SELECT content FROM documents WHERE content IS NOT NULL ORDER BY random() LIMIT :limit"),
+                {"limit": samples}
+            ).fetchall()
+        corpus.extend(decompress_text(row.content).encode("utf-8") for row in rows)
+
+    if len(corpus) > samples:
+        corpus = random.sample(corpus, samples)
+    dictionary = zstandard.train_dictionary(dict_size, corpus)
+    with open(path, "wb") as f:
+        f.write(dictionary.as_bytes())
+    return dictionary.dict_id()
+
+
+def compress_text(value: str, codec: Optional[str] = None) -> bytes:
+    """Encode text for storage, prefixed with its codec marker"""
+    codec = codec or CONTENT_COMPRESSION
+    data = value.encode("utf-8")
+    if codec == "none" or len(data) < MIN_COMPRESS_SIZE:
+        return RAW + data
+    if codec == "zlib":
+        return ZLIB + zlib.compress(data, ZLIB_LEVEL)
+    if codec == "zstd":
+        if zstd_available():
+            return _zstd.compress(data)
+        _warn_zstd_fallback()
+        return ZLIB + zlib.compress(data, ZLIB_LEVEL)
+    raise ValueError(f"Unsupported content compression: {codec}")
+
+
+def _warn_zstd_fallback():
+    global _zstd_fallback_warned
+    if not _zstd_fallback_warned:
+        _zstd_fallback_warned = True
+        logger.warning("zstd content compression requested but zstandard is not installed; using zlib")
+
+
+def decompress_text(value: Union[bytes, str]) -> str:
+    """Decode a stored value; plain text rows written before compression are returned as is"""
+    if isinstance(value, str):
+        return value
+
+    marker, payload = value[:1], value[1:]
+    if marker == RAW:
+        return payload.decode("utf-8")
+    if marker == ZLIB:
+        return zlib.decompress(payload).decode("utf-8")
+    if marker == ZSTD:
+        return _zstd.decompress(payload).decode("utf-8")
+    raise ValueError(f"Unknown content codec marker: {marker!r}")
+
+
+class CompressedText(TypeDecorator):
+    """Text column stored compressed; values are (de)compressed transparently"""
+
+    impl = LargeBinary
+    cache_ok = True
+
+    def process_bind_param(self, value: Optional[str], dialect) -> Optional[bytes]:
+        if value is None:
+            return None
+        return compress_text(value)
+
+    def process_result_value(self, value, dialect) -> Optional[str]:
+        if value is None:
+            return None
+        return decompress_text(value)
+
+
+def compress_existing_content(
+    engine: Engine,
+    codec: Optional[str] = None,
+    recompress: bool = False,
+    batch_size: int = 200
+) -> int:
+    """
+    Rewrite stored document content with ``codec`` (default: CONTENT_COMPRESSION).
+
+    Only rows still holding plain text are converted unless ``recompress`` is set,
+    which also re-encodes rows written with another codec or dictionary.
+
+    Returns:
+        int: Number of rows rewritten
+    """
+    condition = "content IS NOT NULL" if recompress else "typeof(content) = 'text'"
+    converted = 0
+    last_id = 0
+
+    while True:
+        with engine.begin() as conn:
+            rows = conn.execute(
+                text(f"SELECT id, content FROM documents WHERE id > :last_id AND {condition} ORDER BY id LIMIT :limit"),
+                {"last_id": last_id, "limit": batch_size}
+            ).fetchall()
+            if not rows:
+                break
+
+            conn.execute(
+                text("UPDATE documents SET content = :content WHERE id = :id"),
+                [{"id": row.id, "content": compress_text(decompress_text(row.content), codec)} for row in rows]
+            )
+            converted += len(rows)
+            last_id = rows[-1].id
+
+        logger.info(f"Compressed content of {converted} documents")
+
+    return converted
@@ -1,12 +1,32 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.engine import Engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
 from langchain_community.utilities import SQLDatabase
+from typing import Dict, Iterator, List, Optional, Sequence, TypeVar
 import os
+import re
+import threading
 
 # Database URL - using SQLite for simplicity
 DATABASE_URL = "sqlite:///./legal_documents.db"
 
+# Tenant of requests without an X-Tenant-ID header, and of all data created before tenants existed
+DEFAULT_TENANT = os.getenv("DEFAULT_TENANT", "default")
+# Tenants kept in their own database file under TENANT_DB_DIR instead of the shared one
+TENANT_DB_DIR = os.getenv("TENANT_DB_DIR", "./tenants")
+DEDICATED_TENANTS = frozenset(filter(None, (t.strip() for t in os.getenv("DEDICATED_TENANTS", "").split(","))))
+
+# Tenant ids end up in file names and cache keys
+TENANT_ID_PATTERN = re.compile(r"^[A-Za-z0-9][A-Za-z0-9_-]{0,63}$")
+
+# Rows or ids per bulk statement. Multi-row inserts and IN lists bind one parameter per
+# value and SQLite allows 32766 per statement, so even a multi-row insert of a dozen
+# columns stays under the limit
+SQL_BATCH_SIZE = 500
+
+T = TypeVar("T")
+
 engine = create_engine(
     DATABASE_URL, 
     connect_args={"check_same_thread": False}  # Only needed for SQLite
@@ -16,6 +36,9 @@ SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
 Base = declarative_base()
 
+_tenant_engines: Dict[str, Engine] = {}
+_tenant_engines_lock = threading.Lock()
+
 def get_db():
     """Dependency to get database session"""
     db = SessionLocal()
@@ -24,9 +47,130 @@ def get_db():
     finally:
         db.close()
 
-def init_db():
-    """Initialize database tables"""
-    Base.metadata.create_all(bind=engine)
+def chunked(items: Sequence[T], size: Optional[int] = None) -> Iterator[Sequence[T]]:
+    """Consecutive slices of ``items`` of at most ``size`` (default SQL_BATCH_SIZE)"""
+    size = size or SQL_BATCH_SIZE
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+def validate_tenant_id(tenant_id: str) -> str:
+    """Return ``tenant_id`` if it is usable as a tenant id, else raise ValueError"""
+    if not TENANT_ID_PATTERN.match(tenant_id or ""):
+        raise ValueError("Tenant id must be 1-64 letters, digits, '-' or '_'")
+    return tenant_id
+
+def get_engine(tenant_id: Optional[str] = None) -> Engine:
+    """Engine holding a tenant's documents: its own file if dedicated, else the shared database"""
+    if not tenant_id or tenant_id not in DEDICATED_TENANTS:
+        return engine
+    
+    with _tenant_engines_lock:
+        tenant_engine = _tenant_engines.get(tenant_id)
+        if tenant_engine is None:
+            os.makedirs(TENANT_DB_DIR, exist_ok=True)
+            tenant_engine = create_engine(
+                f"sqlite:///{os.path.join(TENANT_DB_DIR, validate_tenant_id(tenant_id) + '.db')}",
+                connect_args={"check_same_thread": False}
+            )
+            init_db(tenant_engine)
+            _tenant_engines[tenant_id] = tenant_engine
+        return tenant_engine
+
+def all_engines() -> List[Engine]:
+    """The shared engine, then each dedicated tenant's (initialized), for jobs over every database"""
+    return [engine, *(get_engine(tenant_id) for tenant_id in sorted(DEDICATED_TENANTS))]
+
+def tenant_session(tenant_id: Optional[str] = None) -> Session:
+    """New session on the database holding ``tenant_id``'s documents"""
+    return SessionLocal(bind=get_engine(tenant_id))
+
+def init_db(bind: Optional[Engine] = None):
+    """Initialize database tables, then build the derived tables not yet built"""
+    from .search_index import create_search_index
+    from ..services.derived_data import build_derived_data
+    
+    bind = bind or engine
+    _drop_outdated_derived_tables(bind)
+    Base.metadata.create_all(bind=bind)
+    _add_missing_columns(bind)
+    _drop_undeclared_indexes(bind)
+    create_search_index(bind)
+    # Here rather than at server startup, so the CLIs and tenant databases get it too
+    build_derived_data(bind)
+
+def _drop_outdated_derived_tables(bind: Engine):
+    """Drop derived tables (``info={"derived": True}``) whose primary key has changed
+    
+    Their rows cannot be migrated in place; ``create_all`` recreates them empty and,
+    as they are marked unbuilt, ``build_derived_data`` refills them from the documents.
+    """
+    from .derived import mark_unbuilt
+    
+    inspector = inspect(bind)
+    
+    for table in Base.metadata.sorted_tables:
+        if not table.info.get("derived") or not inspector.has_table(table.name):
+            continue
+        
+        existing = inspector.get_pk_constraint(table.name)["constrained_columns"]
+        if existing != [column.name for column in table.primary_key.columns]:
+            with bind.begin() as conn:
+                mark_unbuilt(conn, table.name)
+                table.drop(bind=conn)
+
+def _add_missing_columns(bind: Engine):
+    """Add columns (and their indexes) declared on models but missing from existing tables
+    
+    ``create_all`` only creates tables that do not exist yet, so databases created by an
+    older release need new columns added in place.
+    """
+    inspector = inspect(bind)
+    
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        existing = {column["name"] for column in inspector.get_columns(table.name)}
+        missing = [column for column in table.columns if column.name not in existing]
+        if not missing:
+            continue
+        
+        with bind.begin() as conn:
+            for column in missing:
+                column_type = column.type.compile(dialect=bind.dialect)
+                default = ""
+                if column.server_default is not None and isinstance(column.server_default.arg, str):
+                    # Constant defaults backfill the existing rows
+                    default = " DEFAULT '{}'".format(column.server_default.arg.replace("'", "''"))
+                conn.execute(text(f"ALTER TABLE {table.name} ADD COLUMN {column.name} {column_type}{default}"))
+            
+            missing_names = {column.name for column in missing}
+            for index in table.indexes:
+                if missing_names.intersection(column.name for column in index.columns):
+                    index.create(bind=conn, checkfirst=True)
+
+def _drop_undeclared_indexes(bind: Engine):
+    """Drop ``ix_`` indexes of model tables that the models no longer declare
+    
+    Indexes replaced by newer ones (e.g. single-column ones superseded by tenant
+    composites) would otherwise still be maintained on every write. Indexes under
+    other names are left alone, as they were not created from the models.
+    """
+    inspector = inspect(bind)
+    
+    for table in Base.metadata.sorted_tables:
+        if not inspector.has_table(table.name):
+            continue
+        
+        declared = {index.name for index in table.indexes}
+        outdated = [
+            index["name"] for index in inspector.get_indexes(table.name)
+            if index["name"].startswith("ix_") and index["name"] not in declared
+        ]
+        if outdated:
+            with bind.begin() as conn:
+                for name in outdated:
+                    conn.execute(text(f"DROP INDEX {name}"))
 
 def get_langchain_db() -> SQLDatabase:
     """Get SQLDatabase instance for langchain
@@ -0,0 +1,25 @@
+from sqlalchemy import Column, DateTime, String, inspect
+from sqlalchemy.engine import Connection
+from sqlalchemy.sql import func
+from .database import Base
+
+class DerivedBuild(Base):
+    """A derived table (rollups, search index, sections) fully built from the documents
+    
+    init_db removes the row of a table it drops or recreates and rebuilds every
+    table without one, so derived data is complete whichever entry point opens
+    the database first. A non-empty table is no proof: documents added after
+    the table was recreated would make it look built.
+    """
+    __tablename__ = "derived_builds"
+    
+    name = Column(String, primary_key=True)  # table name
+    built_at = Column(DateTime(timezone=True), server_default=func.now())
+    
+    def __repr__(self):
+        return f"<DerivedBuild({self.name} at {self.built_at})>"
+
+def mark_unbuilt(conn: Connection, name: str):
+    """Forget that derived table ``name`` was built, in the transaction that drops it"""
+    if inspect(conn).has_table(DerivedBuild.__tablename__):
+        conn.execute(DerivedBuild.__table__.delete().where(DerivedBuild.name == name))
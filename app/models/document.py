@@ -1,26 +1,50 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime
+from datetime import datetime, timezone
+from sqlalchemy import Column, Index, Integer, String, DateTime
+from sqlalchemy.orm import deferred, relationship
 from sqlalchemy.sql import func
-from .database import Base
+from .database import Base, DEFAULT_TENANT
+from .compression import CompressedText
 
 class Document(Base):
     __tablename__ = "documents"
     
+    # Every query is scoped to one tenant, so the indexes below lead with it
+    __table_args__ = (
+        Index("ix_documents_tenant_agreement_type", "tenant_id", "agreement_type"),
+        Index("ix_documents_tenant_governing_law", "tenant_id", "governing_law"),
+        Index("ix_documents_tenant_industry", "tenant_id", "industry"),
+        Index("ix_documents_tenant_geography", "tenant_id", "geography"),
+        Index("ix_documents_tenant_uploaded_at", "tenant_id", "uploaded_at"),
+        Index("ix_documents_tenant_content_hash", "tenant_id", "content_hash"),
+    )
+    
     id = Column(Integer, primary_key=True, index=True)
+    tenant_id = Column(String, nullable=False, default=DEFAULT_TENANT, server_default=DEFAULT_TENANT)
     filename = Column(String, index=True)
     file_type = Column(String)  # pdf, docx
     file_size = Column(Integer)
-    content = Column(Text)
+    content_hash = Column(String(64))  # SHA-256 of the uploaded bytes
+    content = deferred(Column(CompressedText))  # compressed on disk, loaded on first access
     
     # Extracted metadata
-    agreement_type = Column(String, index=True)  # NDA, MSA, etc.
-    governing_law = Column(String, index=True)   # UAE, UK, etc.
-    # jurisdiction = Column(String, index=True)     # Specific jurisdiction
-    industry = Column(String, index=True)        # Technology, Oil & Gas, etc.
-    geography = Column(String, index=True)       # Middle East, Europe, etc.
+    agreement_type = Column(String)  # NDA, MSA, etc.
+    governing_law = Column(String)   # UAE, UK, etc.
+    # jurisdiction = Column(String)     # Specific jurisdiction
+    industry = Column(String)        # Technology, Oil & Gas, etc.
+    geography = Column(String)       # Middle East, Europe, etc.
     
     # Processing metadata
-    uploaded_at = Column(DateTime(timezone=True), server_default=func.now())
+    # Set client-side too so ingest hooks (e.g. rollups) can bucket a row during its flush
+    uploaded_at = Column(DateTime(timezone=True), default=lambda: datetime.now(timezone.utc), server_default=func.now())
     processed_at = Column(DateTime(timezone=True), onupdate=func.now())
     
+    # Written and removed by the section service's change handler
+    sections = relationship(
+        "DocumentSection",
+        order_by="DocumentSection.position",
+        cascade="all, delete-orphan",
+        passive_deletes=True
+    )
+    
     def __repr__(self):
         return f"<Document(id={self.id}, filename='{self.filename}', agreement_type='{self.agreement_type}')>"
@@ -0,0 +1,19 @@
+from sqlalchemy import Column, Integer, String, Date
+from .database import Base
+
+class DocumentRollup(Base):
+    """Document counts per time bucket and metadata value, maintained on ingest"""
+    __tablename__ = "document_rollups"
+    # Rebuilt from the documents when its key changes
+    __table_args__ = {"info": {"derived": True}}
+    
+    # Primary key order serves range scans for one tenant, granularity and facet
+    tenant_id = Column(String, primary_key=True)
+    granularity = Column(String, primary_key=True)  # week, month
+    facet = Column(String, primary_key=True)        # agreement_type, ..., or total
+    bucket = Column(Date, primary_key=True)         # first day of the week/month
+    value = Column(String, primary_key=True)        # metadata value ("" for total)
+    count = Column(Integer, nullable=False, default=0)
+    
+    def __repr__(self):
+        return f"<DocumentRollup({self.tenant_id} {self.granularity} {self.bucket} {self.facet}='{self.value}': {self.count})>"
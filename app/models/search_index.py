@@ -0,0 +1,41 @@
+from sqlalchemy import DDL, event, text
+from sqlalchemy.engine import Engine
+from .derived import mark_unbuilt
+from .document import Document
+
+# Full-text index over Document.content, keyed by document id (rowid).
+# Contentless: the text itself stays only in the compressed documents table.
+# The tenant column holds search_tenant_key(tenant_id), so a MATCH restricted to
+# it only walks the postings of one tenant's documents.
+SEARCH_TABLE = "documents_fts"
+SEARCH_COLUMNS = ("content", "tenant")
+
+CREATE_SEARCH_INDEX = (
+    f"CREATE VIRTUAL TABLE IF NOT EXISTS {SEARCH_TABLE} "
+    f"USING fts5({', '.join(SEARCH_COLUMNS)}, content='', tokenize='porter unicode61')"
+)
+
+# Created along with the documents table on new databases
+event.listen(Document.__table__, "after_create", DDL(CREATE_SEARCH_INDEX))
+
+def search_tenant_key(tenant_id: str) -> str:
+    """Token standing for a tenant in the index
+
+    Tenant ids may contain '-' and '_', which the tokenizer splits on, and the
+    porter stemmer would conflate ids like "acme" and "acmes"; the decimal byte
+    values are always a single token that is never stemmed.
+    """
+    return "".join(f"{byte:03d}" for byte in tenant_id.encode())
+
+def create_search_index(engine: Engine):
+    """Create the full-text index on databases that predate it (or its tenant column)
+
+    An outdated index is dropped and recreated empty, and marked unbuilt so
+    init_db refills it from the documents.
+    """
+    with engine.begin() as conn:
+        columns = tuple(row[1] for row in conn.execute(text(f"PRAGMA table_info({SEARCH_TABLE})")))
+        if columns and columns != SEARCH_COLUMNS:
+            mark_unbuilt(conn, SEARCH_TABLE)
+            conn.execute(text(f"DROP TABLE {SEARCH_TABLE}"))
+        conn.execute(text(CREATE_SEARCH_INDEX))
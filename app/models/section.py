@@ -0,0 +1,24 @@
+from sqlalchemy import Column, ForeignKey, Integer, String
+from sqlalchemy.orm import deferred
+from .database import Base
+from .compression import CompressedText
+
+class DocumentSection(Base):
+    """A heading-delimited section or numbered clause of a document's text, written on ingest"""
+    __tablename__ = "document_sections"
+    
+    id = Column(Integer, primary_key=True)
+    document_id = Column(Integer, ForeignKey("documents.id"), nullable=False, index=True)
+    position = Column(Integer, nullable=False)  # order within the document, from 0
+    kind = Column(String, nullable=False)       # preamble, heading, clause
+    number = Column(String)                     # clause number as written, e.g. 12.3
+    title = Column(String, index=True)
+    level = Column(Integer, nullable=False)     # 0 for the preamble, then numbering depth
+    page = Column(Integer)                      # 1-based page the section starts on
+    # Character range of the section within Document.content
+    start_offset = Column(Integer, nullable=False)
+    end_offset = Column(Integer, nullable=False)
+    text = deferred(Column(CompressedText))
+    
+    def __repr__(self):
+        return f"<DocumentSection(document_id={self.document_id}, number='{self.number}', title='{self.title}')>"
@@ -1,5 +1,23 @@
 from .document_service import DocumentService
 from .query_service import QueryService
 from .metadata_extractor import MetadataExtractor
+from .dashboard_service import DashboardService
+from .rollup_service import RollupService
+from .export_service import ExportService
+from .import_service import BulkImporter
+from .search_service import SearchService
+from .llm_scheduler import LLMScheduler
+from .section_service import SectionService
 
-__all__ = ["DocumentService", "QueryService", "MetadataExtractor"]
+__all__ = [
+    "DocumentService",
+    "QueryService",
+    "MetadataExtractor",
+    "DashboardService",
+    "RollupService",
+    "ExportService",
+    "BulkImporter",
+    "SearchService",
+    "LLMScheduler",
+    "SectionService",
+]
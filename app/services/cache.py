@@ -0,0 +1,280 @@
+import os
+import json
+import time
+import sqlite3
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+from ..models.database import DEFAULT_TENANT
+
+logger = logging.getLogger(__name__)
+
+CACHE_DB_PATH = os.getenv("CACHE_DB_PATH", "./cache.db")
+CACHE_LOCAL_SIZE = int(os.getenv("CACHE_LOCAL_SIZE", 1024))
+CACHE_MAX_ENTRIES = int(os.getenv("CACHE_MAX_ENTRIES", 50000))
+
+# Namespaces used by the services
+METADATA_NAMESPACE = "metadata"
+QUESTION_NAMESPACE = "question"
+# Results derived from the documents table; its version doubles as the data version.
+# Each tenant has its own (see documents_namespace), so writes only invalidate theirs.
+DOCUMENTS_NAMESPACE = "documents"
+
+# Prune the shared store once every this many writes
+EVICTION_INTERVAL = 100
+
+_MISSING = object()
+
+
+def documents_namespace(tenant_id: str) -> str:
+    """Namespace of a tenant's document-derived results (the default tenant keeps the original one)"""
+    return DOCUMENTS_NAMESPACE if tenant_id == DEFAULT_TENANT else f"{DOCUMENTS_NAMESPACE}:{tenant_id}"
+
+
+class SharedCache:
+    """
+    Two-tier cache that stays coherent across uvicorn workers.
+
+    Each process keeps a small LRU in memory in front of a SQLite key-value file
+    shared by every worker. Entries are grouped into namespaces with a version
+    counter; ``invalidate`` bumps the counter, which makes every entry of the
+    namespace stale in all processes at once. Other workers notice the bump
+    through ``PRAGMA data_version``, which changes whenever another connection
+    commits, so checking for it costs no table read.
+
+    Values must be JSON serializable.
+    """
+
+    def __init__(
+        self,
+        path: str = CACHE_DB_PATH,
+        local_size: int = CACHE_LOCAL_SIZE,
+        max_entries: int = CACHE_MAX_ENTRIES
+    ):
+        self.path = path
+        self.local_size = local_size
+        self.max_entries = max_entries
+        self._lock = threading.RLock()
+        self._pid = None
+        self._connect()
+
+    def _connect(self):
+        """Open the shared store (again after a fork, as connections cannot be shared)"""
+        self._conn = sqlite3.connect(self.path, timeout=5.0, check_same_thread=False, isolation_level=None)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_entries ("
+            "namespace TEXT NOT NULL, key TEXT NOT NULL, version INTEGER NOT NULL, "
+            "value TEXT NOT NULL, expires_at REAL, stored_at REAL NOT NULL, "
+            "PRIMARY KEY (namespace, key))"
+        )
+        self._conn.execute("CREATE INDEX IF NOT EXISTS ix_cache_entries_stored_at ON cache_entries (stored_at)")
+        self._conn.execute(
+            "CREATE TABLE IF NOT EXISTS cache_namespaces ("
+            "namespace TEXT PRIMARY KEY, version INTEGER NOT NULL)"
+        )
+
+        self._pid = os.getpid()
+        self._local: "OrderedDict[tuple, tuple]" = OrderedDict()
+        self._versions: Dict[str, int] = {}
+        self._data_version = None
+        self._writes = 0
+
+    def _check_process(self):
+        if os.getpid() != self._pid:
+            self._connect()
+
+    def _refresh_versions(self):
+        """Reload namespace versions if another process has committed since the last check"""
+        data_version = self._conn.execute("PRAGMA data_version").fetchone()[0]
+        if data_version != self._data_version:
+            self._data_version = data_version
+            self._versions = dict(self._conn.execute("SELECT namespace, version FROM cache_namespaces"))
+
+    def version(self, namespace: str) -> int:
+        """Current version of a namespace (0 until it is first invalidated)"""
+        with self._lock:
+            self._check_process()
+            self._refresh_versions()
+            return self._versions.get(namespace, 0)
+
+    def get(self, namespace: str, key: str, default: Any = None) -> Any:
+        """Return a cached value, or ``default`` if it is missing, expired or invalidated"""
+        _, value = self._lookup(namespace, key)
+        return default if value is _MISSING else value
+
+    def _lookup(self, namespace: str, key: str) -> Tuple[int, Any]:
+        """Current namespace version and the entry stored for it (``_MISSING`` if none), read together"""
+        with self._lock:
+            self._check_process()
+            self._refresh_versions()
+            version = self._versions.get(namespace, 0)
+            now = time.time()
+
+            local_key = (namespace, key)
+            entry = self._local.get(local_key)
+            if entry is not None:
+                entry_version, expires_at, value = entry
+                if entry_version == version and (expires_at is None or expires_at > now):
+                    self._local.move_to_end(local_key)
+                    return version, value
+                del self._local[local_key]
+
+            row = self._conn.execute(
+                "SELECT version, value, expires_at FROM cache_entries WHERE namespace = ? AND key = ?",
+                (namespace, key)
+            ).fetchone()
+            if row is None:
+                return version, _MISSING
+
+            entry_version, raw, expires_at = row
+            if entry_version != version or (expires_at is not None and expires_at <= now):
+                return version, _MISSING
+
+            value = json.loads(raw)
+            self._remember(local_key, (entry_version, expires_at, value))
+            return version, value
+
+    def set(
+        self,
+        namespace: str,
+        key: str,
+        value: Any,
+        ttl: Optional[float] = None,
+        version: Optional[int] = None
+    ):
+        """Store a value in both tiers; ``ttl`` is in seconds
+        
+        Pass the namespace ``version`` read before computing the value, so a result
+        computed while the namespace was invalidated is never served as current.
+        """
+        raw = json.dumps(value)
+        with self._lock:
+            self._check_process()
+            self._refresh_versions()
+            current = self._versions.get(namespace, 0)
+            if version is None:
+                version = current
+            elif version != current:
+                # Computed from data that has changed since; don't store it
+                return
+            now = time.time()
+            expires_at = now + ttl if ttl is not None else None
+
+            self._conn.execute(
+                "INSERT OR REPLACE INTO cache_entries (namespace, key, version, value, expires_at, stored_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (namespace, key, version, raw, expires_at, now)
+            )
+            self._remember((namespace, key), (version, expires_at, json.loads(raw)))
+
+            self._writes += 1
+            if self._writes % EVICTION_INTERVAL == 0:
+                self._evict()
+
+    def get_or_set(
+        self,
+        namespace: str,
+        key: str,
+        factory: Callable[[], Any],
+        ttl: Optional[float] = None,
+        version: Optional[int] = None
+    ) -> Any:
+        """Return the cached value, computing and storing it with ``factory`` on a miss
+        
+        The value is stored under the namespace version current when the miss was
+        seen (or ``version``, if given), so if the namespace is invalidated while
+        ``factory`` runs, the result is returned but not cached as current.
+        """
+        return self.get_or_set_versioned(namespace, key, factory, ttl=ttl, version=version)[1]
+
+    def get_or_set_versioned(
+        self,
+        namespace: str,
+        key: str,
+        factory: Callable[[], Any],
+        ttl: Optional[float] = None,
+        version: Optional[int] = None
+    ) -> Tuple[int, Any]:
+        """Like ``get_or_set``, also returning the namespace version the value belongs to
+        
+        A value computed across an invalidation is labelled with the older version,
+        so a caller using it as an ETag refetches rather than keeps stale data.
+        """
+        current, value = self._lookup(namespace, key)
+        if value is _MISSING:
+            if version is not None:
+                current = version
+            value = factory()
+            self.set(namespace, key, value, ttl=ttl, version=current)
+        return current, value
+
+    def delete(self, namespace: str, key: str):
+        """Remove a single entry"""
+        with self._lock:
+            self._check_process()
+            self._local.pop((namespace, key), None)
+            self._conn.execute("DELETE FROM cache_entries WHERE namespace = ? AND key = ?", (namespace, key))
+
+    def invalidate(self, namespace: str) -> int:
+        """Invalidate every entry of a namespace in all processes and return its new version"""
+        with self._lock:
+            self._check_process()
+            # One statement, so a concurrent bump from another process cannot be read back instead
+            version = self._conn.execute(
+                "INSERT INTO cache_namespaces (namespace, version) VALUES (?, 1) "
+                "ON CONFLICT(namespace) DO UPDATE SET version = version + 1 RETURNING version",
+                (namespace,)
+            ).fetchone()[0]
+            self._versions[namespace] = version
+
+            for local_key in [k for k in self._local if k[0] == namespace]:
+                del self._local[local_key]
+
+            return version
+
+    def clear(self):
+        """Remove all entries (namespace versions are kept so they keep increasing)"""
+        with self._lock:
+            self._check_process()
+            self._local.clear()
+            self._conn.execute("DELETE FROM cache_entries")
+
+    def _remember(self, local_key: tuple, entry: tuple):
+        self._local[local_key] = entry
+        self._local.move_to_end(local_key)
+        while len(self._local) > self.local_size:
+            self._local.popitem(last=False)
+
+    def _evict(self):
+        """Drop expired and invalidated entries, then the oldest ones above ``max_entries``"""
+        now = time.time()
+        self._conn.execute("DELETE FROM cache_entries WHERE expires_at IS NOT NULL AND expires_at <= ?", (now,))
+        self._conn.execute(
+            "DELETE FROM cache_entries WHERE version < "
+            "(SELECT version FROM cache_namespaces WHERE cache_namespaces.namespace = cache_entries.namespace)"
+        )
+
+        count = self._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        if count > self.max_entries:
+            self._conn.execute(
+                "DELETE FROM cache_entries WHERE rowid IN "
+                "(SELECT rowid FROM cache_entries ORDER BY stored_at LIMIT ?)",
+                (count - self.max_entries,)
+            )
+
+
+_cache: Optional[SharedCache] = None
+_cache_lock = threading.Lock()
+
+
+def get_cache() -> SharedCache:
+    """Get the process-wide cache instance"""
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = SharedCache()
+        return _cache
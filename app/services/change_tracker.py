@@ -0,0 +1,164 @@
+import logging
+from typing import Any, Callable, Dict, Iterable, List, Set
+from sqlalchemy import event, inspect, select
+from sqlalchemy.orm import Session
+
+from ..models.document import Document
+from .cache import documents_namespace, get_cache
+
+logger = logging.getLogger(__name__)
+
+CHANGES_KEY = "document_changes"
+SNAPSHOT_KEY = "document_snapshot"
+
+# Columns whose previous values are captured for deleted and updated documents
+SNAPSHOT_COLUMNS = ("tenant_id", "filename", "agreement_type", "governing_law", "industry", "geography", "uploaded_at")
+CONTENT_COLUMN = "content"
+
+
+class ChangeSet:
+    """Documents inserted, updated and deleted by one transaction"""
+
+    def __init__(self):
+        self.inserted: List[Document] = []
+        self.updated: List[Document] = []
+        self.deleted: List[Document] = []
+        # Stored values before the change, by document id, for updated and deleted documents.
+        # Deleted documents have every snapshot column plus content; updated ones only the
+        # columns that changed.
+        self.old_values: Dict[int, Dict[str, Any]] = {}
+        # Tenants whose documents changed
+        self.tenants: Set[str] = set()
+
+    def __bool__(self):
+        return bool(self.inserted or self.updated or self.deleted)
+
+
+def document_id(document: Document) -> int:
+    """Primary key of a flushed document, without loading attributes of a deleted row"""
+    return inspect(document).identity[0]
+
+
+# Handlers run inside the transaction, right after each flush: (session, flush_changes)
+flush_handlers: List[Callable[[Session, ChangeSet], None]] = []
+
+# Handlers run once the transaction has committed: (transaction_changes)
+commit_handlers: List[Callable[[ChangeSet], None]] = []
+
+
+def on_flush(handler: Callable[[Session, ChangeSet], None]):
+    """Register a handler that keeps derived tables in step within the same transaction"""
+    flush_handlers.append(handler)
+    return handler
+
+
+def on_commit(handler: Callable[[ChangeSet], None]):
+    """Register a handler for side effects outside the database, such as caches"""
+    commit_handlers.append(handler)
+    return handler
+
+
+def _is_modified(document: Document) -> bool:
+    state = inspect(document)
+    return any(attr.history.has_changes() for attr in state.attrs if attr.key in SNAPSHOT_COLUMNS or attr.key == CONTENT_COLUMN)
+
+
+@event.listens_for(Session, "before_flush")
+def _before_flush(session: Session, flush_context, instances):
+    """Read the stored values of documents about to be updated or deleted
+    
+    Derived structures need them to retract what the old row contributed (e.g.
+    the text a contentless full-text index entry was built from), and they are
+    gone from the table once the flush ran.
+    """
+    deleted = [obj for obj in session.deleted if isinstance(obj, Document)]
+    updated = [obj for obj in session.dirty if isinstance(obj, Document) and _is_modified(obj)]
+    if not deleted and not updated:
+        session.info.pop(SNAPSHOT_KEY, None)
+        return
+    
+    with_content = {document_id(obj) for obj in deleted}
+    with_content.update(
+        document_id(obj) for obj in updated if inspect(obj).attrs[CONTENT_COLUMN].history.has_changes()
+    )
+    ids = with_content | {document_id(obj) for obj in updated}
+    
+    columns = [Document.id] + [getattr(Document, column) for column in SNAPSHOT_COLUMNS]
+    snapshot = {}
+    for row in session.execute(select(*columns).where(Document.id.in_(ids))):
+        snapshot[row.id] = dict(zip(SNAPSHOT_COLUMNS, row[1:]))
+    if with_content:
+        for row in session.execute(select(Document.id, Document.content).where(Document.id.in_(with_content))):
+            snapshot[row.id][CONTENT_COLUMN] = row.content
+    session.info[SNAPSHOT_KEY] = snapshot
+
+
+@event.listens_for(Session, "after_flush")
+def _after_flush(session: Session, flush_context):
+    snapshot = session.info.pop(SNAPSHOT_KEY, {})
+    
+    changes = ChangeSet()
+    changes.inserted = [obj for obj in session.new if isinstance(obj, Document)]
+    changes.deleted = [obj for obj in session.deleted if isinstance(obj, Document)]
+    changes.tenants = {obj.tenant_id for obj in changes.inserted}
+    changes.tenants.update(values["tenant_id"] for values in snapshot.values())
+    for obj in changes.deleted:
+        changes.old_values[document_id(obj)] = snapshot.get(document_id(obj), {})
+    
+    for obj in session.dirty:
+        if not isinstance(obj, Document) or document_id(obj) not in snapshot:
+            continue
+        # History still holds this flush's changes until after_flush returns
+        state = inspect(obj)
+        changed = {
+            key: value for key, value in snapshot[document_id(obj)].items()
+            if state.attrs[key].history.has_changes()
+        }
+        if changed:
+            changes.updated.append(obj)
+            changes.old_values[document_id(obj)] = changed
+            changes.tenants.add(obj.tenant_id)
+    
+    if not changes:
+        return
+
+    for handler in flush_handlers:
+        handler(session, changes)
+
+    pending = session.info.setdefault(CHANGES_KEY, ChangeSet())
+    pending.inserted.extend(changes.inserted)
+    known = {id(obj) for obj in pending.updated}
+    pending.updated.extend(obj for obj in changes.updated if id(obj) not in known)
+    pending.deleted.extend(changes.deleted)
+    pending.tenants.update(changes.tenants)
+    for key, values in changes.old_values.items():
+        # Keep the values from before the transaction's first change
+        pending.old_values[key] = {**values, **pending.old_values.get(key, {})}
+
+
+def invalidate_tenants(tenants: Iterable[str]):
+    """Drop the cached results derived from these tenants' documents"""
+    for tenant_id in tenants:
+        get_cache().invalidate(documents_namespace(tenant_id))
+
+
+@event.listens_for(Session, "after_commit")
+def _after_commit(session: Session):
+    changes = session.info.pop(CHANGES_KEY, None)
+    if not changes:
+        return
+
+    # Bump the data versions first so readers never see a stale cached result
+    invalidate_tenants(changes.tenants)
+
+    for handler in commit_handlers:
+        try:
+            handler(changes)
+        except Exception as e:
+            logger.error(f"Commit handler {handler.__name__} failed: {e}")
+
+
+@event.listens_for(Session, "after_rollback")
+def _after_rollback(session: Session):
+    session.info.pop(CHANGES_KEY, None)
+    session.info.pop(SNAPSHOT_KEY, None)
@@ -0,0 +1,52 @@
+import logging
+from typing import Any, Dict, Optional, Tuple
+from sqlalchemy import func
+from sqlalchemy.orm import Session
+
+from ..models.database import DEFAULT_TENANT
+from ..models.document import Document
+from .cache import SharedCache, documents_namespace, get_cache
+from . import change_tracker  # noqa: F401 - keeps the data version in step with commits
+
+logger = logging.getLogger(__name__)
+
+# Dashboard field -> document column
+FACETS = {
+    "agreement_types": Document.agreement_type,
+    "governing_laws": Document.governing_law,
+    "industries": Document.industry,
+    "geographies": Document.geography,
+}
+
+
+class DashboardService:
+    """Facet counts for the dashboard, cached per tenant until that tenant's documents change"""
+
+    def __init__(self, cache: Optional[SharedCache] = None):
+        self.cache = cache or get_cache()
+
+    def get_version(self, tenant_id: str = DEFAULT_TENANT) -> int:
+        """Data version of a tenant's documents; bumped by every insert, update or delete"""
+        return self.cache.version(documents_namespace(tenant_id))
+
+    def get_dashboard(self, db: Session, tenant_id: str = DEFAULT_TENANT) -> Tuple[int, Dict[str, Any]]:
+        """Return the facet counts and the data version they were computed for"""
+        return self.cache.get_or_set_versioned(
+            documents_namespace(tenant_id),
+            "dashboard",
+            lambda: self._aggregate(db, tenant_id)
+        )
+
+    def _aggregate(self, db: Session, tenant_id: str) -> Dict[str, Any]:
+        """Count a tenant's documents per value of each metadata field"""
+        data = {}
+        for name, column in FACETS.items():
+            # Served from the (tenant_id, field) index without reading other tenants' rows
+            rows = (
+                db.query(column, func.count(Document.id))
+                .filter(Document.tenant_id == tenant_id, column.isnot(None), column != "")
+                .group_by(column)
+                .all()
+            )
+            data[name] = {value: count for value, count in rows}
+        return data
@@ -0,0 +1,49 @@
+import logging
+from typing import Callable, Dict
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from ..models.database import SessionLocal
+from ..models.derived import DerivedBuild
+from ..models.document import Document
+from ..models.rollup import DocumentRollup
+from ..models.search_index import SEARCH_TABLE
+from ..models.section import DocumentSection
+from .change_tracker import invalidate_tenants
+from .rollup_service import RollupService
+from .search_service import SearchService
+from .section_service import SectionService
+
+logger = logging.getLogger(__name__)
+
+# Rebuild of each derived table from the documents, by table name
+BUILDERS: Dict[str, Callable[[Session], None]] = {
+    DocumentRollup.__tablename__: RollupService().rebuild,
+    SEARCH_TABLE: SearchService().rebuild,
+    DocumentSection.__tablename__: SectionService().rebuild,
+}
+
+def build_derived_data(bind: Engine):
+    """
+    Rebuild the derived tables of a database that are not marked built.
+    
+    That is every table on a database created before the markers existed, and a
+    table init_db has just dropped or recreated. Once built, the change tracker
+    keeps a table current, so this is a no-op on later starts.
+    """
+    with SessionLocal(bind=bind) as db:
+        built = {name for (name,) in db.query(DerivedBuild.name)}
+        rebuilt = False
+        for name, rebuild in BUILDERS.items():
+            if name in built:
+                continue
+            logger.info(f"Building {name} from the documents")
+            rebuild(db)
+            # Another process opening the same database may have built it meanwhile
+            db.execute(insert(DerivedBuild).values(name=name).on_conflict_do_nothing())
+            db.commit()
+            rebuilt = True
+        
+        if rebuilt:
+            invalidate_tenants(tenant_id for (tenant_id,) in db.query(Document.tenant_id).distinct())
@@ -1,59 +1,134 @@
 import os
 import logging
-from typing import List, Dict, Optional
+from typing import Any, BinaryIO, Callable, List, Dict, Optional, Tuple, Union
 from fastapi import UploadFile
+from fastapi.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
 import PyPDF2
-from docx import Document as DocxDocument
-from io import BytesIO
 
+from ..models.database import DEFAULT_TENANT, chunked
 from ..models.document import Document
-from .metadata_extractor import MetadataExtractor
+from .metadata_extractor import MetadataExtractor, clean_metadata
+from .docx_extractor import extract_docx_text
+from .upload_spooler import SpooledUpload, spool_upload
+from .search_service import FILTER_FIELDS
+from . import change_tracker  # noqa: F401 - invalidates derived data on commit
 
 logger = logging.getLogger(__name__)
 
+# Called with (event, data) as each file moves through the pipeline
+ProgressCallback = Callable[[str, Dict[str, Any]], None]
+
+# Fields a client may correct after upload; content and timestamps are fixed
+EDITABLE_FIELDS = ("filename",) + FILTER_FIELDS
+
 class DocumentService:
     """Service for handling document uploads and processing"""
     
     def __init__(self):
         self.metadata_extractor = MetadataExtractor()
     
-    async def process_upload(self, files: List[UploadFile], db: Session) -> Dict[str, int]:
-        """Process multiple uploaded files"""
-        processed = 0
-        failed = 0
+    async def process_upload(
+        self,
+        files: List[UploadFile],
+        db: Session,
+        progress: Optional[ProgressCallback] = None,
+        tenant_id: str = DEFAULT_TENANT
+    ) -> Dict[str, int]:
+        """Process multiple uploaded files into ``tenant_id``'s documents
+        
+        ``progress`` receives a received, extracted, metadata and committed event per
+        file (or failed, at whichever step it failed), each with the file's index and
+        name, as soon as the step completes.
+        """
+        return await self.process_spooled(await self.spool_uploads(files), db, progress, tenant_id)
+    
+    async def spool_uploads(self, files: List[UploadFile]) -> List[Tuple[str, Union[SpooledUpload, Exception]]]:
+        """Read every upload to disk while the request is still open
         
+        Returns (filename, upload) pairs; a file that was rejected comes with the
+        error instead, so it is reported as failed when the batch is processed.
+        """
+        spooled = []
         for file in files:
             try:
-                await self._process_single_file(file, db)
-                processed += 1
-                logger.info(f"Successfully processed {file.filename}")
+                spooled.append((file.filename, await spool_upload(file)))
             except Exception as e:
-                failed += 1
-                logger.error(f"Failed to process {file.filename}: {e}")
-        
-        return {"processed": processed, "failed": failed}
+                spooled.append((file.filename, e))
+        return spooled
     
-    async def _process_single_file(self, file: UploadFile, db: Session):
-        """Process a single uploaded file"""
-        # Validate file type
-        if not self._is_valid_file_type(file.filename):
-            raise ValueError(f"Unsupported file type: {file.filename}")
+    async def process_spooled(
+        self,
+        spooled: List[Tuple[str, Union[SpooledUpload, Exception]]],
+        db: Session,
+        progress: Optional[ProgressCallback] = None,
+        tenant_id: str = DEFAULT_TENANT
+    ) -> Dict[str, int]:
+        """Process uploads returned by ``spool_uploads``, removing their temporary files"""
+        processed = 0
+        failed = 0
         
-        # Read file content
-        content = await file.read()
+        try:
+            for index, (filename, upload) in enumerate(spooled):
+                report = self._file_reporter(progress, index, filename)
+                try:
+                    if isinstance(upload, Exception):
+                        raise upload
+                    await self._process_single_file(upload, db, report, tenant_id)
+                    processed += 1
+                    logger.info(f"Successfully processed {filename}")
+                except Exception as e:
+                    failed += 1
+                    logger.error(f"Failed to process {filename}: {e}")
+                    report("failed", error=getattr(e, "detail", None) or str(e))
+        finally:
+            self.discard_spooled(spooled)
         
-        # Extract text based on file type
-        text_content = self._extract_text(content, file.filename)
+        return {"processed": processed, "failed": failed}
+    
+    def discard_spooled(self, spooled: List[Tuple[str, Union[SpooledUpload, Exception]]]):
+        """Remove the temporary files of spooled uploads (safe to call more than once)"""
+        for _, upload in spooled:
+            if isinstance(upload, SpooledUpload):
+                upload.cleanup()
+    
+    def _file_reporter(self, progress: Optional[ProgressCallback], index: int, filename: str):
+        def report(event: str, **data):
+            if progress:
+                progress(event, {"index": index, "filename": filename, **data})
+        return report
+    
+    async def _process_single_file(
+        self,
+        upload: SpooledUpload,
+        db: Session,
+        report: Optional[Callable[..., None]] = None,
+        tenant_id: str = DEFAULT_TENANT
+    ):
+        """Process a single spooled upload"""
+        report = report or self._file_reporter(None, 0, upload.filename)
         
-        # Extract metadata
-        metadata = self.metadata_extractor.extract_metadata(text_content, file.filename)
+        with upload:
+            report("received", file_type=upload.file_type, size=upload.size)
+            
+            # Extract text based on the sniffed file type
+            with upload.open() as stream:
+                text_content = await run_in_threadpool(self.extract_text, stream, upload.file_type)
+        report("extracted", characters=len(text_content))
+
+        # Extract metadata; the LLM call may wait behind the scheduler, so keep it off the event loop
+        metadata = clean_metadata(
+            await run_in_threadpool(self.metadata_extractor.extract_metadata, text_content, upload.filename)
+        )
+        report("metadata", metadata=metadata)
         
         # Create document record
         document = Document(
-            filename=file.filename,
-            file_type=self._get_file_type(file.filename),
-            file_size=len(content),
+            tenant_id=tenant_id,
+            filename=upload.filename,
+            file_type=upload.file_type,
+            file_size=upload.size,
+            content_hash=upload.sha256,
             content=text_content,
             **metadata
         )
@@ -62,64 +137,110 @@ class DocumentService:
         db.add(document)
         db.commit()
         db.refresh(document)
+        report("committed", document_id=document.id)
     
-    def _is_valid_file_type(self, filename: str) -> bool:
-        """Check if file type is supported"""
-        if not filename:
-            return False
-        
-        extension = filename.lower().split('.')[-1]
-        return extension in ['pdf', 'docx']
-    
-    def _get_file_type(self, filename: str) -> str:
-        """Get file type from filename"""
-        return filename.lower().split('.')[-1]
-    
-    def _extract_text(self, content: bytes, filename: str) -> str:
+    def extract_text(self, stream: BinaryIO, file_type: str) -> str:
         """Extract text from PDF or DOCX file"""
-        file_type = self._get_file_type(filename)
-        
         if file_type == 'pdf':
-            return self._extract_pdf_text(content)
+            return self._extract_pdf_text(stream)
         elif file_type == 'docx':
-            return self._extract_docx_text(content)
+            return self._extract_docx_text(stream)
         else:
             raise ValueError(f"Unsupported file type: {file_type}")
     
-    def _extract_pdf_text(self, content: bytes) -> str:
+    def _extract_pdf_text(self, stream: BinaryIO) -> str:
         """Extract text from PDF file"""
         try:
-            pdf_file = BytesIO(content)
-            pdf_reader = PyPDF2.PdfReader(pdf_file)
-            
-            text = ""
-            for page in pdf_reader.pages:
-                text += page.extract_text() + "\n"
+            pdf_reader = PyPDF2.PdfReader(stream)
             
-            return text.strip()
+            # Pages are separated by form feeds, as DOCX page breaks are, for segmentation
+            return "\f".join(page.extract_text() for page in pdf_reader.pages).strip()
         except Exception as e:
             logger.error(f"Error extracting PDF text: {e}")
             raise
     
-    def _extract_docx_text(self, content: bytes) -> str:
+    def _extract_docx_text(self, stream: BinaryIO) -> str:
         """Extract text from DOCX file"""
         try:
-            docx_file = BytesIO(content)
-            doc = DocxDocument(docx_file)
-            
-            text = ""
-            for paragraph in doc.paragraphs:
-                text += paragraph.text + "\n"
-            
-            return text.strip()
+            return extract_docx_text(stream)
         except Exception as e:
             logger.error(f"Error extracting DOCX text: {e}")
             raise
     
-    def get_all_documents(self, db: Session) -> List[Document]:
-        """Get all documents from database"""
-        return db.query(Document).all()
+    def get_all_documents(self, db: Session, tenant_id: str = DEFAULT_TENANT) -> List[Document]:
+        """Get all of a tenant's documents"""
+        return db.query(Document).filter(Document.tenant_id == tenant_id).order_by(Document.id).all()
+    
+    def get_document_by_id(self, document_id: int, db: Session, tenant_id: str = DEFAULT_TENANT) -> Optional[Document]:
+        """Get document by ID; None if it belongs to another tenant"""
+        return db.query(Document).filter(Document.id == document_id, Document.tenant_id == tenant_id).first()
+    
+    def update_document(
+        self,
+        document_id: int,
+        changes: Dict[str, Any],
+        db: Session,
+        tenant_id: str = DEFAULT_TENANT
+    ) -> Optional[Document]:
+        """
+        Correct a document's filename or metadata.
+        
+        Rollups, the search index and caches follow in the same transaction via
+        the change tracker. Returns None if there is no such document.
+        
+        Raises:
+            ValueError: A field that cannot be edited
+        """
+        unknown = set(changes) - set(EDITABLE_FIELDS)
+        if unknown:
+            raise ValueError(f"Fields cannot be edited: {', '.join(sorted(unknown))}")
+        
+        document = self.get_document_by_id(document_id, db, tenant_id)
+        if document is None:
+            return None
+        for field, value in changes.items():
+            setattr(document, field, value)
+        db.commit()
+        return document
+    
+    def delete_document(self, document_id: int, db: Session, tenant_id: str = DEFAULT_TENANT) -> bool:
+        """Delete a document and everything derived from it; False if there is no such document"""
+        document = self.get_document_by_id(document_id, db, tenant_id)
+        if document is None:
+            return False
+        db.delete(document)
+        db.commit()
+        return True
     
-    def get_document_by_id(self, document_id: int, db: Session) -> Optional[Document]:
-        """Get document by ID"""
-        return db.query(Document).filter(Document.id == document_id).first()
+    def delete_documents(self, filters: Dict[str, str], db: Session, tenant_id: str = DEFAULT_TENANT) -> int:
+        """
+        Delete every one of a tenant's documents matching all metadata ``filters`` in one transaction.
+        
+        Documents are flushed in batches so each batch's retractions from the
+        derived tables stay bounded. Returns how many were deleted.
+        
+        Raises:
+            ValueError: No filters, or a field that cannot be filtered on
+        """
+        if not filters:
+            raise ValueError("At least one filter is required")
+        unknown = set(filters) - set(FILTER_FIELDS)
+        if unknown:
+            raise ValueError(f"Cannot filter on: {', '.join(sorted(unknown))}")
+        
+        query = db.query(Document.id).filter(Document.tenant_id == tenant_id)
+        for field, value in filters.items():
+            query = query.filter(getattr(Document, field) == value)
+        ids = [row.id for row in query]
+        
+        try:
+            # Loaded and flushed a chunk at a time, so memory stays flat on large deletes
+            for chunk in chunked(ids):
+                for document in db.query(Document).filter(Document.id.in_(chunk)):
+                    db.delete(document)
+                db.flush()
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        return len(ids)
@@ -0,0 +1,152 @@
+import posixpath
+import zipfile
+import xml.etree.ElementTree as ET
+from typing import BinaryIO, Iterator, List, Union
+
+W_NS = "{http://schemas.openxmlformats.org/wordprocessingml/2006/main}"
+MC_NS = "{http://schemas.openxmlformats.org/markup-compatibility/2006}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+
+HEADER_REL = "/header"
+FOOTER_REL = "/footer"
+
+MAIN_PART = "word/document.xml"
+MAIN_RELS = "word/_rels/document.xml.rels"
+
+# Parts whose direct children are block-level content (paragraphs and tables)
+BLOCK_CONTAINERS = {W_NS + "body", W_NS + "hdr", W_NS + "ftr"}
+
+CELL_SEPARATOR = " | "
+
+
+def extract_docx_text(source: Union[str, BinaryIO]) -> str:
+    """
+    Extract text from a DOCX file without building the python-docx object model.
+
+    Headers come first, then the body (tables included, one line per row with
+    cells separated by `` | ``), then footers. Page breaks are kept as form feeds.
+
+    Args:
+        source: Path or binary stream of the .docx archive
+
+    Returns:
+        str: The document text
+    """
+    with zipfile.ZipFile(source) as archive:
+        headers, footers = _header_footer_parts(archive)
+
+        lines: List[str] = []
+        seen = set()
+        for part in headers:
+            _extend_unique(lines, seen, _iter_part_lines(archive, part))
+
+        lines.extend(_iter_part_lines(archive, MAIN_PART))
+
+        seen = set()
+        for part in footers:
+            _extend_unique(lines, seen, _iter_part_lines(archive, part))
+
+    return "\n".join(lines).strip()
+
+
+def _extend_unique(lines: List[str], seen: set, new_lines: Iterator[str]):
+    """Append lines not already emitted (first/even/default headers often repeat)"""
+    for line in new_lines:
+        if line not in seen:
+            seen.add(line)
+            lines.append(line)
+
+
+def _header_footer_parts(archive: zipfile.ZipFile):
+    """Return the header and footer part names referenced by the main document"""
+    headers, footers = [], []
+    if MAIN_RELS not in archive.namelist():
+        return headers, footers
+
+    with archive.open(MAIN_RELS) as rels:
+        for relationship in ET.parse(rels).getroot().iter(REL_NS + "Relationship"):
+            rel_type = relationship.get("Type", "")
+            target = posixpath.normpath(posixpath.join("word", relationship.get("Target", "")))
+            if rel_type.endswith(HEADER_REL):
+                headers.append(target)
+            elif rel_type.endswith(FOOTER_REL):
+                footers.append(target)
+
+    return sorted(headers), sorted(footers)
+
+
+def _iter_part_lines(archive: zipfile.ZipFile, part: str) -> Iterator[str]:
+    """Stream the lines of one WordprocessingML part with an incremental parser"""
+    try:
+        stream = archive.open(part)
+    except KeyError:
+        return
+
+    paragraphs: List[List[str]] = []  # text runs of the open paragraphs (text boxes nest)
+    rows: List[List[str]] = []        # cell texts of the open table rows
+    cells: List[List[str]] = []       # paragraph lines of the open table cells
+    pending: List[str] = []           # finished lines not yet yielded
+    container = None
+    skip_depth = 0
+    run_depth = 0                     # open w:r elements; w:tab outside runs is a tab-stop definition
+
+    def emit(line: str):
+        if cells:
+            cells[-1].append(line)
+        else:
+            pending.append(line)
+
+    with stream:
+        for event, elem in ET.iterparse(stream, events=("start", "end")):
+            tag = elem.tag
+
+            if event == "start":
+                if skip_depth or tag == MC_NS + "Fallback":
+                    # Fallback repeats the text of the preferred AlternateContent choice
+                    skip_depth += 1
+                elif tag == W_NS + "p":
+                    paragraphs.append([])
+                elif tag == W_NS + "r":
+                    run_depth += 1
+                elif tag == W_NS + "tr":
+                    rows.append([])
+                elif tag == W_NS + "tc":
+                    cells.append([])
+                elif container is None and tag in BLOCK_CONTAINERS:
+                    container = elem
+                continue
+
+            if skip_depth:
+                skip_depth -= 1
+                elem.clear()
+                continue
+
+            if tag == W_NS + "t":
+                if paragraphs and elem.text:
+                    paragraphs[-1].append(elem.text)
+            elif tag == W_NS + "r":
+                run_depth -= 1
+            elif tag == W_NS + "tab":
+                if paragraphs and run_depth:
+                    paragraphs[-1].append("\t")
+            elif tag in (W_NS + "br", W_NS + "cr"):
+                if paragraphs:
+                    paragraphs[-1].append("\f" if elem.get(W_NS + "type") == "page" else "\n")
+            elif tag == W_NS + "p":
+                emit("".join(paragraphs.pop()))
+            elif tag == W_NS + "tc":
+                cell_text = " ".join(line.strip() for line in cells.pop() if line.strip())
+                if rows:
+                    rows[-1].append(cell_text)
+            elif tag == W_NS + "tr":
+                row = rows.pop()
+                if any(row):
+                    emit(CELL_SEPARATOR.join(row))
+
+            # Drop finished block-level elements so memory stays flat on long documents
+            if container is not None and not paragraphs and not rows:
+                container.clear()
+
+            if pending:
+                yield from pending
+                pending.clear()
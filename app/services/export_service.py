@@ -0,0 +1,240 @@
+import io
+import csv
+import json
+import zlib
+import logging
+import importlib.util
+from datetime import datetime
+from typing import Any, Iterator, List, Optional, Sequence
+from sqlalchemy import select
+from sqlalchemy.orm import Session
+
+from ..models.database import DEFAULT_TENANT
+from ..models.document import Document
+
+logger = logging.getLogger(__name__)
+
+# Exportable columns in output order; content is only included on request
+EXPORT_FIELDS = (
+    "id", "filename", "file_type", "file_size", "content_hash",
+    "agreement_type", "governing_law", "industry", "geography",
+    "uploaded_at", "processed_at",
+)
+CONTENT_FIELD = "content"
+
+FORMATS = ("csv", "jsonl", "parquet", "arrow")
+# Formats written with pyarrow
+ARROW_FORMATS = ("parquet", "arrow")
+# csv/jsonl are gzip-wrapped; parquet uses the codec inside the file; arrow IPC supports zstd/lz4
+COMPRESSIONS = {
+    "csv": ("gzip",),
+    "jsonl": ("gzip",),
+    "parquet": ("snappy", "gzip", "zstd"),
+    "arrow": ("zstd", "lz4"),
+}
+
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "jsonl": "application/x-ndjson",
+    "parquet": "application/vnd.apache.parquet",
+    "arrow": "application/vnd.apache.arrow.stream",
+}
+
+DEFAULT_BATCH_SIZE = 500
+
+
+class ExportService:
+    """Streams the documents table out in batches, so memory stays flat regardless of corpus size"""
+
+    def resolve_fields(self, fields: Optional[Sequence[str]] = None, include_content: bool = False) -> List[str]:
+        """Validate a field selection and return the columns to export
+        
+        Raises:
+            ValueError: Unknown fields, or no columns left (e.g. only content, without include_content)
+        """
+        selected = list(fields) if fields else list(EXPORT_FIELDS)
+        unknown = [field for field in selected if field not in EXPORT_FIELDS and field != CONTENT_FIELD]
+        if unknown:
+            raise ValueError(f"Unknown export fields: {', '.join(unknown)}")
+
+        if include_content and CONTENT_FIELD not in selected:
+            selected.append(CONTENT_FIELD)
+        elif not include_content and CONTENT_FIELD in selected:
+            selected.remove(CONTENT_FIELD)
+        if not selected:
+            raise ValueError("No columns to export; set include_content to export content alone")
+        return selected
+
+    def validate(self, format: str, compression: Optional[str] = None):
+        """Raise ValueError for an unsupported format/compression combination"""
+        if format not in FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        if compression and compression not in COMPRESSIONS[format]:
+            raise ValueError(f"Unsupported compression for {format}: {compression}")
+        # Checked up front: once streaming starts, a failure can only truncate the response
+        if format in ARROW_FORMATS and importlib.util.find_spec("pyarrow") is None:
+            raise ValueError(f"{format} export requires pyarrow (pip install pyarrow)")
+
+    def media_type(self, format: str, compression: Optional[str] = None) -> str:
+        if compression == "gzip" and format in ("csv", "jsonl"):
+            return "application/gzip"
+        return MEDIA_TYPES[format]
+
+    def file_extension(self, format: str, compression: Optional[str] = None) -> str:
+        if compression == "gzip" and format in ("csv", "jsonl"):
+            return f"{format}.gz"
+        return format
+
+    def iter_export(
+        self,
+        db: Session,
+        format: str = "jsonl",
+        fields: Optional[Sequence[str]] = None,
+        include_content: bool = False,
+        compression: Optional[str] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        tenant_id: str = DEFAULT_TENANT
+    ) -> Iterator[bytes]:
+        """
+        Yield the export file as byte chunks, one or more per batch of rows.
+
+        Args:
+            db (Session): Database session; rows are read through a streaming cursor
+            format (str): csv, jsonl, parquet or arrow (the last two need pyarrow)
+            fields (Sequence[str]): Columns to export (default: all but content)
+            include_content (bool): Add the extracted document text
+            compression (str): See COMPRESSIONS for the codecs of each format
+            batch_size (int): Rows fetched and encoded per batch
+            tenant_id (str): Tenant whose documents are exported
+        """
+        self.validate(format, compression)
+        columns = self.resolve_fields(fields, include_content)
+        batches = self._iter_batches(db, columns, batch_size, tenant_id)
+
+        if format == "csv":
+            chunks = self._iter_csv(columns, batches)
+        elif format == "jsonl":
+            chunks = self._iter_jsonl(columns, batches)
+        else:
+            chunks = self._iter_arrow(columns, batches, format, compression)
+
+        if compression == "gzip" and format in ("csv", "jsonl"):
+            chunks = self._gzip(chunks)
+
+        yield from chunks
+
+    def _iter_batches(self, db: Session, columns: List[str], batch_size: int, tenant_id: str) -> Iterator[List[tuple]]:
+        """Fetch rows in fixed-size partitions through a server-side cursor"""
+        stmt = (
+            select(*[getattr(Document, column) for column in columns])
+            .where(Document.tenant_id == tenant_id)
+            .order_by(Document.id)
+            .execution_options(yield_per=batch_size)
+        )
+        for partition in db.execute(stmt).partitions():
+            yield [tuple(row) for row in partition]
+
+    def _iter_csv(self, columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        writer.writerow(columns)
+
+        for batch in batches:
+            writer.writerows([_csv_value(value) for value in row] for row in batch)
+            yield buffer.getvalue().encode("utf-8")
+            buffer.seek(0)
+            buffer.truncate()
+
+        if buffer.tell():
+            yield buffer.getvalue().encode("utf-8")
+
+    def _iter_jsonl(self, columns: List[str], batches: Iterator[List[tuple]]) -> Iterator[bytes]:
+        for batch in batches:
+            lines = [json.dumps(dict(zip(columns, row)), default=_json_default) for row in batch]
+            yield ("\n".join(lines) + "\n").encode("utf-8")
+
+    def _iter_arrow(
+        self,
+        columns: List[str],
+        batches: Iterator[List[tuple]],
+        format: str,
+        compression: Optional[str]
+    ) -> Iterator[bytes]:
+        """Write column batches as a Parquet file (one row group per batch) or an Arrow IPC stream"""
+        # Optional dependency, checked in validate()
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        schema = pa.schema([(column, _arrow_type(pa, column)) for column in columns])
+        sink = _ByteSink()
+
+        if format == "parquet":
+            writer = pq.ParquetWriter(sink, schema, compression=compression or "snappy")
+        else:
+            options = pa.ipc.IpcWriteOptions(compression=compression) if compression else None
+            writer = pa.ipc.new_stream(sink, schema, options=options)
+
+        with writer:
+            for batch in batches:
+                arrays = [pa.array([row[i] for row in batch], type=schema.field(i).type) for i in range(len(columns))]
+                writer.write_batch(pa.RecordBatch.from_arrays(arrays, schema=schema))
+                yield sink.drain()
+
+        yield sink.drain()
+
+    def _gzip(self, chunks: Iterator[bytes]) -> Iterator[bytes]:
+        compressor = zlib.compressobj(wbits=31)  # gzip container
+        for chunk in chunks:
+            compressed = compressor.compress(chunk)
+            if compressed:
+                yield compressed
+        yield compressor.flush()
+
+
+class _ByteSink(io.RawIOBase):
+    """Write-only file object collecting output between drains"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks: List[bytes] = []
+        self._position = 0
+
+    def writable(self) -> bool:
+        return True
+
+    def write(self, data) -> int:
+        data = bytes(data)
+        self._chunks.append(data)
+        self._position += len(data)
+        return len(data)
+
+    def tell(self) -> int:
+        return self._position
+
+    def drain(self) -> bytes:
+        data = b"".join(self._chunks)
+        self._chunks.clear()
+        return data
+
+
+def _csv_value(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return "" if value is None else value
+
+
+def _json_default(value: Any) -> Any:
+    if isinstance(value, datetime):
+        return value.isoformat()
+    raise TypeError(f"Object of type {type(value).__name__} is not JSON serializable")
+
+
+def _arrow_type(pa, column: str):
+    if column in ("id", "file_size"):
+        return pa.int64()
+    if column in ("uploaded_at", "processed_at"):
+        return pa.timestamp("us")
+    if column == CONTENT_FIELD:
+        return pa.large_string()
+    return pa.string()
+
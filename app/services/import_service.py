@@ -0,0 +1,345 @@
+import os
+import json
+import shutil
+import hashlib
+import logging
+import tempfile
+import zipfile
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from contextlib import contextmanager
+from typing import Any, BinaryIO, Callable, Dict, Iterator, List, Optional, Set
+
+from sqlalchemy.orm import Session
+
+from ..models.database import DEFAULT_TENANT
+from ..models.document import Document
+from .metadata_extractor import clean_metadata
+from .upload_spooler import CHUNK_SIZE, MAX_UPLOAD_SIZE, detect_file_type
+
+logger = logging.getLogger(__name__)
+
+# Manifest statuses that are not retried on the next run
+FINAL_STATUSES = {"imported", "duplicate", "unsupported"}
+
+DEFAULT_BATCH_SIZE = 50
+
+# Per-process state of the pool workers
+_worker_service = None
+_worker_source = None
+_worker_archive: Optional[zipfile.ZipFile] = None
+
+
+class BulkImporter:
+    """
+    Import a folder or ZIP archive of documents without going through HTTP.
+
+    Text and metadata extraction run in a process pool using the same
+    DocumentService/MetadataExtractor code as ``/upload``; the parent process
+    writes the documents in batches. Every committed batch is appended to a
+    JSON-lines manifest, so an interrupted run resumes where it stopped.
+
+    Files are hashed before anything is extracted: one whose SHA-256 digest the
+    tenant already has, or that an earlier file of the run has claimed, is
+    skipped without extracting it or calling the LLM.
+    """
+
+    def __init__(
+        self,
+        source: str,
+        manifest_path: Optional[str] = None,
+        workers: Optional[int] = None,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        tenant_id: str = DEFAULT_TENANT
+    ):
+        self.source = os.path.abspath(source)
+        self.manifest_path = manifest_path or self.source.rstrip(os.sep) + ".import-manifest.jsonl"
+        self.workers = workers or os.cpu_count() or 1
+        self.batch_size = batch_size
+        self.tenant_id = tenant_id
+
+    def iter_names(self) -> Iterator[str]:
+        """Relative names of the candidate files in the source, in a stable order"""
+        if zipfile.is_zipfile(self.source):
+            with zipfile.ZipFile(self.source) as archive:
+                for info in sorted(archive.infolist(), key=lambda info: info.filename):
+                    if not info.is_dir():
+                        yield info.filename
+            return
+
+        for root, dirs, files in os.walk(self.source):
+            dirs.sort()
+            for name in sorted(files):
+                yield os.path.relpath(os.path.join(root, name), self.source)
+
+    def load_manifest(self) -> Dict[str, Dict[str, Any]]:
+        """Latest manifest record per file name"""
+        records = {}
+        if os.path.exists(self.manifest_path):
+            with open(self.manifest_path, encoding="utf-8") as manifest:
+                for line in manifest:
+                    line = line.strip()
+                    if line:
+                        record = json.loads(line)
+                        records[record["name"]] = record
+        return records
+
+    def run(self, session_factory: Callable[[], Session], progress: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, int]:
+        """
+        Import every file not yet recorded as finished in the manifest.
+
+        Returns:
+            Dict[str, int]: Number of files per outcome (imported, duplicate, unsupported,
+                          failed, resumed)
+        """
+        done = {name for name, record in self.load_manifest().items() if record["status"] in FINAL_STATUSES}
+        stats = {"imported": 0, "duplicate": 0, "unsupported": 0, "failed": 0, "resumed": len(done)}
+
+        db = session_factory()
+        try:
+            known_digests = {
+                digest for (digest,) in db.query(Document.content_hash)
+                .filter(Document.tenant_id == self.tenant_id, Document.content_hash.isnot(None))
+            }
+            pending = (name for name in self.iter_names() if name not in done)
+            # Digests whose document could not be stored; their duplicates are not final either
+            failed_digests: Set[str] = set()
+
+            with open(self.manifest_path, "a", encoding="utf-8") as manifest, ProcessPoolExecutor(
+                max_workers=self.workers,
+                initializer=_init_worker,
+                initargs=(self.source,)
+            ) as executor:
+                batch: List[Dict[str, Any]] = []
+                for result in self._iter_results(executor, pending, known_digests):
+                    batch.append(result)
+                    if len(batch) >= self.batch_size:
+                        self._commit_batch(db, batch, manifest, stats, progress, failed_digests)
+                        batch = []
+
+                if batch:
+                    self._commit_batch(db, batch, manifest, stats, progress, failed_digests)
+        finally:
+            db.close()
+
+        return stats
+
+    def _iter_results(
+        self,
+        executor: ProcessPoolExecutor,
+        names: Iterator[str],
+        known_digests: Set[str]
+    ) -> Iterator[Dict[str, Any]]:
+        """
+        Run the workers over ``names`` with a bounded number of files in flight.
+
+        Each file is hashed first, and only the first file with a digest not in
+        ``known_digests`` is extracted. Later files with that digest are held back
+        and yielded after it with its outcome: duplicate if it was extracted,
+        unsupported if it is not a PDF/DOCX, else failed so the next run retries
+        them (and a later copy in this run is extracted instead).
+        """
+        window = self.workers * 4
+        in_flight = set()
+        claimed = set(known_digests)
+        waiting: Dict[str, List[str]] = {}
+
+        while True:
+            while len(in_flight) < window:
+                name = next(names, None)
+                if name is None:
+                    break
+                in_flight.add(executor.submit(_inspect_entry, name))
+            if not in_flight:
+                return
+
+            finished, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                result = future.result()
+                digest = result.get("sha256")
+
+                if result["status"] == "hashed":
+                    if digest in waiting:
+                        waiting[digest].append(result["name"])
+                    elif digest in claimed:
+                        yield {"name": result["name"], "status": "duplicate", "sha256": digest}
+                    else:
+                        claimed.add(digest)
+                        waiting[digest] = []
+                        in_flight.add(executor.submit(_process_entry, result["name"], digest, result["size"]))
+                    continue
+
+                yield result
+                if result["status"] == "failed":
+                    claimed.discard(digest)
+                for name in waiting.pop(digest, []) if digest else []:
+                    if result["status"] == "ok":
+                        yield {"name": name, "status": "duplicate", "sha256": digest}
+                    elif result["status"] == "unsupported":
+                        yield {"name": name, "status": "unsupported", "sha256": digest}
+                    else:
+                        yield {
+                            "name": name,
+                            "status": "failed",
+                            "sha256": digest,
+                            "error": f"Same content as {result['name']}, which was not imported"
+                        }
+
+    def _commit_batch(
+        self,
+        db: Session,
+        batch: List[Dict[str, Any]],
+        manifest,
+        stats: Dict[str, int],
+        progress,
+        failed_digests: Set[str]
+    ):
+        """Store the extracted documents of a batch, then checkpoint the batch in the manifest"""
+        extracted = [result for result in batch if result["status"] == "ok"]
+        errors: Dict[str, str] = {}
+        try:
+            document_ids = self._store(db, extracted)
+        except Exception as e:
+            # Store the documents one by one, so a bad file fails alone and the run goes on
+            db.rollback()
+            logger.warning(f"Storing a batch of {len(extracted)} documents failed ({e}); retrying them one at a time")
+            document_ids = {}
+            for result in extracted:
+                try:
+                    document_ids.update(self._store(db, [result]))
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Failed to import {result['name']}: {e}")
+                    errors[result["name"]] = f"Could not store document: {e}"
+                    failed_digests.add(result["sha256"])
+
+        for result in batch:
+            name = result["name"]
+            status = result["status"]
+            error = result.get("error")
+            if name in document_ids:
+                status = "imported"
+            elif name in errors:
+                status, error = "failed", errors[name]
+            elif status == "duplicate" and result["sha256"] in failed_digests:
+                status, error = "failed", "Same content as a file that could not be stored"
+
+            record = {"name": name, "status": status, "sha256": result.get("sha256")}
+            if name in document_ids:
+                record["document_id"] = document_ids[name]
+            if error:
+                record["error"] = error
+
+            manifest.write(json.dumps(record) + "\n")
+            stats[status] += 1
+            if progress:
+                progress(record)
+
+        manifest.flush()
+        os.fsync(manifest.fileno())
+
+    def _store(self, db: Session, results: List[Dict[str, Any]]) -> Dict[str, int]:
+        """Insert the documents of extracted files in one transaction and return their ids by file name"""
+        documents = []
+        for result in results:
+            document = Document(
+                tenant_id=self.tenant_id,
+                filename=os.path.basename(result["name"]),
+                file_type=result["file_type"],
+                file_size=result["size"],
+                content_hash=result["sha256"],
+                content=result["text"],
+                **result["metadata"]
+            )
+            db.add(document)
+            documents.append((result["name"], document))
+
+        # Read the new ids before commit expires them
+        db.flush()
+        document_ids = {name: document.id for name, document in documents}
+        db.commit()
+        return document_ids
+
+
+def _init_worker(source: str):
+    """Create the extraction services once per worker process"""
+    global _worker_service, _worker_source, _worker_archive
+    from .document_service import DocumentService
+
+    _worker_service = DocumentService()
+    _worker_source = source
+    _worker_archive = zipfile.ZipFile(source) if zipfile.is_zipfile(source) else None
+
+
+def _open_entry(name: str) -> BinaryIO:
+    if _worker_archive is None:
+        return open(os.path.join(_worker_source, name), "rb")
+    return _worker_archive.open(name)
+
+
+def _entry_size(name: str) -> int:
+    """Size of an entry; for archive members, from the ZIP directory without extracting"""
+    if _worker_archive is None:
+        return os.path.getsize(os.path.join(_worker_source, name))
+    return _worker_archive.getinfo(name).file_size
+
+
+@contextmanager
+def _entry_path(name: str) -> Iterator[str]:
+    """Path of an entry on disk; archive members are extracted to a temporary file"""
+    if _worker_archive is None:
+        yield os.path.join(_worker_source, name)
+        return
+
+    fd, path = tempfile.mkstemp(prefix="import-")
+    try:
+        with os.fdopen(fd, "wb") as target, _worker_archive.open(name) as member:
+            shutil.copyfileobj(member, target, CHUNK_SIZE)
+        yield path
+    finally:
+        os.unlink(path)
+
+
+def _inspect_entry(name: str) -> Dict[str, Any]:
+    """Size-check and hash one file, streaming it without extracting (runs in a pool worker)"""
+    try:
+        # Archive members are never read past their declared size, so this bounds the work
+        size = _entry_size(name)
+        if size == 0 or size > MAX_UPLOAD_SIZE:
+            return {"name": name, "status": "unsupported", "error": f"Size {size} outside upload limits"}
+
+        digest = hashlib.sha256()
+        with _open_entry(name) as stream:
+            for chunk in iter(lambda: stream.read(CHUNK_SIZE), b""):
+                digest.update(chunk)
+        return {"name": name, "status": "hashed", "sha256": digest.hexdigest(), "size": size}
+    except Exception as e:
+        logger.error(f"Failed to import {name}: {e}")
+        return {"name": name, "status": "failed", "error": str(e)}
+
+
+def _process_entry(name: str, digest: str, size: int) -> Dict[str, Any]:
+    """Sniff, and extract text and metadata from one hashed file (runs in a pool worker)"""
+    try:
+        with _entry_path(name) as path:
+            file_type = detect_file_type(path)
+            if file_type is None:
+                return {"name": name, "status": "unsupported", "sha256": digest}
+
+            with open(path, "rb") as stream:
+                text = _worker_service.extract_text(stream, file_type)
+
+        # Only the Document's metadata columns, as strings, whatever else the model returned
+        metadata = clean_metadata(_worker_service.metadata_extractor.extract_metadata(text, os.path.basename(name)))
+        return {
+            "name": name,
+            "status": "ok",
+            "sha256": digest,
+            "file_type": file_type,
+            "size": size,
+            "text": text,
+            "metadata": metadata
+        }
+    except Exception as e:
+        detail = getattr(e, "detail", None) or str(e)
+        logger.error(f"Failed to import {name}: {detail}")
+        return {"name": name, "status": "failed", "sha256": digest, "error": detail}
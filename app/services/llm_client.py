@@ -0,0 +1,94 @@
+import os
+import json
+import time
+import random
+import hashlib
+from types import SimpleNamespace
+from typing import Any, Dict, List
+
+from openai import OpenAI
+from dotenv import load_dotenv
+
+load_dotenv()
+
+# "openrouter" (default) or "fake" for load tests and local development without a key
+LLM_BACKEND = os.getenv("LLM_BACKEND", "openrouter")
+# Simulated latency of the fake backend: a base plus uniform jitter, in milliseconds
+FAKE_LLM_LATENCY_MS = float(os.getenv("FAKE_LLM_LATENCY_MS", 800))
+FAKE_LLM_JITTER_MS = float(os.getenv("FAKE_LLM_JITTER_MS", 400))
+
+OPENROUTER_BASE_URL = "https://openrouter.ai/api/v1"
+
+# Values the fake backend classifies documents into
+FAKE_VALUES = {
+    "agreement_type": ["NDA", "MSA", "SLA", "Employment Agreement", "Lease"],
+    "governing_law": ["UAE", "UK", "US", "Singapore", "Qatar"],
+    "geography": ["Middle East", "Europe", "North America", "Asia"],
+    "industry": ["Technology", "Oil & Gas", "Finance", "Healthcare"],
+}
+
+
+def create_llm_client():
+    """
+    OpenAI-compatible chat client for the configured LLM backend.
+
+    Raises:
+        ValueError: OpenRouter is configured but OPENROUTER_API_KEY is not set
+    """
+    if LLM_BACKEND == "fake":
+        return FakeLLMClient()
+    if LLM_BACKEND != "openrouter":
+        raise ValueError(f"Unsupported LLM backend: {LLM_BACKEND}")
+
+    api_key = os.getenv("OPENROUTER_API_KEY")
+    if not api_key:
+        raise ValueError("OPENROUTER_API_KEY environment variable is not set")
+    return OpenAI(base_url=OPENROUTER_BASE_URL, api_key=api_key)
+
+
+class FakeLLMClient:
+    """
+    Stand-in for the OpenRouter client that sleeps like a real call and answers
+    in the formats MetadataExtractor and QueryService expect.
+
+    Answers are derived from the prompt text, so the same document always gets
+    the same metadata, and questions naming a known value get a filter on it.
+    """
+
+    def __init__(self, latency_ms: float = FAKE_LLM_LATENCY_MS, jitter_ms: float = FAKE_LLM_JITTER_MS):
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.calls = 0
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._create))
+
+    def _create(self, model: str, messages: List[Dict[str, str]], **kwargs):
+        self.calls += 1
+        time.sleep((self.latency_ms + random.uniform(0, self.jitter_ms)) / 1000)
+
+        prompt = messages[-1]["content"]
+        if "Document content:" in prompt:
+            answer = self._metadata(prompt.split("Document content:", 1)[1])
+        else:
+            answer = self._plan(prompt.rsplit("User question:", 1)[-1])
+
+        message = SimpleNamespace(role="assistant", content=json.dumps(answer))
+        return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=message, finish_reason="stop")])
+
+    def _metadata(self, content: str) -> Dict[str, Any]:
+        lowered = content.lower()
+        digest = hashlib.sha256(content.encode("utf-8")).digest()
+        metadata = {}
+        for i, (field, values) in enumerate(FAKE_VALUES.items()):
+            mentioned = [value for value in values if value.lower() in lowered]
+            metadata[field] = mentioned[0] if mentioned else values[digest[i] % len(values)]
+        return metadata
+
+    def _plan(self, question: str) -> Dict[str, Any]:
+        lowered = f" {question.lower()} "
+        filters = [
+            {"field": field, "value": value}
+            for field, values in FAKE_VALUES.items()
+            for value in values
+            if f" {value.lower()} " in lowered
+        ]
+        return {"filters": filters, "search": [], "all": not filters}
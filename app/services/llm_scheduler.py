@@ -0,0 +1,365 @@
+import os
+import time
+import sqlite3
+import logging
+import threading
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Optional, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+# Priority classes
+INTERACTIVE = "interactive"
+BATCH = "batch"
+
+# Queue and slot state shared by every process using the scheduler (API workers, bulk import workers)
+LLM_SCHEDULER_DB_PATH = os.getenv("LLM_SCHEDULER_DB_PATH", "./llm_scheduler.db")
+# LLM calls in flight across all processes and classes
+LLM_MAX_CONCURRENCY = int(os.getenv("LLM_MAX_CONCURRENCY", 4))
+# Share of dispatches each class gets while both have work queued
+LLM_INTERACTIVE_WEIGHT = float(os.getenv("LLM_INTERACTIVE_WEIGHT", 8))
+LLM_BATCH_WEIGHT = float(os.getenv("LLM_BATCH_WEIGHT", 1))
+# Batch never holds every slot, so an interactive call can always start immediately
+LLM_BATCH_CONCURRENCY = int(os.getenv("LLM_BATCH_CONCURRENCY", max(LLM_MAX_CONCURRENCY - 1, 1)))
+# Seconds an interactive call may wait for a slot before giving up
+LLM_INTERACTIVE_QUEUE_TIMEOUT = float(os.getenv("LLM_INTERACTIVE_QUEUE_TIMEOUT", 30))
+# Calls started per minute across all processes (0 = no limit), with bursts of up to LLM_RATE_LIMIT_BURST
+LLM_RATE_LIMIT_PER_MINUTE = float(os.getenv("LLM_RATE_LIMIT_PER_MINUTE", 0))
+LLM_RATE_LIMIT_BURST = float(os.getenv("LLM_RATE_LIMIT_BURST", LLM_MAX_CONCURRENCY))
+
+# Seconds between checks of the shared queue by a waiting call
+POLL_INTERVAL = 0.02
+# A queued call not seen for this long, or a running one held this long, belongs to a dead process
+QUEUED_LEASE = 10.0
+RUNNING_LEASE = 600.0
+# Waiters renew their queued lease this often
+LEASE_RENEW_INTERVAL = 1.0
+
+QUEUED = "queued"
+RUNNING = "running"
+
+
+class SchedulerTimeout(TimeoutError):
+    """Raised when a call waited longer than its class allows for a free slot"""
+
+
+@dataclass
+class PriorityClass:
+    """Scheduling parameters of one class of LLM traffic"""
+
+    weight: float
+    max_concurrency: int
+    queue_timeout: Optional[float] = None
+
+
+@dataclass
+class _ClassStats:
+    """Counters of the calls made by this process"""
+
+    submitted: int = 0
+    completed: int = 0
+    failed: int = 0
+    timed_out: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class LLMScheduler:
+    """
+    Admission control for outbound LLM calls, shared by every process on the host.
+
+    Calls are queued per priority class and dispatched by weighted fair queuing:
+    each call gets a virtual finish tag of ``max(virtual time, class's last tag) +
+    1 / weight`` and the queued call with the smallest tag runs next, so while
+    both classes are backlogged interactive calls get ``weight`` times the slots of
+    batch calls, and a class that was idle is not penalised for it. Per-class
+    concurrency caps keep a slot free for interactive calls during bulk imports.
+
+    The queue, running slots, tags and the optional rate-limit token bucket live
+    in a SQLite file (like SharedCache), so the limits hold across uvicorn workers
+    and bulk-import processes, and a backfill in another process still queues
+    behind /query traffic. Waiting calls poll the file; calls in the same process
+    are also woken directly when a slot is released.
+
+    Calls run on the calling thread; waiting for a slot blocks it, so callers on
+    the event loop must go through ``run_in_threadpool``.
+    """
+
+    def __init__(
+        self,
+        max_concurrency: int = LLM_MAX_CONCURRENCY,
+        classes: Optional[Dict[str, PriorityClass]] = None,
+        path: str = LLM_SCHEDULER_DB_PATH,
+        rate_per_minute: float = LLM_RATE_LIMIT_PER_MINUTE,
+        burst: float = LLM_RATE_LIMIT_BURST,
+        poll_interval: float = POLL_INTERVAL
+    ):
+        if classes is None:
+            classes = {
+                INTERACTIVE: PriorityClass(LLM_INTERACTIVE_WEIGHT, max_concurrency, LLM_INTERACTIVE_QUEUE_TIMEOUT),
+                BATCH: PriorityClass(LLM_BATCH_WEIGHT, min(LLM_BATCH_CONCURRENCY, max_concurrency)),
+            }
+        self.max_concurrency = max_concurrency
+        self.path = path
+        self.rate_per_minute = rate_per_minute
+        self.burst = max(burst, 1.0)
+        self.poll_interval = poll_interval
+        self._classes = classes
+        self._stats = {name: _ClassStats() for name in classes}
+        self._condition = threading.Condition(threading.RLock())
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pid = None
+
+    def _connection(self) -> sqlite3.Connection:
+        """Open the shared store on first use (and again after a fork)"""
+        if self._conn is None or self._pid != os.getpid():
+            conn = sqlite3.connect(self.path, timeout=10.0, check_same_thread=False, isolation_level=None)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS llm_tickets ("
+                "id INTEGER PRIMARY KEY AUTOINCREMENT, priority TEXT NOT NULL, state TEXT NOT NULL, "
+                "start REAL NOT NULL, finish REAL NOT NULL, pid INTEGER NOT NULL, "
+                "enqueued_at REAL NOT NULL, expires_at REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS ix_llm_tickets_queue ON llm_tickets (state, priority, finish)")
+            conn.execute("CREATE TABLE IF NOT EXISTS llm_scheduler_state (key TEXT PRIMARY KEY, value REAL NOT NULL)")
+            self._conn = conn
+            self._pid = os.getpid()
+        return self._conn
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def run(self, priority: str, fn: Callable[..., T], *args, **kwargs) -> T:
+        """Call ``fn(*args, **kwargs)`` once a slot of the ``priority`` class is free"""
+        if priority not in self._classes:
+            raise ValueError(f"Unknown LLM priority class: {priority}")
+
+        ticket_id = self._acquire(priority)
+        try:
+            result = fn(*args, **kwargs)
+        except Exception:
+            self._release(priority, ticket_id, failed=True)
+            raise
+        self._release(priority, ticket_id)
+        return result
+
+    def _acquire(self, priority: str) -> int:
+        config = self._classes[priority]
+        stats = self._stats[priority]
+        enqueued_at = time.time()
+
+        with self._condition:
+            stats.submitted += 1
+            with self._transaction() as conn:
+                start = max(self._get(conn, "virtual_time"), self._get(conn, f"last_finish:{priority}"))
+                finish = start + 1.0 / config.weight
+                self._put(conn, f"last_finish:{priority}", finish)
+                ticket_id = conn.execute(
+                    "INSERT INTO llm_tickets (priority, state, start, finish, pid, enqueued_at, expires_at) "
+                    "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (priority, QUEUED, start, finish, os.getpid(), enqueued_at, enqueued_at + QUEUED_LEASE)
+                ).lastrowid
+                self._dispatch(conn, enqueued_at)
+                granted = self._state(conn, ticket_id) == RUNNING
+            renewed_at = enqueued_at
+
+            deadline = enqueued_at + config.queue_timeout if config.queue_timeout is not None else None
+            while not granted:
+                now = time.time()
+                if deadline is not None and now >= deadline:
+                    if self._abandon(priority, ticket_id, start, finish):
+                        break
+                    stats.timed_out += 1
+                    message = (
+                        f"No {priority} LLM slot became free within {config.queue_timeout:.0f}s "
+                        f"({self.metrics()['running']} running, {self.queue_depth()} queued)"
+                    )
+                    logger.warning(message)
+                    raise SchedulerTimeout(message)
+
+                self._condition.wait(self.poll_interval if deadline is None else min(self.poll_interval, deadline - now))
+
+                now = time.time()
+                conn = self._connection()
+                state = self._state(conn, ticket_id)
+                if state == RUNNING:
+                    break
+                if state is None:
+                    raise RuntimeError(f"LLM scheduler ticket {ticket_id} expired while queued")
+                running = conn.execute("SELECT COUNT(*) FROM llm_tickets WHERE state = ?", (RUNNING,)).fetchone()[0]
+                if running < self.max_concurrency or now - renewed_at >= LEASE_RENEW_INTERVAL:
+                    with self._transaction() as conn:
+                        conn.execute(
+                            "UPDATE llm_tickets SET expires_at = ? WHERE id = ? AND state = ?",
+                            (now + QUEUED_LEASE, ticket_id, QUEUED)
+                        )
+                        renewed_at = now
+                        self._dispatch(conn, now)
+                        granted = self._state(conn, ticket_id) == RUNNING
+
+            waited = time.time() - enqueued_at
+            stats.total_wait += waited
+            stats.max_wait = max(stats.max_wait, waited)
+            return ticket_id
+
+    def _abandon(self, priority: str, ticket_id: int, start: float, finish: float) -> bool:
+        """Withdraw a timed-out ticket; True if it was granted in the meantime and should run"""
+        with self._transaction() as conn:
+            if self._state(conn, ticket_id) == RUNNING:
+                return True
+            conn.execute("DELETE FROM llm_tickets WHERE id = ?", (ticket_id,))
+            # Give the tag back so the class is not charged for work it never did
+            if self._get(conn, f"last_finish:{priority}") == finish:
+                self._put(conn, f"last_finish:{priority}", start)
+            return False
+
+    def _release(self, priority: str, ticket_id: int, failed: bool = False):
+        with self._condition:
+            stats = self._stats[priority]
+            stats.completed += 1
+            if failed:
+                stats.failed += 1
+            with self._transaction() as conn:
+                conn.execute("DELETE FROM llm_tickets WHERE id = ?", (ticket_id,))
+                self._dispatch(conn, time.time())
+            self._condition.notify_all()
+
+    def _dispatch(self, conn: sqlite3.Connection, now: float):
+        """Grant free slots to queued calls, smallest finish tag first (write transaction held)"""
+        # Tickets of processes that died while waiting or running
+        conn.execute("DELETE FROM llm_tickets WHERE expires_at < ?", (now,))
+
+        running = dict(conn.execute(
+            "SELECT priority, COUNT(*) FROM llm_tickets WHERE state = ? GROUP BY priority", (RUNNING,)
+        ).fetchall())
+        total = sum(running.values())
+        tokens = self._refill(conn, now)
+        virtual_time = self._get(conn, "virtual_time")
+
+        while total < self.max_concurrency and (tokens is None or tokens >= 1):
+            heads = []
+            for rank, (name, config) in enumerate(self._classes.items()):
+                if running.get(name, 0) >= config.max_concurrency:
+                    continue
+                head = conn.execute(
+                    "SELECT id, start, finish FROM llm_tickets WHERE state = ? AND priority = ? "
+                    "ORDER BY finish, id LIMIT 1",
+                    (QUEUED, name)
+                ).fetchone()
+                if head is not None:
+                    heads.append((head[2], rank, head[0], head[1], name))
+            if not heads:
+                break
+
+            # Equal tags go to the class declared first
+            _, _, ticket_id, start, name = min(heads)
+            conn.execute(
+                "UPDATE llm_tickets SET state = ?, expires_at = ? WHERE id = ?",
+                (RUNNING, now + RUNNING_LEASE, ticket_id)
+            )
+            virtual_time = max(virtual_time, start)
+            running[name] = running.get(name, 0) + 1
+            total += 1
+            if tokens is not None:
+                tokens -= 1
+
+        self._put(conn, "virtual_time", virtual_time)
+        if tokens is not None:
+            self._put(conn, "tokens", tokens)
+
+    def _refill(self, conn: sqlite3.Connection, now: float) -> Optional[float]:
+        """Tokens available in the shared rate-limit bucket, or None without a rate limit"""
+        if not self.rate_per_minute:
+            return None
+        last = conn.execute("SELECT value FROM llm_scheduler_state WHERE key = 'tokens_at'").fetchone()
+        tokens = self._get(conn, "tokens", self.burst)
+        if last is not None:
+            tokens = min(self.burst, tokens + (now - last[0]) * self.rate_per_minute / 60)
+        self._put(conn, "tokens_at", now)
+        return tokens
+
+    def _state(self, conn: sqlite3.Connection, ticket_id: int) -> Optional[str]:
+        row = conn.execute("SELECT state FROM llm_tickets WHERE id = ?", (ticket_id,)).fetchone()
+        return row[0] if row else None
+
+    def _get(self, conn: sqlite3.Connection, key: str, default: float = 0.0) -> float:
+        row = conn.execute("SELECT value FROM llm_scheduler_state WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else default
+
+    def _put(self, conn: sqlite3.Connection, key: str, value: float):
+        conn.execute("INSERT OR REPLACE INTO llm_scheduler_state (key, value) VALUES (?, ?)", (key, value))
+
+    def queue_depth(self, priority: Optional[str] = None) -> int:
+        """Number of calls waiting for a slot in any process, in one class or overall"""
+        with self._condition:
+            conn = self._connection()
+            if priority is not None:
+                return conn.execute(
+                    "SELECT COUNT(*) FROM llm_tickets WHERE state = ? AND priority = ?", (QUEUED, priority)
+                ).fetchone()[0]
+            return conn.execute("SELECT COUNT(*) FROM llm_tickets WHERE state = ?", (QUEUED,)).fetchone()[0]
+
+    def metrics(self) -> Dict[str, Any]:
+        """Queue depth and concurrency across processes, plus this process's wait-time counters, per class"""
+        with self._condition:
+            counts = {
+                (priority, state): count
+                for priority, state, count in self._connection().execute(
+                    "SELECT priority, state, COUNT(*) FROM llm_tickets GROUP BY priority, state"
+                )
+            }
+            classes = {}
+            for name, config in self._classes.items():
+                stats = self._stats[name]
+                started = stats.submitted - stats.timed_out
+                classes[name] = {
+                    "weight": config.weight,
+                    "max_concurrency": config.max_concurrency,
+                    "queued": counts.get((name, QUEUED), 0),
+                    "running": counts.get((name, RUNNING), 0),
+                    "submitted": stats.submitted,
+                    "completed": stats.completed,
+                    "failed": stats.failed,
+                    "timed_out": stats.timed_out,
+                    "avg_wait_seconds": round(stats.total_wait / started, 4) if started else 0.0,
+                    "max_wait_seconds": round(stats.max_wait, 4),
+                }
+            return {
+                "max_concurrency": self.max_concurrency,
+                "rate_limit_per_minute": self.rate_per_minute or None,
+                "running": sum(count for (_, state), count in counts.items() if state == RUNNING),
+                "queued": sum(count for (_, state), count in counts.items() if state == QUEUED),
+                "classes": classes,
+            }
+
+
+class _Transaction:
+    """``BEGIN IMMEDIATE`` ... ``COMMIT``: takes the write lock up front so dispatch decisions are serialised"""
+
+    def __init__(self, conn: sqlite3.Connection):
+        self.conn = conn
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.conn.execute("BEGIN IMMEDIATE")
+        return self.conn
+
+    def __exit__(self, exc_type, exc, tb):
+        self.conn.execute("ROLLBACK" if exc_type else "COMMIT")
+        return False
+
+
+_scheduler: Optional[LLMScheduler] = None
+_scheduler_lock = threading.Lock()
+
+
+def get_scheduler() -> LLMScheduler:
+    """Get the process's handle on the shared LLM scheduler"""
+    global _scheduler
+    with _scheduler_lock:
+        if _scheduler is None:
+            _scheduler = LLMScheduler()
+        return _scheduler
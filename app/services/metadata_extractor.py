@@ -1,28 +1,62 @@
 import json
-from typing import Dict, Any
-from openai import OpenAI
+import hashlib
+from typing import Dict, Any, Optional
 from fastapi import HTTPException
-import os
 from dotenv import load_dotenv
 
+from .llm_client import create_llm_client
+from .cache import SharedCache, METADATA_NAMESPACE, get_cache
+from .llm_scheduler import BATCH, LLMScheduler, get_scheduler
+
 load_dotenv()
 
+# Document columns filled from the extracted metadata
+METADATA_FIELDS = ("agreement_type", "governing_law", "geography", "industry")
+
+def clean_metadata(metadata: Dict[str, Any]) -> Dict[str, Optional[str]]:
+    """
+    Keep only the metadata fields a Document stores, as strings or None.
+
+    The model's JSON may carry extra keys (e.g. parties) or lists and objects
+    where a single value was asked for; those must not reach the Document
+    constructor or the database.
+    """
+    cleaned = {}
+    for field in METADATA_FIELDS:
+        value = metadata.get(field)
+        if isinstance(value, list):
+            value = ", ".join(str(item) for item in value if item is not None) or None
+        elif isinstance(value, dict):
+            value = json.dumps(value, sort_keys=True)
+        elif value is not None and not isinstance(value, str):
+            value = str(value)
+        cleaned[field] = value
+    return cleaned
+
 class MetadataExtractor:
-    def __init__(self):
-        """Initialize the MetadataExtractor with OpenRouter configuration using OpenAI client"""
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY environment variable is not set")
+    def __init__(
+        self,
+        cache: Optional[SharedCache] = None,
+        scheduler: Optional[LLMScheduler] = None,
+        priority: str = BATCH
+    ):
+        """Initialize the MetadataExtractor with the configured LLM client (OpenRouter by default)
         
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
+        Extraction calls go through the LLM scheduler as ``priority`` traffic (batch by
+        default, so uploads and imports yield to interactive queries).
+        """
+        self.client = create_llm_client()
+        self.cache = cache or get_cache()
+        self.scheduler = scheduler or get_scheduler()
+        self.priority = priority
 
     def extract_metadata(self, content: str, filename: str) -> Dict[str, Any]:
         """
         Extract metadata from document content using OpenRouter API.
         
+        Results are cached by content digest, so re-uploading the same text (in any
+        worker) does not trigger another LLM call.
+        
         Args:
             content (str): The text content of the document
             filename (str): Name of the file (used for reference)
@@ -31,6 +65,17 @@ class MetadataExtractor:
             Dict[str, Any]: Extracted metadata including agreement_type, governing_law,
                           geography, and industry
         """
+        cache_key = hashlib.sha256(content.encode("utf-8")).hexdigest()
+        cached = self.cache.get(METADATA_NAMESPACE, cache_key)
+        if cached is not None:
+            return dict(cached)
+        
+        metadata = self._request_metadata(content)
+        self.cache.set(METADATA_NAMESPACE, cache_key, metadata)
+        return metadata
+
+    def _request_metadata(self, content: str) -> Dict[str, Any]:
+        """Ask the model for the metadata of a document"""
         try:
             # Prepare the prompt for the model
             prompt = (
@@ -40,8 +85,9 @@ class MetadataExtractor:
             )
 
             # Call OpenRouter API using OpenAI client
-            response = self.client.chat.completions.create(
-                
+            response = self.scheduler.run(
+                self.priority,
+                self.client.chat.completions.create,
                 model="anthropic/claude-3.7-sonnet:beta",  # Using Claude 3 Sonnet
                 messages=[
                     {
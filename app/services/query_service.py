@@ -1,10 +1,9 @@
 import re
 import logging
 import json
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional
 from sqlalchemy.orm import Session
 from ..models.document import Document
-from openai import OpenAI
 
 from langchain_community.agent_toolkits import SQLDatabaseToolkit
 from langchain import hub
@@ -17,63 +16,169 @@ import logging
 from datetime import datetime, timedelta
 from sqlalchemy.orm import Session
 from app.models.document import Document
-from app.models.database import get_db, get_langchain_db
+from app.models.database import DEFAULT_TENANT, get_db, get_langchain_db
+from .llm_client import create_llm_client
+from .cache import SharedCache, QUESTION_NAMESPACE, get_cache
+from .search_service import FILTER_FIELDS, SearchService
+from .llm_scheduler import INTERACTIVE, LLMScheduler, get_scheduler
 
 load_dotenv()
 
 logger = logging.getLogger(__name__)
 
+# Parsed questions are reused for a day
+QUESTION_CACHE_TTL = 24 * 60 * 60
+
+# Most text-search matches returned for one question
+MAX_TEXT_RESULTS = 50
+
 class QueryService:
-    def __init__(self):
-        api_key = os.getenv("OPENROUTER_API_KEY")
-        if not api_key:
-            raise ValueError("OPENROUTER_API_KEY environment variable is not set")
-        
-        self.client = OpenAI(
-            base_url="https://openrouter.ai/api/v1",
-            api_key=api_key
-        )
+    def __init__(self, cache: Optional[SharedCache] = None, scheduler: Optional[LLMScheduler] = None):
+        self.client = create_llm_client()
+        self.cache = cache or get_cache()
+        self.scheduler = scheduler or get_scheduler()
+        self.search_service = SearchService()
 
-    def process_query(self, question: str, db: Session) -> List[Dict[str, Any]]:
-        """Process natural language query and return structured results"""
+    def process_query(self, question: str, db: Session, tenant_id: str = DEFAULT_TENANT) -> Dict[str, Any]:
+        """
+        Process natural language query and return structured results
+        
+        The question is turned into a plan of metadata filters and/or clause text to
+        search for, executed as one query over the tenant's documents. The response
+        says whether the question could be planned, so an empty result is
+        distinguishable from a failure. Plans depend only on the question, so their
+        cache is shared by all tenants.
+        
+        Returns:
+            Dict[str, Any]: status ("ok", "no_plan" or "error"), plan, results, message
+        """
         try:
-            prompt = (
-                "Analyze the user's question to identify which category they are asking about and its value. "
-                "Categories are: agreement_type (e.g., NDA, MSA), governing_law (e.g., UAE, UK), "
-                "geography (e.g., Middle East, Europe), industry (e.g., Technology, Oil & Gas).\n\n"
-                "Output a JSON with two fields:\n"
-                "- filter: the category being asked about (must be exactly one of: agreement_type, governing_law, geography, industry)\n"
-                "- value: the specific value mentioned for that category\n\n"
-                "Example 1: 'Show me all documents from the Technology industry'\n"
-                "Response: {\"filter\": \"industry\", \"value\": \"Technology\"}\n\n"
-                "Example 2: 'What agreements are governed by UAE law?'\n"
-                "Response: {\"filter\": \"governing_law\", \"value\": \"UAE\"}\n\n"
-                "User question: " + question
+            raw_plan = self.cache.get_or_set(
+                QUESTION_NAMESPACE,
+                self._normalize_question(question),
+                lambda: self._parse_question(question),
+                ttl=QUESTION_CACHE_TTL
             )
-            response = self.client.chat.completions.create(
-                model="anthropic/claude-3.7-sonnet:beta",
-                messages=[
-                    {
-                        "role": "system",
-                        "content": "You are a legal document classifier that helps identify search criteria from user questions. "
-                        "You analyze questions and determine which category (agreement_type, governing_law, geography, or industry) "
-                        "is being asked about and what specific value is being searched for."
-                    },
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.0
+        except Exception as e:
+            logger.error(f"Error planning query: {e}")
+            return self._response("error", message=f"Could not interpret the question: {e}")
+        
+        plan = self._normalize_plan(raw_plan)
+        if plan is None:
+            return self._response(
+                "no_plan",
+                message="The question does not mention an agreement type, governing law, industry, "
+                "geography or contract wording to search for"
             )
-
-            content = response.choices[0].message.content
-            content = content.replace('```json', '').replace('```', '').strip()
-            metadata = json.loads(content)
-            return self._query_general(metadata['filter'], metadata['value'], db)
+        
+        try:
+            results = self._execute_plan(plan, db, tenant_id)
         except Exception as e:
-            logger.error(f"Error processing query: {e}")
-            return []
+            logger.error(f"Error executing query plan {plan}: {e}")
+            return self._response("error", plan=plan, message=f"Query failed: {e}")
+        
+        return self._response("ok", plan=plan, results=results)
+    
+    def _response(
+        self,
+        status: str,
+        plan: Optional[Dict[str, Any]] = None,
+        results: Optional[List[Dict[str, Any]]] = None,
+        message: Optional[str] = None
+    ) -> Dict[str, Any]:
+        return {"status": status, "plan": plan, "results": results or [], "message": message}
+    
+    def _normalize_plan(self, raw_plan: Any) -> Optional[Dict[str, Any]]:
+        """Validate a model-produced plan; None when nothing in it can be executed"""
+        if not isinstance(raw_plan, dict):
+            return None
+        
+        raw_filters = raw_plan.get("filters") or []
+        if "filter" in raw_plan:
+            # Single-filter shape of plans cached before text search existed
+            raw_filters = [{"field": raw_plan.get("filter"), "value": raw_plan.get("value")}]
+        
+        filters = [
+            {"field": item["field"], "value": str(item["value"])}
+            for item in raw_filters
+            if isinstance(item, dict) and item.get("field") in FILTER_FIELDS and item.get("value")
+        ]
+        search = [phrase for phrase in raw_plan.get("search") or [] if isinstance(phrase, str) and phrase.strip()]
+        list_all = bool(raw_plan.get("all"))
+        
+        if not filters and not search and not list_all:
+            return None
+        return {"filters": filters, "search": search, "all": list_all and not filters and not search}
+    
+    def _execute_plan(self, plan: Dict[str, Any], db: Session, tenant_id: str = DEFAULT_TENANT) -> List[Dict[str, Any]]:
+        filters = [(item["field"], item["value"]) for item in plan["filters"]]
+        
+        if plan["search"]:
+            rows = self.search_service.search(db, plan["search"], filters, limit=MAX_TEXT_RESULTS, tenant_id=tenant_id)
+            return [
+                {
+                    'id': row['id'],
+                    'document': row['filename'],
+                    'governing_law': row['governing_law'],
+                    'agreement_type': row['agreement_type'],
+                    'industry': row['industry'],
+                    'geography': row['geography'],
+                    'score': row['score']
+                }
+                for row in rows
+            ]
+        
+        return self._query_general(filters, db, tenant_id)
+    
+    def _normalize_question(self, question: str) -> str:
+        """Cache key for a question: case and whitespace do not change its meaning"""
+        return " ".join(question.lower().split())
+    
+    def _parse_question(self, question: str) -> Dict[str, Any]:
+        """Ask the model for the metadata filters and clause text a question refers to"""
+        prompt = (
+            "Analyze the user's question to build a search plan over legal documents. "
+            "Metadata categories are: agreement_type (e.g., NDA, MSA), governing_law (e.g., UAE, UK), "
+            "geography (e.g., Middle East, Europe), industry (e.g., Technology, Oil & Gas).\n\n"
+            "Output a JSON with three fields:\n"
+            "- filters: list of {\"field\": category, \"value\": value} for each category mentioned "
+            "(field must be exactly one of: agreement_type, governing_law, geography, industry)\n"
+            "- search: list of short phrases that must appear in the contract text when the question asks "
+            "about clauses or wording rather than metadata (empty list otherwise)\n"
+            "- all: true only if the question asks for every document without any condition\n\n"
+            "Example 1: 'Show me all documents from the Technology industry'\n"
+            "Response: {\"filters\": [{\"field\": \"industry\", \"value\": \"Technology\"}], \"search\": [], \"all\": false}\n\n"
+            "Example 2: 'Which MSAs have a limitation of liability cap?'\n"
+            "Response: {\"filters\": [{\"field\": \"agreement_type\", \"value\": \"MSA\"}], "
+            "\"search\": [\"limitation of liability\", \"cap\"], \"all\": false}\n\n"
+            "Example 3: 'What contracts do we have?'\n"
+            "Response: {\"filters\": [], \"search\": [], \"all\": true}\n\n"
+            "User question: " + question
+        )
+        # Analysts wait on this call, so it is scheduled ahead of document extraction
+        response = self.scheduler.run(
+            INTERACTIVE,
+            self.client.chat.completions.create,
+            model="anthropic/claude-3.7-sonnet:beta",
+            messages=[
+                {
+                    "role": "system",
+                    "content": "You are a legal document classifier that helps identify search criteria from user questions. "
+                    "You analyze questions and determine which categories (agreement_type, governing_law, geography, or industry) "
+                    "are being asked about, what specific values are being searched for, and which contract wording to look for."
+                },
+                {"role": "user", "content": prompt}
+            ],
+            temperature=0.0
+        )
+
+        content = response.choices[0].message.content
+        content = content.replace('```json', '').replace('```', '').strip()
+        return json.loads(content)
     
-    def _query_general(self, filter: str, value: str, db: Session) -> List[Dict[str, Any]]:
-        documents = db.query(Document).filter(getattr(Document, filter) == value).all()
+    def _query_general(self, filters: List[tuple], db: Session, tenant_id: str = DEFAULT_TENANT) -> List[Dict[str, Any]]:
+        conditions = [Document.tenant_id == tenant_id] + [getattr(Document, field) == value for field, value in filters]
+        documents = db.query(Document).filter(*conditions).order_by(Document.id).all()
         return self._format_results(documents)
     
     def _format_results(self, documents: List[Document]) -> List[Dict[str, Any]]:
@@ -82,6 +187,7 @@ class QueryService:
 
         for doc in documents:
             result = {
+                'id': doc.id,
                 'document': doc.filename,
                 'governing_law': doc.governing_law,
                 'agreement_type': doc.agreement_type,
@@ -0,0 +1,187 @@
+import logging
+from collections import Counter
+from datetime import date, datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+from sqlalchemy.dialects.sqlite import insert
+from sqlalchemy.orm import Session
+
+from ..models.database import DEFAULT_TENANT, chunked
+from ..models.document import Document
+from ..models.rollup import DocumentRollup
+from .change_tracker import ChangeSet, document_id, on_flush
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = ("week", "month")
+FACETS = ("agreement_type", "governing_law", "industry", "geography")
+TOTAL_FACET = "total"
+
+# Longest dense series returned by one timeseries request
+MAX_BUCKETS = 520
+
+RollupKey = Tuple[str, str, str, date, str]
+
+
+def bucket_start(timestamp: datetime, granularity: str) -> date:
+    """First day of the week (Monday) or month containing ``timestamp``"""
+    day = timestamp.date() if isinstance(timestamp, datetime) else timestamp
+    if granularity == "week":
+        return day - timedelta(days=day.weekday())
+    if granularity == "month":
+        return day.replace(day=1)
+    raise ValueError(f"Unsupported granularity: {granularity}")
+
+
+def next_bucket(bucket: date, granularity: str) -> date:
+    if granularity == "week":
+        return bucket + timedelta(days=7)
+    if bucket.month == 12:
+        return bucket.replace(year=bucket.year + 1, month=1)
+    return bucket.replace(month=bucket.month + 1)
+
+
+def bucket_count(first: date, last: date, granularity: str) -> int:
+    """Number of buckets from the one starting at ``first`` through the one containing ``last``"""
+    if last < first:
+        return 0
+    if granularity == "week":
+        return (last - first).days // 7 + 1
+    return (last.year - first.year) * 12 + last.month - first.month + 1
+
+
+def _too_many_buckets(granularity: str) -> str:
+    return f"Range spans more than {MAX_BUCKETS} {granularity}s; narrow start/end or use a coarser granularity"
+
+
+def rollup_keys(tenant_id: str, uploaded_at: datetime, values: Dict[str, Optional[str]]) -> Iterable[RollupKey]:
+    """Rollup rows a single document contributes to"""
+    for granularity in GRANULARITIES:
+        bucket = bucket_start(uploaded_at, granularity)
+        yield tenant_id, granularity, TOTAL_FACET, bucket, ""
+        for facet in FACETS:
+            value = values.get(facet)
+            if value:
+                yield tenant_id, granularity, facet, bucket, value
+
+
+def apply_deltas(session: Session, deltas: Counter):
+    """Add count deltas to the rollup table with batched upserts"""
+    rows = [
+        {"tenant_id": t, "granularity": g, "facet": f, "bucket": b, "value": v, "count": n}
+        for (t, g, f, b, v), n in deltas.items() if n
+    ]
+    for chunk in chunked(rows):
+        stmt = insert(DocumentRollup).values(chunk)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=["tenant_id", "granularity", "facet", "bucket", "value"],
+            set_={"count": DocumentRollup.count + stmt.excluded.count}
+        )
+        session.connection().execute(stmt)
+
+
+@on_flush
+def _update_rollups(session: Session, changes: ChangeSet):
+    """Adjust the counts for inserted, re-classified and deleted documents in the same transaction"""
+    deltas = Counter()
+    for doc in changes.inserted:
+        values = {facet: getattr(doc, facet) for facet in FACETS}
+        deltas.update(rollup_keys(doc.tenant_id, doc.uploaded_at or datetime.now(timezone.utc), values))
+    
+    for doc in changes.deleted:
+        old = changes.old_values[document_id(doc)]
+        deltas.subtract(rollup_keys(old["tenant_id"], old["uploaded_at"] or datetime.now(timezone.utc), old))
+    
+    for doc in changes.updated:
+        old = changes.old_values[document_id(doc)]
+        if not any(key in old for key in FACETS + ("tenant_id", "uploaded_at")):
+            continue
+        uploaded_at = doc.uploaded_at or datetime.now(timezone.utc)
+        deltas.subtract(rollup_keys(old.get("tenant_id", doc.tenant_id), old.get("uploaded_at", uploaded_at), {
+            facet: old[facet] if facet in old else getattr(doc, facet) for facet in FACETS
+        }))
+        deltas.update(rollup_keys(doc.tenant_id, uploaded_at, {facet: getattr(doc, facet) for facet in FACETS}))
+    
+    apply_deltas(session, deltas)
+
+
+class RollupService:
+    """Trend analytics read from the pre-aggregated rollup table"""
+
+    def get_timeseries(
+        self,
+        db: Session,
+        granularity: str = "month",
+        facet: str = TOTAL_FACET,
+        start: Optional[date] = None,
+        end: Optional[date] = None,
+        tenant_id: str = DEFAULT_TENANT
+    ) -> Dict[str, Any]:
+        """
+        Document counts per bucket for each value of a facet, for one tenant.
+
+        Returns:
+            Dict[str, Any]: ``buckets`` (bucket start dates) and ``series`` mapping each
+                          value to counts aligned with ``buckets``, zero-filled
+
+        Raises:
+            ValueError: Unsupported granularity or facet, or a range of more than MAX_BUCKETS buckets
+        """
+        if granularity not in GRANULARITIES:
+            raise ValueError(f"Unsupported granularity: {granularity}")
+        if facet != TOTAL_FACET and facet not in FACETS:
+            raise ValueError(f"Unsupported facet: {facet}")
+
+        if start and end and bucket_count(bucket_start(start, granularity), end, granularity) > MAX_BUCKETS:
+            raise ValueError(_too_many_buckets(granularity))
+
+        query = db.query(DocumentRollup.bucket, DocumentRollup.value, DocumentRollup.count).filter(
+            DocumentRollup.tenant_id == tenant_id,
+            DocumentRollup.granularity == granularity,
+            DocumentRollup.facet == facet,
+            DocumentRollup.count > 0
+        )
+        if start:
+            query = query.filter(DocumentRollup.bucket >= bucket_start(start, granularity))
+        if end:
+            query = query.filter(DocumentRollup.bucket <= end)
+        rows = query.all()
+
+        if not rows:
+            return {"granularity": granularity, "facet": facet, "buckets": [], "series": {}}
+
+        first = bucket_start(start, granularity) if start else min(row.bucket for row in rows)
+        last = bucket_start(end, granularity) if end else max(row.bucket for row in rows)
+        buckets: List[date] = []
+        bucket = first
+        while bucket <= last:
+            if len(buckets) == MAX_BUCKETS:
+                raise ValueError(_too_many_buckets(granularity))
+            buckets.append(bucket)
+            bucket = next_bucket(bucket, granularity)
+
+        positions = {bucket: i for i, bucket in enumerate(buckets)}
+        series: Dict[str, List[int]] = {}
+        for row in rows:
+            position = positions.get(row.bucket)
+            if position is None:
+                continue
+            series.setdefault(row.value, [0] * len(buckets))[position] = row.count
+
+        return {
+            "granularity": granularity,
+            "facet": facet,
+            "buckets": [bucket.isoformat() for bucket in buckets],
+            "series": series
+        }
+
+    def rebuild(self, db: Session, batch_size: int = 1000):
+        """Recompute every rollup from the documents table"""
+        deltas = Counter()
+        columns = [Document.tenant_id, Document.uploaded_at] + [getattr(Document, facet) for facet in FACETS]
+        for row in db.query(*columns).yield_per(batch_size):
+            values = dict(zip(FACETS, row[2:]))
+            deltas.update(rollup_keys(row.tenant_id, row.uploaded_at or datetime.now(timezone.utc), values))
+
+        db.query(DocumentRollup).delete()
+        apply_deltas(db, deltas)
+        db.commit()
@@ -0,0 +1,139 @@
+import re
+import logging
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+
+from ..models.database import DEFAULT_TENANT
+from ..models.document import Document
+from ..models.search_index import SEARCH_TABLE, search_tenant_key
+from .change_tracker import CONTENT_COLUMN, ChangeSet, document_id, on_flush
+
+logger = logging.getLogger(__name__)
+
+# Metadata columns usable as predicates next to a text match
+FILTER_FIELDS = ("agreement_type", "governing_law", "industry", "geography")
+
+_TOKEN = re.compile(r"\w+", re.UNICODE)
+
+
+def _index_row(doc_id: int, content: Optional[str], tenant_id: str) -> Dict[str, Any]:
+    return {"id": doc_id, "content": content, "tenant": search_tenant_key(tenant_id)}
+
+
+@on_flush
+def _index_documents(session: Session, changes: ChangeSet):
+    """Keep the full-text index in step with inserted, edited and deleted documents in the same transaction"""
+    # Updated documents whose text or tenant changed are re-indexed
+    reindexed = [
+        doc for doc in changes.updated
+        if CONTENT_COLUMN in changes.old_values[document_id(doc)] or "tenant_id" in changes.old_values[document_id(doc)]
+    ]
+    
+    # A contentless index can only forget a row given the exact values it indexed
+    removed = []
+    for doc in changes.deleted + reindexed:
+        old = changes.old_values[document_id(doc)]
+        content = old[CONTENT_COLUMN] if CONTENT_COLUMN in old else doc.content
+        if content:
+            removed.append(_index_row(document_id(doc), content, old.get("tenant_id", doc.tenant_id)))
+    if removed:
+        session.connection().execute(
+            text(
+                f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}, rowid, content, tenant) "
+                "VALUES ('delete', :id, :content, :tenant)"
+            ),
+            removed
+        )
+    
+    added = [_index_row(doc.id, doc.content, doc.tenant_id) for doc in changes.inserted + reindexed if doc.content]
+    if added:
+        session.connection().execute(
+            text(f"INSERT INTO {SEARCH_TABLE} (rowid, content, tenant) VALUES (:id, :content, :tenant)"),
+            added
+        )
+
+
+def build_match_query(phrases: Sequence[str], require_all: bool = True) -> Optional[str]:
+    """
+    Turn search phrases into an FTS5 MATCH expression.
+
+    Each phrase is matched as a quoted phrase of its word tokens, so user text can
+    never inject FTS operators.
+    """
+    quoted = []
+    for phrase in phrases:
+        tokens = _TOKEN.findall(phrase or "")
+        if tokens:
+            quoted.append('"' + " ".join(tokens) + '"')
+    if not quoted:
+        return None
+    return (" AND " if require_all else " OR ").join(quoted)
+
+
+class SearchService:
+    """Ranked full-text search over document content, combined with metadata predicates"""
+
+    def search(
+        self,
+        db: Session,
+        phrases: Sequence[str],
+        filters: Sequence[Tuple[str, str]] = (),
+        limit: int = 50,
+        tenant_id: str = DEFAULT_TENANT,
+        require_all: bool = True
+    ) -> List[Dict[str, Any]]:
+        """
+        A tenant's documents containing all ``phrases`` (any of them with
+        ``require_all=False``) that also match every (field, value) filter, best
+        BM25 score first. No match is an empty list, never a looser search.
+
+        Returns:
+            List[Dict[str, Any]]: Rows with id, filename, the metadata fields and score
+        """
+        return self._search(db, build_match_query(phrases, require_all), filters, limit, tenant_id)
+
+    def _search(self, db: Session, match: Optional[str], filters: Sequence[Tuple[str, str]], limit: int, tenant_id: str):
+        if not match:
+            return []
+
+        # Restricting the match to the tenant's token keeps other tenants' postings out of the scan
+        conditions = [f"{SEARCH_TABLE} MATCH :match", "d.tenant_id = :tenant_id"]
+        params: Dict[str, Any] = {
+            "match": f'content : ({match}) AND tenant : "{search_tenant_key(tenant_id)}"',
+            "limit": limit,
+            "tenant_id": tenant_id,
+        }
+        for i, (field, value) in enumerate(filters):
+            if field not in FILTER_FIELDS:
+                raise ValueError(f"Unsupported filter field: {field}")
+            conditions.append(f"d.{field} = :value{i}")
+            params[f"value{i}"] = value
+
+        rows = db.execute(
+            text(
+                f"SELECT d.id, d.filename, {', '.join('d.' + field for field in FILTER_FIELDS)}, "
+                f"bm25({SEARCH_TABLE}, 1.0, 0.0) AS score "
+                f"FROM {SEARCH_TABLE} JOIN documents d ON d.id = {SEARCH_TABLE}.rowid "
+                f"WHERE {' AND '.join(conditions)} "
+                "ORDER BY score LIMIT :limit"
+            ),
+            params
+        ).mappings().all()
+
+        # bm25() is lower-is-better and negative; expose a positive relevance score
+        return [{**row, "score": round(-row["score"], 6)} for row in rows]
+
+    def rebuild(self, db: Session, batch_size: int = 200):
+        """Re-index the content of every document"""
+        db.execute(text(f"INSERT INTO {SEARCH_TABLE} ({SEARCH_TABLE}) VALUES ('delete-all')"))
+        for partition in db.execute(
+            Document.__table__.select().with_only_columns(Document.id, Document.content, Document.tenant_id)
+            .where(Document.content.isnot(None))
+            .execution_options(yield_per=batch_size)
+        ).partitions():
+            db.execute(
+                text(f"INSERT INTO {SEARCH_TABLE} (rowid, content, tenant) VALUES (:id, :content, :tenant)"),
+                [_index_row(row.id, row.content, row.tenant_id) for row in partition]
+            )
+        db.commit()
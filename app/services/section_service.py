@@ -0,0 +1,93 @@
+import logging
+from typing import Any, Dict, List, Optional
+from sqlalchemy.orm import Session, undefer
+
+from ..models.database import chunked
+from ..models.document import Document
+from ..models.section import DocumentSection
+from .change_tracker import CONTENT_COLUMN, ChangeSet, document_id, on_flush
+from .segmenter import segment_text
+
+logger = logging.getLogger(__name__)
+
+
+def section_rows(document_id: int, content: Optional[str]) -> List[Dict[str, Any]]:
+    """Rows of the document_sections table for one document's text"""
+    return [
+        {
+            "document_id": document_id,
+            "position": segment.position,
+            "kind": segment.kind,
+            "number": segment.number,
+            "title": segment.title,
+            "level": segment.level,
+            "page": segment.page,
+            "start_offset": segment.start,
+            "end_offset": segment.end,
+            "text": content[segment.start:segment.end],
+        }
+        for segment in segment_text(content or "")
+    ]
+
+
+def escape_like(text: str) -> str:
+    """Make LIKE wildcards in user input match literally (with ``escape="\\"``)"""
+    return text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+
+
+def insert_sections(session: Session, rows: List[Dict[str, Any]]):
+    for chunk in chunked(rows):
+        session.connection().execute(DocumentSection.__table__.insert(), chunk)
+
+
+@on_flush
+def _segment_documents(session: Session, changes: ChangeSet):
+    """Store, replace or drop the sections of changed documents in the same transaction"""
+    edited = [doc for doc in changes.updated if CONTENT_COLUMN in changes.old_values[document_id(doc)]]
+    stale = [document_id(doc) for doc in changes.deleted + edited]
+    for chunk in chunked(stale):
+        session.connection().execute(DocumentSection.__table__.delete().where(DocumentSection.document_id.in_(chunk)))
+    
+    rows = []
+    for doc in changes.inserted + edited:
+        rows.extend(section_rows(doc.id, doc.content))
+    insert_sections(session, rows)
+
+
+class SectionService:
+    """Access to documents clause by clause, without loading or sending their whole text"""
+
+    def list_sections(self, db: Session, document_id: int, title: Optional[str] = None) -> List[DocumentSection]:
+        """
+        Outline of a document: its sections in order, without their text.
+
+        Args:
+            title (str): Only sections whose title contains this (case-insensitive)
+        """
+        query = db.query(DocumentSection).filter(DocumentSection.document_id == document_id)
+        if title:
+            query = query.filter(DocumentSection.title.ilike(f"%{escape_like(title)}%", escape="\\"))
+        return query.order_by(DocumentSection.position).all()
+
+    def get_section(self, db: Session, document_id: int, section_id: int) -> Optional[DocumentSection]:
+        """One section including its text"""
+        return (
+            db.query(DocumentSection)
+            .options(undefer(DocumentSection.text))
+            .filter(DocumentSection.document_id == document_id, DocumentSection.id == section_id)
+            .first()
+        )
+
+    def rebuild(self, db: Session, batch_size: int = 200):
+        """Re-segment the content of every document"""
+        db.query(DocumentSection).delete()
+        for partition in db.execute(
+            Document.__table__.select().with_only_columns(Document.id, Document.content)
+            .where(Document.content.isnot(None))
+            .execution_options(yield_per=batch_size)
+        ).partitions():
+            rows = []
+            for row in partition:
+                rows.extend(section_rows(row.id, row.content))
+            insert_sections(db, rows)
+        db.commit()
@@ -0,0 +1,190 @@
+import re
+from dataclasses import dataclass
+from typing import Iterator, List, Optional, Tuple
+
+# Page boundaries as emitted by the PDF and DOCX extractors
+PAGE_BREAK = "\f"
+
+# Section kinds
+PREAMBLE = "preamble"
+HEADING = "heading"
+CLAUSE = "clause"
+
+# Deepest clause numbering treated as its own section (12.3.1 yes, 12.3.1.4 stays in its parent)
+MAX_CLAUSE_DEPTH = 3
+# Longest line still considered a heading rather than running text
+MAX_HEADING_LENGTH = 100
+# Longest run-in title, as in "12. Governing Law. This Agreement shall ..."
+MAX_RUN_IN_TITLE = 60
+
+_KEYWORD = r"(?:article|section|clause|schedule|annex|appendix|exhibit|part)"
+# Keywords of attachments, whose own numbering restarts from 1
+_ATTACHMENTS = {"schedule", "annex", "appendix", "exhibit"}
+
+# "12.", "12.3", "12.3.1" or "Article 12", followed by the rest of the line
+_NUMBERED = re.compile(
+    rf"^(?:(?P<keyword>{_KEYWORD})\s+)?(?P<number>\d{{1,3}}(?:\.\d{{1,3}})*)(?P<dot>\.?)(?:(?:\s*[-–—:]\s*|\s+)(?P<rest>\S.*))?$",
+    re.IGNORECASE
+)
+# "Schedule A", "Annex II", "Exhibit B - Pricing"
+_LETTERED = re.compile(
+    rf"^(?P<keyword>{_KEYWORD})\s+(?P<number>[A-Z]|[IVXLC]+)\b\.?(?:\s*[-–—:.]?\s*(?P<rest>\S.*))?$",
+    re.IGNORECASE
+)
+# Words left lowercase in title-case headings
+_MINOR_WORDS = {"a", "an", "and", "as", "at", "by", "for", "in", "of", "on", "or", "the", "to", "with"}
+_RUN_IN_TITLE = re.compile(rf"^(?P<title>[A-Z][^.:;]{{1,{MAX_RUN_IN_TITLE}}})[.:]\s+\S")
+_SENTENCE_END = re.compile(r"[.;,]$")
+
+
+@dataclass
+class Segment:
+    """A section of a document's text; ``text[start:end]`` of the segmented text"""
+
+    position: int
+    kind: str
+    level: int
+    start: int
+    end: int
+    page: int
+    number: Optional[str] = None
+    title: Optional[str] = None
+
+
+def segment_text(text: str) -> List[Segment]:
+    """
+    Split extracted document text into a preamble and heading-delimited sections.
+
+    A section starts at a line that looks like a heading: a clause number
+    (``12.``, ``12.3``, ``Article 12``), a lettered schedule/annex heading, or a
+    short all-caps line. It runs until the next heading. Numbering levels come
+    from the number of dotted parts, and pages from the form feeds between
+    pages. Text without any recognisable heading becomes a single preamble
+    segment.
+
+    Args:
+        text (str): Document text as stored in ``Document.content``
+
+    Returns:
+        List[Segment]: Segments in document order, covering all non-blank text
+    """
+    if not text or not text.strip():
+        return []
+
+    boundaries = list(_iter_headings(text))
+    if not boundaries or boundaries[0][0] > 0:
+        boundaries.insert(0, (0, PREAMBLE, 0, None, None))
+
+    segments = []
+    for i, (start, kind, level, number, title) in enumerate(boundaries):
+        end = boundaries[i + 1][0] if i + 1 < len(boundaries) else len(text)
+        start, end = _trim(text, start, end)
+        if start == end:
+            continue
+        segments.append(Segment(
+            position=len(segments),
+            kind=kind,
+            level=level,
+            start=start,
+            end=end,
+            page=text.count(PAGE_BREAK, 0, start) + 1,
+            number=number,
+            title=title
+        ))
+    return segments
+
+
+def _iter_headings(text: str) -> Iterator[Tuple[int, str, int, Optional[str], Optional[str]]]:
+    """(offset, kind, level, number, title) of each heading line"""
+    offset = 0
+    previous_top = 0
+    for line in re.split(r"(?<=[\n\f])", text):
+        heading = _match_heading(line.strip(), previous_top)
+        if heading is not None:
+            kind, level, number, title = heading
+            if kind == CLAUSE and level == 1 and number.isdigit():
+                previous_top = int(number)
+            elif kind == HEADING and number is not None:
+                previous_top = 0
+            leading = len(line) - len(line.lstrip())
+            yield offset + leading, kind, level, number, title
+        offset += len(line)
+
+
+def _match_heading(line: str, previous_top: int) -> Optional[Tuple[str, int, Optional[str], Optional[str]]]:
+    if not line:
+        return None
+
+    match = _NUMBERED.match(line)
+    if match:
+        number = match.group("number")
+        rest = (match.group("rest") or "").strip()
+        parts = number.split(".")
+        keyword = match.group("keyword")
+
+        if keyword:
+            label = f"{keyword.title()} {number}"
+            kind = HEADING if keyword.lower() in _ATTACHMENTS else CLAUSE
+            return kind, 1, number, (_title(rest) if rest else None) or label
+        # A stray page number is not a clause, nor is deeply nested numbering
+        if not rest or len(parts) > MAX_CLAUSE_DEPTH:
+            return None
+        if not rest[0].isupper() and rest[0] not in "(\"“'":
+            return None
+        title = _title(rest)
+        # "12 Governing Law" is a heading, "30 days after ..." is running text
+        if len(parts) == 1 and not match.group("dot") and title != rest:
+            return None
+        # Numbering restarts or jumps far ahead in tables of figures, not in clauses
+        if len(parts) == 1 and previous_top and not 0 < int(number) <= previous_top + 5:
+            return None
+        return CLAUSE, len(parts), number, title
+
+    match = _LETTERED.match(line)
+    if match and len(line) <= MAX_HEADING_LENGTH and (match.group("number").isupper() or match.group("rest")):
+        rest = (match.group("rest") or "").strip()
+        label = f"{match.group('keyword').title()} {match.group('number')}"
+        return HEADING, 1, match.group("number"), _title(rest) or label
+
+    if _is_caps_heading(line):
+        return HEADING, 1, None, line.strip(" :")
+
+    return None
+
+
+def _title(rest: str) -> Optional[str]:
+    """Title of a numbered line: the whole line if it reads as a heading, else a run-in title"""
+    if len(rest) <= MAX_HEADING_LENGTH and not _SENTENCE_END.search(rest) and _is_title_case(rest):
+        return rest.strip(" :")
+    match = _RUN_IN_TITLE.match(rest)
+    if match and len(match.group("title").split()) <= 6:
+        return match.group("title").strip()
+    return None
+
+
+def _is_title_case(line: str) -> bool:
+    """"Governing Law" or "Term of the Agreement", not a wrapped sentence like "Charges are payable" """
+    words = [word for word in re.findall(r"[^\W\d_][\w'’-]*", line) if word.lower() not in _MINOR_WORDS]
+    return 0 < len(words) <= 12 and all(word[0].isupper() for word in words)
+
+
+def _is_caps_heading(line: str) -> bool:
+    """Short all-caps lines such as "GOVERNING LAW" or "TERMS AND CONDITIONS" """
+    letters = [char for char in line if char.isalpha()]
+    return (
+        3 <= len(letters)
+        and len(line) <= MAX_HEADING_LENGTH
+        and all(char.isupper() for char in letters)
+        and len(line.split()) <= 10
+        and not _SENTENCE_END.search(line)
+        and "|" not in line  # table rows from the DOCX extractor
+    )
+
+
+def _trim(text: str, start: int, end: int) -> Tuple[int, int]:
+    """Shrink a range to exclude surrounding whitespace and page breaks"""
+    while start < end and text[start].isspace():
+        start += 1
+    while end > start and text[end - 1].isspace():
+        end -= 1
+    return start, end
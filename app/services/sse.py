@@ -0,0 +1,99 @@
+import os
+import json
+import asyncio
+import logging
+from typing import Any, AsyncIterator, Awaitable, Callable, Dict, List, Optional
+
+logger = logging.getLogger(__name__)
+
+# Events produced within this many seconds of each other are written in one chunk
+SSE_FLUSH_INTERVAL = float(os.getenv("SSE_FLUSH_INTERVAL", 0.05))
+# Upper bound on events per chunk
+SSE_MAX_BATCH = int(os.getenv("SSE_MAX_BATCH", 100))
+# Comment line sent when nothing happened for this long, so proxies keep the connection
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", 15))
+
+SSE_HEADERS = {
+    "Cache-Control": "no-cache",
+    "X-Accel-Buffering": "no",  # disable nginx response buffering
+}
+
+Emit = Callable[[str, Dict[str, Any]], None]
+
+_DONE = object()
+
+
+def format_event(event: str, data: Dict[str, Any], event_id: Optional[int] = None) -> str:
+    """Encode one server-sent event"""
+    lines = []
+    if event_id is not None:
+        lines.append(f"id: {event_id}")
+    lines.append(f"event: {event}")
+    lines.append(f"data: {json.dumps(data, default=str)}")
+    return "\n".join(lines) + "\n\n"
+
+
+async def event_stream(
+    producer: Callable[[Emit], Awaitable[Any]],
+    flush_interval: float = SSE_FLUSH_INTERVAL,
+    max_batch: int = SSE_MAX_BATCH,
+    heartbeat_interval: float = SSE_HEARTBEAT_INTERVAL
+) -> AsyncIterator[str]:
+    """
+    Run ``producer(emit)`` and stream what it emits as server-sent events.
+
+    Events are coalesced: after the first event of a chunk, others arriving
+    within ``flush_interval`` (up to ``max_batch``) go out in the same write,
+    so a burst costs one flush instead of one per event. If the producer
+    raises, an ``error`` event closes the stream; if the client disconnects,
+    the producer is cancelled.
+    """
+    queue: asyncio.Queue = asyncio.Queue()
+    loop = asyncio.get_running_loop()
+
+    async def run():
+        try:
+            await producer(lambda event, data: queue.put_nowait((event, data)))
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            logger.error(f"Event stream producer failed: {e}")
+            queue.put_nowait(("error", {"error": str(e)}))
+        finally:
+            queue.put_nowait(_DONE)
+
+    task = asyncio.create_task(run())
+    event_id = 0
+    try:
+        done = False
+        while not done:
+            try:
+                item = await asyncio.wait_for(queue.get(), heartbeat_interval)
+            except asyncio.TimeoutError:
+                yield ": keep-alive\n\n"
+                continue
+
+            batch: List[str] = []
+            deadline = loop.time() + flush_interval
+            while True:
+                if item is _DONE:
+                    done = True
+                    break
+                event_id += 1
+                batch.append(format_event(item[0], item[1], event_id))
+                if len(batch) >= max_batch:
+                    break
+
+                remaining = deadline - loop.time()
+                if remaining <= 0 and queue.empty():
+                    break
+                try:
+                    item = queue.get_nowait() if remaining <= 0 else await asyncio.wait_for(queue.get(), remaining)
+                except asyncio.TimeoutError:
+                    break
+
+            if batch:
+                yield "".join(batch)
+    finally:
+        if not task.done():
+            task.cancel()
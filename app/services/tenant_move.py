@@ -0,0 +1,86 @@
+import logging
+from typing import Dict, Optional
+
+from sqlalchemy.orm import undefer
+
+from ..models.database import DEDICATED_TENANTS, SQL_BATCH_SIZE, SessionLocal, engine, get_engine
+from ..models.document import Document
+from . import rollup_service, search_service, section_service  # noqa: F401 - their flush handlers move the derived data
+
+logger = logging.getLogger(__name__)
+
+# Document columns copied to the dedicated database
+COPIED_COLUMNS = [column.key for column in Document.__table__.columns]
+
+
+def stranded_documents(tenant_id: str) -> int:
+    """
+    Documents of a dedicated tenant still in the shared database.
+
+    A tenant added to DEDICATED_TENANTS after it had documents keeps them in the
+    shared database, where requests for it no longer look, until they are moved
+    with ``move_to_dedicated`` (``python move_tenant.py <tenant>``).
+    """
+    if tenant_id not in DEDICATED_TENANTS:
+        return 0
+    with SessionLocal(bind=engine) as db:
+        return db.query(Document).filter(Document.tenant_id == tenant_id).count()
+
+
+def move_to_dedicated(tenant_id: str, batch_size: Optional[int] = None) -> Dict[str, int]:
+    """
+    Move a dedicated tenant's documents from the shared database to its own.
+
+    Each batch is committed to the dedicated database before it is deleted from
+    the shared one, and the change tracker writes and retracts the rollups,
+    search index and sections on either side. Documents keep their ids unless
+    the dedicated database already uses one. A document whose content the
+    dedicated database already holds (e.g. moved by an interrupted run) is only
+    deleted, so the move can simply be run again.
+
+    Returns:
+        Dict[str, int]: Number of documents moved and skipped as already there
+
+    Raises:
+        ValueError: The tenant is not in DEDICATED_TENANTS
+    """
+    if tenant_id not in DEDICATED_TENANTS:
+        raise ValueError(f"Tenant {tenant_id} is not in DEDICATED_TENANTS")
+
+    batch_size = batch_size or SQL_BATCH_SIZE
+    stats = {"moved": 0, "skipped": 0}
+    with SessionLocal(bind=engine) as source, SessionLocal(bind=get_engine(tenant_id)) as target:
+        while True:
+            documents = (
+                source.query(Document).options(undefer(Document.content))
+                .filter(Document.tenant_id == tenant_id)
+                .order_by(Document.id).limit(batch_size).all()
+            )
+            if not documents:
+                break
+
+            ids = {document.id for document in documents}
+            hashes = {document.content_hash for document in documents if document.content_hash}
+            taken_ids = {row.id for row in target.query(Document.id).filter(Document.id.in_(ids))}
+            present = {
+                row.content_hash for row in target.query(Document.content_hash)
+                .filter(Document.tenant_id == tenant_id, Document.content_hash.in_(hashes))
+            }
+
+            for document in documents:
+                if document.content_hash in present:
+                    stats["skipped"] += 1
+                    continue
+                values = {key: getattr(document, key) for key in COPIED_COLUMNS}
+                if document.id in taken_ids:
+                    values["id"] = None
+                target.add(Document(**values))
+                stats["moved"] += 1
+            target.commit()
+
+            for document in documents:
+                source.delete(document)
+            source.commit()
+            logger.info(f"Moved {stats['moved']} documents of {tenant_id} to its dedicated database")
+
+    return stats
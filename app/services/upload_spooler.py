@@ -0,0 +1,143 @@
+import os
+import hashlib
+import logging
+import tempfile
+import zipfile
+from typing import BinaryIO, Optional
+from fastapi import UploadFile
+
+logger = logging.getLogger(__name__)
+
+# Upload limits - overridable through the environment
+MAX_UPLOAD_SIZE = int(os.getenv("MAX_UPLOAD_SIZE", 50 * 1024 * 1024))  # per file
+MAX_REQUEST_SIZE = int(os.getenv("MAX_REQUEST_SIZE", 200 * 1024 * 1024))  # whole multipart body
+UPLOAD_SPOOL_DIR = os.getenv("UPLOAD_SPOOL_DIR") or None
+CHUNK_SIZE = 1024 * 1024
+
+PDF_MAGIC = b"%PDF-"
+ZIP_MAGIC = b"PK\x03\x04"
+SNIFF_SIZE = 8
+
+
+class UploadRejected(ValueError):
+    """Raised when an upload fails size or type validation"""
+
+    def __init__(self, message: str, status_code: int = 400):
+        super().__init__(message)
+        self.status_code = status_code
+
+
+class SpooledUpload:
+    """An uploaded file streamed to a temporary file on disk"""
+
+    def __init__(self, filename: str, path: str, file_type: str, size: int, sha256: str):
+        self.filename = filename
+        self.path = path
+        self.file_type = file_type
+        self.size = size
+        self.sha256 = sha256
+
+    def open(self) -> BinaryIO:
+        """Open the spooled file for reading"""
+        return open(self.path, "rb")
+
+    def cleanup(self):
+        """Remove the temporary file"""
+        try:
+            os.unlink(self.path)
+        except FileNotFoundError:
+            pass
+
+    def __enter__(self) -> "SpooledUpload":
+        return self
+
+    def __exit__(self, *exc_info):
+        self.cleanup()
+
+
+def sniff_file_type(head: bytes) -> Optional[str]:
+    """Guess the document type from its leading bytes"""
+    if head.startswith(PDF_MAGIC):
+        return "pdf"
+    if head.startswith(ZIP_MAGIC):
+        # Confirmed as DOCX once the archive is complete, see _is_docx_archive
+        return "docx"
+    return None
+
+
+def _is_docx_archive(path: str) -> bool:
+    """Check that a ZIP archive is a Word document (only reads the central directory)"""
+    try:
+        with zipfile.ZipFile(path) as archive:
+            return "word/document.xml" in archive.namelist()
+    except zipfile.BadZipFile:
+        return False
+
+
+def detect_file_type(path: str) -> Optional[str]:
+    """Sniff the document type of a file on disk ("pdf", "docx" or None)"""
+    with open(path, "rb") as f:
+        file_type = sniff_file_type(f.read(SNIFF_SIZE))
+    if file_type == "docx" and not _is_docx_archive(path):
+        return None
+    return file_type
+
+
+async def spool_upload(
+    file: UploadFile,
+    max_size: int = MAX_UPLOAD_SIZE,
+    chunk_size: int = CHUNK_SIZE
+) -> SpooledUpload:
+    """
+    Stream an upload to disk in chunks, hashing and size-checking as it goes.
+
+    The file type is sniffed from the first chunk, so unsupported or oversized
+    files are rejected without reading the rest of the stream.
+
+    Raises:
+        UploadRejected: If the file is empty, too large or not a PDF/DOCX
+    """
+    filename = file.filename or "upload"
+
+    # The multipart parser records the size when it is known up front
+    if file.size is not None and file.size > max_size:
+        raise UploadRejected(f"{filename} exceeds the {max_size} byte upload limit", status_code=413)
+
+    digest = hashlib.sha256()
+    size = 0
+    file_type = None
+    fd, path = tempfile.mkstemp(prefix="upload-", dir=UPLOAD_SPOOL_DIR)
+
+    try:
+        with os.fdopen(fd, "wb") as spool:
+            while True:
+                chunk = await file.read(chunk_size)
+                if not chunk:
+                    break
+
+                if file_type is None:
+                    file_type = sniff_file_type(chunk[:SNIFF_SIZE])
+                    if file_type is None:
+                        raise UploadRejected(f"Unsupported file type: {filename}")
+
+                size += len(chunk)
+                if size > max_size:
+                    raise UploadRejected(f"{filename} exceeds the {max_size} byte upload limit", status_code=413)
+
+                digest.update(chunk)
+                spool.write(chunk)
+
+        if size == 0:
+            raise UploadRejected(f"Empty file: {filename}")
+
+        if file_type == "docx" and not _is_docx_archive(path):
+            raise UploadRejected(f"Unsupported file type: {filename}")
+
+        return SpooledUpload(filename, path, file_type, size, digest.hexdigest())
+
+    except Exception:
+        try:
+            os.unlink(path)
+        except FileNotFoundError:
+            pass
+        raise
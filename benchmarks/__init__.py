@@ -0,0 +1 @@
+# Benchmarks for Legal Intel Dashboard Backend
@@ -0,0 +1,118 @@
+#!/usr/bin/env python3
+"""
+Benchmark stored document content: database size and read latency per codec
+
+Builds a synthetic corpus of agreement-like documents, stores it in a temporary
+SQLite database once per codec and reports the file size, the time to read the
+content of random documents, and the time of a metadata-only scan.
+
+Usage:
+    python -m benchmarks.content_compression [--documents 2000] [--reads 500]
+"""
+
+import argparse
+import os
+import random
+import tempfile
+import time
+
+from sqlalchemy import create_engine, text
+
+from app.models import compression
+
+CLAUSES = [
+    "The Supplier shall perform the Services with reasonable skill and care and in accordance with Good Industry Practice.",
+    "Each party shall keep the Confidential Information of the other party confidential and shall not disclose it to any third party.",
+    "Neither party's total liability arising under or in connection with this Agreement shall exceed the Charges paid in the preceding twelve months.",
+    "This Agreement shall be governed by and construed in accordance with the laws of {law}.",
+    "Either party may terminate this Agreement on {days} days' written notice to the other party.",
+    "The Customer shall pay each invoice within {days} days of the date of the invoice.",
+    "Any dispute arising out of or in connection with this Agreement shall be referred to arbitration in {city}.",
+    "No failure or delay by a party to exercise any right or remedy shall constitute a waiver of that right or remedy.",
+]
+LAWS = ["England and Wales", "the United Arab Emirates", "the State of New York", "Singapore", "Qatar"]
+CITIES = ["London", "Dubai", "New York", "Singapore", "Doha"]
+
+def build_document(rng: random.Random) -> str:
+    """An agreement of 40-200 numbered clauses drawn from common legal boilerplate"""
+    lines = [f"AGREEMENT No. {rng.randint(1000, 99999)}"]
+    for number in range(1, rng.randint(40, 200)):
+        clause = rng.choice(CLAUSES).format(law=rng.choice(LAWS), days=rng.choice([14, 30, 60, 90]), city=rng.choice(CITIES))
+        lines.append(f"{number}. {clause}")
+    return "\n".join(lines)
+
+def store(path: str, documents, codec: str):
+    engine = create_engine(f"sqlite:///{path}")
+    with engine.begin() as conn:
+        conn.execute(text(
+            "CREATE TABLE documents (id INTEGER PRIMARY KEY, filename VARCHAR, agreement_type VARCHAR, content BLOB)"
+        ))
+        conn.execute(
+            text("INSERT INTO documents (filename, agreement_type, content) VALUES (:filename, :agreement_type, :content)"),
+            [
+                {
+                    "filename": f"contract{i}.pdf",
+                    "agreement_type": "MSA",
+                    "content": document if codec == "plain" else compression.compress_text(document, codec)
+                }
+                for i, document in enumerate(documents)
+            ]
+        )
+    with engine.connect() as conn:
+        conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+    return engine
+
+def measure(engine, count: int, reads: int, rng: random.Random):
+    """Return (ms per content read, ms per metadata scan)"""
+    ids = [rng.randint(1, count) for _ in range(reads)]
+    with engine.connect() as conn:
+        start = time.perf_counter()
+        for document_id in ids:
+            value = conn.execute(text("SELECT content FROM documents WHERE id = :id"), {"id": document_id}).scalar()
+            compression.decompress_text(value)
+        read_ms = (time.perf_counter() - start) * 1000 / reads
+
+        start = time.perf_counter()
+        for _ in range(10):
+            conn.execute(text("SELECT agreement_type, count(*) FROM documents GROUP BY agreement_type")).fetchall()
+        scan_ms = (time.perf_counter() - start) * 1000 / 10
+    return read_ms, scan_ms
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=2000)
+    parser.add_argument("--reads", type=int, default=500)
+    args = parser.parse_args()
+
+    rng = random.Random(42)
+    documents = [build_document(rng) for _ in range(args.documents)]
+    print(f"Corpus: {args.documents} documents, {sum(map(len, documents)) / 2 ** 20:.1f} MiB of text")
+    print(f"{'codec':<12}{'db MiB':>10}{'ratio':>8}{'read ms':>10}{'scan ms':>10}")
+
+    codecs = ["plain", "zlib"]
+    try:
+        import zstandard  # noqa: F401
+        codecs += ["zstd", "zstd+dict"]
+    except ImportError:
+        print("(zstandard not installed, skipping zstd)")
+
+    with tempfile.TemporaryDirectory() as tmp:
+        baseline = None
+        for codec in codecs:
+            if codec == "zstd+dict":
+                # Trained on the database of the previous run, which holds the same corpus
+                dict_path = os.path.join(tmp, "content.zdict")
+                compression.train_zstd_dictionary(engine, dict_path, samples=min(args.documents, 1000))
+                compression.use_zstd_dictionary(dict_path)
+
+            path = os.path.join(tmp, f"{codec}.db")
+            engine = store(path, documents, "zstd" if codec == "zstd+dict" else codec)
+            size = os.path.getsize(path)
+            baseline = baseline or size
+            read_ms, scan_ms = measure(engine, args.documents, args.reads, rng)
+            print(f"{codec:<12}{size / 2 ** 20:>10.1f}{baseline / size:>8.1f}{read_ms:>10.3f}{scan_ms:>10.2f}")
+
+        compression.use_zstd_dictionary(None)
+
+if __name__ == "__main__":
+    main()
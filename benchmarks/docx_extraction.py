@@ -0,0 +1,84 @@
+#!/usr/bin/env python3
+"""
+Benchmark DOCX text extraction: python-docx paragraphs vs the streaming extractor
+
+Usage:
+    python -m benchmarks.docx_extraction [--clauses 2000] [--rows 200] [--repeat 5]
+"""
+
+import argparse
+import statistics
+import time
+import tracemalloc
+from io import BytesIO
+
+from docx import Document as DocxDocument
+
+from app.services.docx_extractor import extract_docx_text
+
+def build_sample_docx(clauses: int, rows: int) -> bytes:
+    """Build a synthetic agreement with numbered clauses, a party table and header/footer"""
+    doc = DocxDocument()
+    doc.sections[0].header.paragraphs[0].text = "MASTER SERVICES AGREEMENT - CONFIDENTIAL"
+    doc.sections[0].footer.paragraphs[0].text = "Governed by the laws of England and Wales"
+    
+    table = doc.add_table(rows=rows, cols=3)
+    for i, row in enumerate(table.rows):
+        row.cells[0].text = f"Party {i}"
+        row.cells[1].text = f"Registered office {i}, Dubai, United Arab Emirates"
+        row.cells[2].text = "Technology"
+    
+    for i in range(clauses):
+        doc.add_paragraph(
+            f"{i + 1}. The Supplier shall perform the Services with reasonable skill and care "
+            "and in accordance with Good Industry Practice, subject to the limitation of "
+            "liability set out in this Agreement."
+        )
+    
+    buffer = BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+def extract_with_python_docx(data: bytes) -> str:
+    """The previous DocumentService implementation"""
+    doc = DocxDocument(BytesIO(data))
+    text = ""
+    for paragraph in doc.paragraphs:
+        text += paragraph.text + "\n"
+    return text.strip()
+
+def extract_streaming(data: bytes) -> str:
+    return extract_docx_text(BytesIO(data))
+
+def measure(extract, data: bytes, repeat: int):
+    """Return (median seconds, peak traced bytes, extracted characters)"""
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        text = extract(data)
+        timings.append(time.perf_counter() - start)
+    
+    tracemalloc.start()
+    extract(data)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    return statistics.median(timings), peak, len(text)
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--clauses", type=int, default=2000)
+    parser.add_argument("--rows", type=int, default=200)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    
+    data = build_sample_docx(args.clauses, args.rows)
+    print(f"Sample document: {len(data) / 1024:.0f} KiB, {args.clauses} clauses, {args.rows} table rows")
+    print(f"{'extractor':<14}{'median ms':>12}{'peak MiB':>12}{'chars':>12}")
+    
+    for name, extract in (("python-docx", extract_with_python_docx), ("streaming", extract_streaming)):
+        seconds, peak, chars = measure(extract, data, args.repeat)
+        print(f"{name:<14}{seconds * 1000:>12.1f}{peak / 2 ** 20:>12.1f}{chars:>12}")
+
+if __name__ == "__main__":
+    main()
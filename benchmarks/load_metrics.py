@@ -0,0 +1,134 @@
+"""
+Probes shared by the load-test driver and the load-test server
+
+Both record raw samples so results from several uvicorn workers can be merged
+before percentiles are taken.
+"""
+
+import asyncio
+import time
+from typing import Dict, List, Optional, Sequence
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+
+# Keep memory bounded on long runs; later samples replace random earlier ones
+MAX_SAMPLES = 200_000
+
+WRITE_STATEMENTS = ("INSERT", "UPDATE", "DELETE", "REPLACE")
+
+
+def percentile(values: Sequence[float], pct: float) -> float:
+    """Nearest-rank percentile of ``values`` (0 when empty)"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    rank = max(0, min(len(ordered) - 1, int(round(pct / 100 * len(ordered) + 0.5)) - 1))
+    return ordered[rank]
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """Count, mean and p50/p95/p99/max of samples in seconds, reported in milliseconds"""
+    if not values:
+        return {"count": 0, "mean": 0.0, "p50": 0.0, "p95": 0.0, "p99": 0.0, "max": 0.0}
+    ordered = sorted(values)
+    return {
+        "count": len(ordered),
+        "mean": round(sum(ordered) / len(ordered) * 1000, 2),
+        "p50": round(percentile(ordered, 50) * 1000, 2),
+        "p95": round(percentile(ordered, 95) * 1000, 2),
+        "p99": round(percentile(ordered, 99) * 1000, 2),
+        "max": round(ordered[-1] * 1000, 2),
+    }
+
+
+class _Samples(list):
+    def add(self, value: float):
+        if len(self) < MAX_SAMPLES:
+            self.append(value)
+        else:
+            self[int(time.perf_counter_ns()) % MAX_SAMPLES] = value
+
+
+class LoopLagMonitor:
+    """
+    Measures event-loop lag: how late a timer scheduled every ``interval`` fires.
+
+    Anything that blocks the loop (sync I/O, CPU-bound work in a coroutine)
+    shows up directly as lag, and delays every request on that worker.
+    """
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.samples = _Samples()
+        self._task: Optional[asyncio.Task] = None
+
+    def start(self):
+        self._task = asyncio.get_running_loop().create_task(self._run())
+
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            self.samples.add(max(0.0, loop.time() - expected))
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def reset(self):
+        self.samples = _Samples()
+
+
+class DBWaitTimer:
+    """
+    Times write statements on an engine and counts "database is locked" errors.
+
+    SQLite takes its write lock on the first write of a transaction, so time
+    spent in write statements is dominated by waiting for other writers once
+    they contend.
+    """
+
+    def __init__(self, engine: Engine):
+        self.engine = engine
+        self.samples = _Samples()
+        self.locked_errors = 0
+        event.listen(engine, "before_cursor_execute", self._before)
+        event.listen(engine, "after_cursor_execute", self._after)
+        event.listen(engine, "handle_error", self._error)
+
+    def _before(self, conn, cursor, statement, parameters, context, executemany):
+        if statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            conn.info.setdefault("loadtest_started", []).append(time.perf_counter())
+
+    def _after(self, conn, cursor, statement, parameters, context, executemany):
+        started = conn.info.get("loadtest_started")
+        if started and statement.lstrip()[:7].upper().startswith(WRITE_STATEMENTS):
+            self.samples.add(time.perf_counter() - started.pop())
+
+    def _error(self, context):
+        started = context.connection.info.get("loadtest_started") if context.connection is not None else None
+        if started:
+            started.pop()
+        if "database is locked" in str(context.original_exception):
+            self.locked_errors += 1
+
+    def reset(self):
+        self.samples = _Samples()
+        self.locked_errors = 0
+
+    def remove(self):
+        event.remove(self.engine, "before_cursor_execute", self._before)
+        event.remove(self.engine, "after_cursor_execute", self._after)
+        event.remove(self.engine, "handle_error", self._error)
+
+
+def merge(reports: List[Dict]) -> Dict:
+    """Combine the raw probe samples of several processes"""
+    return {
+        "loop_lag": [value for report in reports for value in report.get("loop_lag", [])],
+        "db_write": [value for report in reports for value in report.get("db_write", [])],
+        "db_locked": sum(report.get("db_locked", 0) for report in reports),
+    }
@@ -0,0 +1,43 @@
+"""
+The API app with load-test probes, for ``benchmarks.load_test --server``
+
+Each uvicorn worker samples its own event-loop lag and database write time
+and writes the raw samples to ``$LOADTEST_METRICS_DIR/<pid>.json`` when it
+shuts down. The LLM is the fake backend unless LLM_BACKEND says otherwise.
+
+Usage:
+    LOADTEST_METRICS_DIR=/tmp/metrics uvicorn benchmarks.load_server:app --workers 4
+"""
+
+import os
+import json
+
+os.environ.setdefault("LLM_BACKEND", "fake")
+
+from app.models.database import engine  # noqa: E402
+from benchmarks.load_metrics import DBWaitTimer, LoopLagMonitor  # noqa: E402
+from main import app  # noqa: E402
+
+METRICS_DIR = os.getenv("LOADTEST_METRICS_DIR")
+
+_monitor = LoopLagMonitor()
+_db_timer = DBWaitTimer(engine)
+
+
+@app.on_event("startup")
+async def _start_probes():
+    _monitor.start()
+
+
+@app.on_event("shutdown")
+async def _write_probes():
+    _monitor.stop()
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    with open(os.path.join(METRICS_DIR, f"{os.getpid()}.json"), "w") as f:
+        json.dump({
+            "loop_lag": list(_monitor.samples),
+            "db_write": list(_db_timer.samples),
+            "db_locked": _db_timer.locked_errors,
+        }, f)
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+Load test the API with a mixed workload of uploads, queries, dashboard polls
+and document listings
+
+Virtual users each loop over requests drawn from a workload profile for a
+fixed duration. The LLM is replaced by a fake with configurable latency, so
+the results show the app's own ceiling and how it behaves while LLM calls are
+in flight. Every run starts from a database seeded with synthetic documents.
+
+By default the app runs in this process (httpx ASGI transport; event-loop lag
+then includes the load generator itself). With --server it is started under
+uvicorn on localhost once per --workers value, and lag and database write
+time are collected from every worker. --url drives an already running server
+(client-side numbers only).
+
+Reported per run: requests/s, latency percentiles per operation, event-loop
+lag, time spent in database write statements (where SQLite waits for its
+write lock) and "database is locked" errors.
+
+Usage:
+    python -m benchmarks.load_test [--profile mixed] [--concurrency 1,8,32] [--duration 20]
+    python -m benchmarks.load_test --server --workers 1,2,4 --concurrency 16,64
+    python -m benchmarks.load_test --mix upload=1,query=2 --llm-latency-ms 2000 --json results.json
+"""
+
+import argparse
+import asyncio
+import glob
+import io
+import json
+import os
+import random
+import shutil
+import signal
+import socket
+import subprocess
+import sys
+import tempfile
+import time
+import uuid
+import zipfile
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+import httpx
+
+from benchmarks.load_metrics import merge, summarize
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# The working directory changes to a scratch directory, so "" on sys.path would stop finding the app
+sys.path.insert(0, REPO_ROOT)
+API = "/api/v1"
+
+PROFILES = {
+    "mixed": {"upload": 1, "query": 3, "dashboard": 5, "documents": 1},
+    "ingest": {"upload": 8, "query": 1, "dashboard": 1},
+    "read": {"query": 4, "dashboard": 5, "documents": 1},
+}
+
+QUESTIONS = [
+    "Which agreements are governed by {law} law?",
+    "Show me all {agreement_type} contracts",
+    "Find {industry} industry agreements",
+    "What {agreement_type} agreements do we have in {geography}?",
+    "What contracts do we have?",
+]
+
+UNIQUE_MARKER = "LOADTEST-UNIQUE-MARKER"
+
+
+class Workload:
+    """Requests of one virtual user"""
+
+    def __init__(self, mix: Dict[str, int], rng: random.Random, docx_template: bytes, unique_queries: bool):
+        self.operations = list(mix)
+        self.weights = [mix[name] for name in self.operations]
+        self.rng = rng
+        self.docx_template = docx_template
+        self.unique_queries = unique_queries
+        self.etag: Optional[str] = None
+
+    def next_operation(self) -> str:
+        return self.rng.choices(self.operations, self.weights)[0]
+
+    async def run(self, client: httpx.AsyncClient, operation: str) -> httpx.Response:
+        if operation == "upload":
+            files = [("files", (f"loadtest-{uuid.uuid4().hex[:12]}.docx", self._unique_docx(), "application/octet-stream"))]
+            return await client.post(f"{API}/upload", files=files)
+        if operation == "query":
+            return await client.post(f"{API}/query", json={"question": self._question()})
+        if operation == "dashboard":
+            # Poll like the frontend: revalidate with the last ETag
+            headers = {"If-None-Match": self.etag} if self.etag else {}
+            response = await client.get(f"{API}/dashboard", headers=headers)
+            self.etag = response.headers.get("etag", self.etag)
+            return response
+        if operation == "documents":
+            return await client.get(f"{API}/documents")
+        raise ValueError(f"Unknown operation: {operation}")
+
+    def _unique_docx(self) -> bytes:
+        """The template with a fresh marker, so every upload misses the metadata cache"""
+        source = zipfile.ZipFile(io.BytesIO(self.docx_template))
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w", zipfile.ZIP_DEFLATED) as target:
+            for info in source.infolist():
+                data = source.read(info.filename)
+                if info.filename == "word/document.xml":
+                    data = data.replace(UNIQUE_MARKER.encode(), uuid.uuid4().hex.encode())
+                target.writestr(info, data)
+        return buffer.getvalue()
+
+    def _question(self) -> str:
+        from app.services.llm_client import FAKE_VALUES
+
+        question = self.rng.choice(QUESTIONS).format(**{
+            "law": self.rng.choice(FAKE_VALUES["governing_law"]),
+            "agreement_type": self.rng.choice(FAKE_VALUES["agreement_type"]),
+            "industry": self.rng.choice(FAKE_VALUES["industry"]),
+            "geography": self.rng.choice(FAKE_VALUES["geography"]),
+        })
+        if self.unique_queries:
+            question += f" (ref {uuid.uuid4().hex[:8]})"
+        return question
+
+
+def build_docx_template(rng: random.Random) -> bytes:
+    from docx import Document as DocxDocument
+    from benchmarks.content_compression import build_document
+
+    doc = DocxDocument()
+    doc.add_paragraph(UNIQUE_MARKER)
+    for line in build_document(rng).splitlines()[:60]:
+        doc.add_paragraph(line)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+
+def seed_database(count: int, rng: random.Random):
+    """Insert synthetic documents into ./legal_documents.db of the current directory"""
+    from app.models.database import SessionLocal, init_db
+    from app.models.document import Document
+    from app.services.llm_client import FAKE_VALUES
+    from benchmarks.content_compression import build_document
+    import app.services  # noqa: F401 - registers the ingest handlers (rollups, search, sections)
+
+    init_db()
+    now = datetime.now(timezone.utc)
+    with SessionLocal() as db:
+        for start in range(0, count, 200):
+            for i in range(start, min(start + 200, count)):
+                db.add(Document(
+                    filename=f"seed-{i}.docx",
+                    file_type="docx",
+                    file_size=rng.randint(10_000, 500_000),
+                    content=build_document(rng),
+                    uploaded_at=now - timedelta(days=rng.randint(0, 720)),
+                    **{field: rng.choice(values) for field, values in FAKE_VALUES.items()}
+                ))
+            db.commit()
+
+
+async def drive(client: httpx.AsyncClient, mix: Dict[str, int], concurrency: int, duration: float, warmup: float,
+                docx_template: bytes, unique_queries: bool, seed: int, on_measure_start=None) -> Dict:
+    """Run ``concurrency`` virtual users for warmup + duration seconds; only the latter is measured"""
+    latencies: Dict[str, List[float]] = defaultdict(list)
+    errors: Dict[str, int] = defaultdict(int)
+    statuses: Dict[int, int] = defaultdict(int)
+    loop = asyncio.get_running_loop()
+    measure_from = loop.time() + warmup
+    stop_at = measure_from + duration
+
+    async def mark_measure_start():
+        await asyncio.sleep(warmup)
+        if on_measure_start:
+            on_measure_start()
+
+    async def user(index: int):
+        workload = Workload(mix, random.Random(seed + index), docx_template, unique_queries)
+        while loop.time() < stop_at:
+            operation = workload.next_operation()
+            started = loop.time()
+            try:
+                response = await workload.run(client, operation)
+                failed = response.status_code >= 400
+                status = response.status_code
+            except httpx.HTTPError:
+                failed, status = True, 0
+            if started >= measure_from:
+                latencies[operation].append(loop.time() - started)
+                statuses[status] += 1
+                if failed:
+                    errors[operation] += 1
+
+    await asyncio.gather(mark_measure_start(), *(user(i) for i in range(concurrency)))
+    return {"latencies": latencies, "errors": errors, "statuses": dict(statuses), "duration": duration}
+
+
+def report(workers: Optional[int], concurrency: int, result: Dict, probes: Optional[Dict]) -> Dict:
+    latencies = result["latencies"]
+    all_latencies = [value for values in latencies.values() for value in values]
+    total = len(all_latencies)
+    row = {
+        "workers": workers,
+        "concurrency": concurrency,
+        "requests": total,
+        "throughput_rps": round(total / result["duration"], 2),
+        "errors": sum(result["errors"].values()),
+        "statuses": result["statuses"],
+        "latency_ms": summarize(all_latencies),
+        "operations": {
+            operation: {**summarize(values), "errors": result["errors"].get(operation, 0)}
+            for operation, values in sorted(latencies.items())
+        },
+    }
+    if probes is not None:
+        row["event_loop_lag_ms"] = summarize(probes["loop_lag"])
+        row["db_write_ms"] = summarize(probes["db_write"])
+        row["db_locked_errors"] = probes["db_locked"]
+    return row
+
+
+def print_row(row: Dict):
+    label = f"workers={row['workers']} " if row["workers"] else ""
+    latency = row["latency_ms"]
+    print(
+        f"\n{label}concurrency={row['concurrency']}: {row['throughput_rps']} req/s, "
+        f"{row['requests']} requests, {row['errors']} errors, "
+        f"p50 {latency['p50']} ms, p95 {latency['p95']} ms, p99 {latency['p99']} ms"
+    )
+    print(f"  {'operation':<12}{'count':>8}{'errors':>8}{'p50 ms':>10}{'p95 ms':>10}{'p99 ms':>10}{'max ms':>10}")
+    for operation, stats in row["operations"].items():
+        print(
+            f"  {operation:<12}{stats['count']:>8}{stats['errors']:>8}"
+            f"{stats['p50']:>10}{stats['p95']:>10}{stats['p99']:>10}{stats['max']:>10}"
+        )
+    if "event_loop_lag_ms" in row:
+        lag, db = row["event_loop_lag_ms"], row["db_write_ms"]
+        print(f"  event-loop lag: p50 {lag['p50']} ms, p99 {lag['p99']} ms, max {lag['max']} ms")
+        print(
+            f"  db write statements: {db['count']}, p50 {db['p50']} ms, p99 {db['p99']} ms, "
+            f"max {db['max']} ms, locked errors {row['db_locked_errors']}"
+        )
+
+
+def run_in_process(args, mix, docx_template) -> List[Dict]:
+    import main
+    from app.models.database import engine
+    from benchmarks.load_metrics import DBWaitTimer, LoopLagMonitor
+
+    rows = []
+    for concurrency in args.concurrency:
+        monitor = LoopLagMonitor()
+        db_timer = DBWaitTimer(engine)
+
+        def start_probes():
+            monitor.reset()
+            db_timer.reset()
+
+        async def run():
+            monitor.start()
+            transport = httpx.ASGITransport(app=main.app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest", timeout=None) as client:
+                try:
+                    return await drive(client, mix, concurrency, args.duration, args.warmup, docx_template,
+                                       args.unique_queries, args.seed, on_measure_start=start_probes)
+                finally:
+                    monitor.stop()
+
+        result = asyncio.run(run())
+        db_timer.remove()
+        row = report(None, concurrency, result, {
+            "loop_lag": list(monitor.samples), "db_write": list(db_timer.samples), "db_locked": db_timer.locked_errors,
+        })
+        print_row(row)
+        rows.append(row)
+    return rows
+
+
+def run_against_url(args, mix, docx_template) -> List[Dict]:
+    rows = []
+    for concurrency in args.concurrency:
+        result = asyncio.run(_drive_url(args.url, args, mix, concurrency, docx_template))
+        row = report(None, concurrency, result, None)
+        print_row(row)
+        rows.append(row)
+    return rows
+
+
+async def _drive_url(url: str, args, mix, concurrency: int, docx_template: bytes) -> Dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=url, timeout=None, limits=limits) as client:
+        return await drive(client, mix, concurrency, args.duration, args.warmup, docx_template,
+                           args.unique_queries, args.seed)
+
+
+def run_servers(args, mix, docx_template, seed_dir: str, env: Dict[str, str]) -> List[Dict]:
+    rows = []
+    for workers in args.workers:
+        for concurrency in args.concurrency:
+            with tempfile.TemporaryDirectory(prefix="loadtest-run-") as run_dir:
+                shutil.copy(os.path.join(seed_dir, "legal_documents.db"), run_dir)
+                metrics_dir = os.path.join(run_dir, "metrics")
+                port = _free_port()
+                server = subprocess.Popen(
+                    [sys.executable, "-m", "uvicorn", "benchmarks.load_server:app", "--host", "127.0.0.1",
+                     "--port", str(port), "--workers", str(workers), "--log-level", "warning"],
+                    cwd=run_dir,
+                    env={**env, "LOADTEST_METRICS_DIR": metrics_dir, "CACHE_DB_PATH": os.path.join(run_dir, "cache.db")},
+                )
+                try:
+                    url = f"http://127.0.0.1:{port}"
+                    _wait_until_up(url, server)
+                    result = asyncio.run(_drive_url(url, args, mix, concurrency, docx_template))
+                finally:
+                    server.send_signal(signal.SIGINT)
+                    try:
+                        server.wait(timeout=30)
+                    except subprocess.TimeoutExpired:
+                        server.kill()
+
+                probes = []
+                for path in glob.glob(os.path.join(metrics_dir, "*.json")):
+                    with open(path) as f:
+                        probes.append(json.load(f))
+                row = report(workers, concurrency, result, merge(probes) if probes else None)
+                print_row(row)
+                rows.append(row)
+    return rows
+
+
+def _free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def _wait_until_up(url: str, server: subprocess.Popen, timeout: float = 60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if server.poll() is not None:
+            raise RuntimeError(f"Server exited with code {server.returncode}")
+        try:
+            if httpx.get(f"{url}/health", timeout=1).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.2)
+    raise RuntimeError("Server did not start in time")
+
+
+def parse_mix(value: str) -> Dict[str, int]:
+    mix = {}
+    for part in value.split(","):
+        name, _, weight = part.partition("=")
+        if name.strip() not in PROFILES["mixed"]:
+            raise argparse.ArgumentTypeError(f"Unknown operation: {name}")
+        mix[name.strip()] = int(weight or 1)
+    return mix
+
+
+def parse_counts(value: str) -> List[int]:
+    return [int(part) for part in value.split(",") if part.strip()]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--profile", choices=sorted(PROFILES), default="mixed")
+    parser.add_argument("--mix", type=parse_mix, help="Operation weights, e.g. upload=1,query=3,dashboard=5,documents=1")
+    parser.add_argument("--concurrency", type=parse_counts, default=[1, 8, 32], help="Virtual users, comma-separated sweep")
+    parser.add_argument("--duration", type=float, default=20, help="Measured seconds per run")
+    parser.add_argument("--warmup", type=float, default=3, help="Unmeasured seconds before each run")
+    parser.add_argument("--seed-documents", type=int, default=500)
+    parser.add_argument("--llm-latency-ms", type=float, default=800, help="Base latency of the fake LLM")
+    parser.add_argument("--llm-jitter-ms", type=float, default=400, help="Uniform extra latency of the fake LLM")
+    parser.add_argument("--unique-queries", action="store_true", help="Make every question miss the question cache")
+    parser.add_argument("--server", action="store_true", help="Run the app under uvicorn on localhost")
+    parser.add_argument("--workers", type=parse_counts, default=[1], help="uvicorn workers (with --server), comma-separated sweep")
+    parser.add_argument("--url", help="Drive an already running server instead")
+    parser.add_argument("--seed", type=int, default=42)
+    parser.add_argument("--json", help="Also write the results to this file")
+    args = parser.parse_args()
+
+    mix = args.mix or PROFILES[args.profile]
+    rng = random.Random(args.seed)
+    env = {
+        **os.environ,
+        "LLM_BACKEND": "fake",
+        "FAKE_LLM_LATENCY_MS": str(args.llm_latency_ms),
+        "FAKE_LLM_JITTER_MS": str(args.llm_jitter_ms),
+        "PYTHONPATH": os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")])),
+    }
+    # The app reads its configuration on import and keeps its databases in the working directory
+    os.environ.update(env)
+    output = os.path.abspath(args.json) if args.json else None
+    print(f"Workload {mix}, fake LLM {args.llm_latency_ms:.0f}+{args.llm_jitter_ms:.0f} ms")
+
+    with tempfile.TemporaryDirectory(prefix="loadtest-") as workdir:
+        # Before anything imports the app: its database path is resolved against the cwd on import
+        os.chdir(workdir)
+        try:
+            docx_template = build_docx_template(rng)
+            if args.url:
+                rows = run_against_url(args, mix, docx_template)
+            else:
+                print(f"Seeding {args.seed_documents} documents...")
+                seed_database(args.seed_documents, rng)
+                if args.server:
+                    rows = run_servers(args, mix, docx_template, workdir, env)
+                else:
+                    # Runs share the database, so later ones start with the earlier uploads
+                    rows = run_in_process(args, mix, docx_template)
+        finally:
+            os.chdir(REPO_ROOT)
+
+    if output:
+        with open(output, "w") as f:
+            json.dump({"mix": mix, "llm_latency_ms": args.llm_latency_ms, "llm_jitter_ms": args.llm_jitter_ms, "runs": rows}, f, indent=2)
+        print(f"\nResults written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Bulk import a folder or ZIP archive of legal documents
+
+Runs text and metadata extraction in a process pool, without the HTTP upload path.
+Progress is checkpointed to a manifest, so re-running the same command after an
+interruption resumes where it stopped; files already in the database are skipped
+by SHA-256 digest.
+
+Usage:
+    python bulk_import.py /path/to/archive.zip
+    python bulk_import.py /path/to/folder --workers 8 --batch-size 100
+    python bulk_import.py /path/to/archive.zip --tenant acme
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.models.database import DEFAULT_TENANT, init_db, tenant_session, validate_tenant_id
+from app.services.tenant_move import stranded_documents
+from app.services.import_service import BulkImporter, DEFAULT_BATCH_SIZE
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("source", help="Folder or ZIP archive to import")
+    parser.add_argument("--manifest", help="Checkpoint file (default: <source>.import-manifest.jsonl)")
+    parser.add_argument("--workers", type=int, help="Extraction processes (default: CPU count)")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE, help="Documents per commit")
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help=f"Tenant to import into (default: {DEFAULT_TENANT})")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    if not os.path.exists(args.source):
+        print(f"Error: {args.source} does not exist", file=sys.stderr)
+        sys.exit(2)
+    try:
+        validate_tenant_id(args.tenant)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    init_db()
+    stranded = stranded_documents(args.tenant)
+    if stranded:
+        print(
+            f"Warning: {stranded} documents of {args.tenant} are still in the shared database and "
+            f"they are not checked for duplicates until moved; run python move_tenant.py {args.tenant}",
+            file=sys.stderr
+        )
+    importer = BulkImporter(args.source, args.manifest, args.workers, args.batch_size, args.tenant)
+    
+    print(f"Importing {args.source} with {importer.workers} workers")
+    print(f"Manifest: {importer.manifest_path}")
+    
+    def report(record):
+        if record["status"] == "failed":
+            print(f"  ✗ {record['name']}: {record.get('error')}")
+    
+    stats = importer.run(lambda: tenant_session(args.tenant), progress=report)
+    
+    print(
+        f"\n✓ Imported {stats['imported']}, skipped {stats['duplicate']} duplicates and "
+        f"{stats['unsupported']} unsupported files, {stats['failed']} failed "
+        f"({stats['resumed']} already done in earlier runs)"
+    )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Compress the stored text of existing documents
+
+Rows written before content compression hold plain text; they stay readable,
+but this rewrites them with the configured codec and reclaims the space. It
+covers the shared database and that of every tenant in DEDICATED_TENANTS, and
+a trained dictionary is sampled from all of them.
+
+Usage:
+    python compress_content.py                      # zlib, plain-text rows only
+    python compress_content.py --codec zstd --train-dict content.zdict --recompress
+        (then run the server with CONTENT_COMPRESSION=zstd CONTENT_ZSTD_DICT=content.zdict)
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from sqlalchemy import text
+
+from app.models import compression
+from app.models.database import all_engines, init_db
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--codec", choices=["zlib", "zstd", "none"], default=compression.CONTENT_COMPRESSION)
+    parser.add_argument("--train-dict", metavar="PATH", help="Train a zstd dictionary on the corpus and write it to PATH")
+    parser.add_argument("--recompress", action="store_true", help="Also rewrite rows already compressed with another codec")
+    parser.add_argument("--batch-size", type=int, default=200)
+    parser.add_argument("--no-vacuum", action="store_true", help="Skip VACUUM after rewriting")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    init_db()
+    engines = all_engines()
+    
+    if args.train_dict:
+        if args.codec != "zstd":
+            print("Error: --train-dict requires --codec zstd", file=sys.stderr)
+            sys.exit(2)
+        dict_id = compression.train_zstd_dictionary(engines, args.train_dict)
+        compression.use_zstd_dictionary(args.train_dict)
+        print(f"Trained zstd dictionary {dict_id} -> {args.train_dict}")
+    
+    for engine in engines:
+        converted = compression.compress_existing_content(
+            engine,
+            codec=args.codec,
+            recompress=args.recompress,
+            batch_size=args.batch_size
+        )
+        print(f"✓ Rewrote content of {converted} documents in {engine.url.database} with {args.codec}")
+        
+        if converted and not args.no_vacuum:
+            with engine.connect() as conn:
+                conn.execution_options(isolation_level="AUTOCOMMIT").execute(text("VACUUM"))
+            print(f"✓ Vacuumed {engine.url.database}")
+
+if __name__ == "__main__":
+    main()
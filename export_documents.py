@@ -0,0 +1,77 @@
+#!/usr/bin/env python3
+"""
+Export documents and their metadata for analytics
+
+Streams the documents table in batches, so memory use does not grow with the corpus.
+
+Usage:
+    python export_documents.py --format csv --output documents.csv
+    python export_documents.py --format jsonl --compression gzip --include-content -o documents.jsonl.gz
+    python export_documents.py --format parquet --fields id,filename,agreement_type -o documents.parquet
+    python export_documents.py --tenant acme -o acme.jsonl
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.models.database import DEFAULT_TENANT, init_db, tenant_session, validate_tenant_id
+from app.services.tenant_move import stranded_documents
+from app.services.export_service import ExportService, EXPORT_FIELDS, FORMATS, DEFAULT_BATCH_SIZE
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--format", choices=FORMATS, default="jsonl")
+    parser.add_argument("--fields", help=f"Comma-separated columns (default: {','.join(EXPORT_FIELDS)})")
+    parser.add_argument("--include-content", action="store_true", help="Include the extracted document text")
+    parser.add_argument("--compression", help="gzip for csv/jsonl; snappy, gzip or zstd for parquet; zstd or lz4 for arrow")
+    parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+    parser.add_argument("--tenant", default=DEFAULT_TENANT, help=f"Tenant to export (default: {DEFAULT_TENANT})")
+    parser.add_argument("-o", "--output", help="Output file (default: stdout)")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+    
+    export_service = ExportService()
+    try:
+        export_service.validate(args.format, args.compression)
+        export_service.resolve_fields(fields, args.include_content)
+        validate_tenant_id(args.tenant)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    init_db()
+    stranded = stranded_documents(args.tenant)
+    if stranded:
+        print(
+            f"Warning: {stranded} documents of {args.tenant} are still in the shared database and "
+            f"they are not exported; run python move_tenant.py {args.tenant}",
+            file=sys.stderr
+        )
+    db = tenant_session(args.tenant)
+    output = open(args.output, "wb") if args.output else sys.stdout.buffer
+    
+    try:
+        for chunk in export_service.iter_export(
+            db,
+            format=args.format,
+            fields=fields,
+            include_content=args.include_content,
+            compression=args.compression,
+            batch_size=args.batch_size,
+            tenant_id=args.tenant
+        ):
+            output.write(chunk)
+    finally:
+        if args.output:
+            output.close()
+        db.close()
+
+if __name__ == "__main__":
+    main()
@@ -1,6 +1,8 @@
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 from app.api.routes import router
+from app.api.middleware import RequestSizeLimitMiddleware
+from app.services.upload_spooler import MAX_REQUEST_SIZE
 import logging
 
 # Configure logging
@@ -25,6 +27,9 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Refuse oversized request bodies before they are spooled
+app.add_middleware(RequestSizeLimitMiddleware, max_size=MAX_REQUEST_SIZE)
+
 # Include API routes
 app.include_router(router, prefix="/api/v1")
 
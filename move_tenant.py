@@ -0,0 +1,47 @@
+#!/usr/bin/env python3
+"""
+Move a tenant's documents from the shared database to its dedicated one
+
+A tenant added to DEDICATED_TENANTS is served from TENANT_DB_DIR/<tenant>.db;
+documents it already had stay in the shared database, invisible to it, until
+they are moved. Run this with the new DEDICATED_TENANTS setting, ideally before
+restarting the server with it. It is safe to run again after an interruption.
+
+Usage:
+    DEDICATED_TENANTS=acme python move_tenant.py acme
+"""
+
+import argparse
+import os
+import sys
+
+# Add the app directory to the Python path
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), 'app'))
+
+from app.models.database import init_db
+from app.services.tenant_move import move_to_dedicated, stranded_documents
+
+def parse_args():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("tenant", help="Tenant listed in DEDICATED_TENANTS")
+    parser.add_argument("--batch-size", type=int, help="Documents per commit")
+    return parser.parse_args()
+
+def main():
+    args = parse_args()
+    init_db()
+    
+    try:
+        pending = stranded_documents(args.tenant)
+        stats = move_to_dedicated(args.tenant, args.batch_size)
+    except ValueError as e:
+        print(f"Error: {e}", file=sys.stderr)
+        sys.exit(2)
+    
+    print(
+        f"✓ Moved {stats['moved']} of {pending} documents of {args.tenant} to its dedicated database "
+        f"({stats['skipped']} were already there)"
+    )
+
+if __name__ == "__main__":
+    main()
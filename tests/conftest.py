@@ -0,0 +1,42 @@
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+from app.models import database
+from app.models.database import Base
+from app.services.cache import SharedCache
+
+@pytest.fixture
+def cache(tmp_path, monkeypatch):
+    """Shared cache in the test's directory, invalidated by document commits"""
+    cache = SharedCache(str(tmp_path / "cache.db"))
+    monkeypatch.setattr("app.services.change_tracker.get_cache", lambda: cache)
+    return cache
+
+@pytest.fixture
+def engine(cache):
+    """In-memory database with every table, shared by all sessions of the test"""
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    Base.metadata.create_all(bind=engine)
+    yield engine
+    engine.dispose()
+
+@pytest.fixture
+def session_factory(engine):
+    return sessionmaker(bind=engine)
+
+@pytest.fixture
+def db(session_factory):
+    session = session_factory()
+    yield session
+    session.close()
+
+@pytest.fixture
+def dedicated(tmp_path, monkeypatch, cache):
+    """Tenant acme in its own database file under the returned directory"""
+    monkeypatch.setattr(database, "DEDICATED_TENANTS", frozenset({"acme"}))
+    monkeypatch.setattr(database, "TENANT_DB_DIR", str(tmp_path / "tenants"))
+    monkeypatch.setattr(database, "_tenant_engines", {})
+    yield tmp_path / "tenants"
+    for tenant_engine in database._tenant_engines.values():
+        tenant_engine.dispose()
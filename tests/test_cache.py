@@ -0,0 +1,96 @@
+import time
+import pytest
+from app.services.cache import SharedCache
+
+@pytest.fixture
+def cache_path(tmp_path):
+    return str(tmp_path / "cache.db")
+
+class TestSharedCache:
+    def test_set_and_get(self, cache_path):
+        cache = SharedCache(cache_path)
+        cache.set("metadata", "abc", {"agreement_type": "NDA"})
+        
+        assert cache.get("metadata", "abc") == {"agreement_type": "NDA"}
+        assert cache.get("metadata", "missing") is None
+    
+    def test_entries_shared_between_workers(self, cache_path):
+        worker_a = SharedCache(cache_path)
+        worker_b = SharedCache(cache_path)
+        
+        worker_a.set("question", "show me all ndas", {"filter": "agreement_type", "value": "NDA"})
+        
+        assert worker_b.get("question", "show me all ndas") == {"filter": "agreement_type", "value": "NDA"}
+    
+    def test_invalidation_reaches_other_workers(self, cache_path):
+        worker_a = SharedCache(cache_path)
+        worker_b = SharedCache(cache_path)
+        worker_a.set("dashboard", "all", {"industries": {"Technology": 1}})
+        assert worker_a.get("dashboard", "all") is not None
+        
+        worker_b.invalidate("dashboard")
+        
+        # Worker A still holds the entry in its local LRU but must not serve it
+        assert worker_a.get("dashboard", "all") is None
+        assert worker_a.version("dashboard") == 1
+    
+    def test_invalidation_is_per_namespace(self, cache_path):
+        cache = SharedCache(cache_path)
+        cache.set("dashboard", "all", 1)
+        cache.set("metadata", "abc", 2)
+        
+        cache.invalidate("dashboard")
+        
+        assert cache.get("dashboard", "all") is None
+        assert cache.get("metadata", "abc") == 2
+    
+    def test_ttl_expiry(self, cache_path):
+        cache = SharedCache(cache_path)
+        cache.set("question", "q", "v", ttl=0.01)
+        time.sleep(0.02)
+        
+        assert cache.get("question", "q") is None
+    
+    def test_local_lru_is_bounded(self, cache_path):
+        cache = SharedCache(cache_path, local_size=2)
+        for i in range(5):
+            cache.set("metadata", str(i), i)
+        
+        assert len(cache._local) == 2
+        # Evicted locally but still served from the shared store
+        assert cache.get("metadata", "0") == 0
+    
+    def test_shared_store_is_bounded(self, cache_path, monkeypatch):
+        monkeypatch.setattr("app.services.cache.EVICTION_INTERVAL", 1)
+        cache = SharedCache(cache_path, max_entries=3)
+        for i in range(10):
+            cache.set("metadata", str(i), i)
+        
+        count = cache._conn.execute("SELECT COUNT(*) FROM cache_entries").fetchone()[0]
+        assert count == 3
+    
+    def test_get_or_set_calls_factory_once(self, cache_path):
+        cache = SharedCache(cache_path)
+        calls = []
+        
+        def factory():
+            calls.append(1)
+            return {"value": 42}
+        
+        assert cache.get_or_set("question", "q", factory) == {"value": 42}
+        assert cache.get_or_set("question", "q", factory) == {"value": 42}
+        assert len(calls) == 1
+    
+    def test_value_computed_across_invalidation_not_cached(self, cache_path):
+        worker_a = SharedCache(cache_path)
+        worker_b = SharedCache(cache_path)
+        
+        def stale_factory():
+            # Another worker commits a change while this result is being computed
+            worker_b.invalidate("dashboard")
+            return {"count": 1}
+        
+        assert worker_a.get_or_set("dashboard", "counts", stale_factory) == {"count": 1}
+        assert worker_a.get("dashboard", "counts") is None
+        assert worker_b.get("dashboard", "counts") is None
+        assert worker_a.get_or_set("dashboard", "counts", lambda: {"count": 2}) == {"count": 2}
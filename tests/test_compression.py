@@ -0,0 +1,69 @@
+import pytest
+from sqlalchemy import inspect, text
+from sqlalchemy.orm import sessionmaker
+from app.models import compression
+from app.models.compression import compress_existing_content, compress_text, decompress_text
+from app.models.document import Document
+
+CONTENT = "This Agreement shall be governed by the laws of England and Wales. " * 50
+
+class TestCompression:
+    def test_zlib_round_trip(self):
+        stored = compress_text(CONTENT, "zlib")
+        
+        assert len(stored) < len(CONTENT) / 10
+        assert decompress_text(stored) == CONTENT
+    
+    def test_short_text_stored_raw(self):
+        assert compress_text("NDA", "zlib") == b"\x00NDA"
+        assert decompress_text(b"\x00NDA") == "NDA"
+    
+    def test_legacy_plain_text_passes_through(self):
+        assert decompress_text(CONTENT) == CONTENT
+    
+    def test_zstd_falls_back_to_zlib_without_zstandard(self, monkeypatch):
+        monkeypatch.setattr(compression, "zstd_available", lambda: False)
+        
+        stored = compress_text(CONTENT, "zstd")
+        
+        assert stored[:1] == compression.ZLIB
+        assert decompress_text(stored) == CONTENT
+    
+    def test_zstd_with_dictionary(self, engine, tmp_path):
+        pytest.importorskip("zstandard")
+        with engine.begin() as conn:
+            for i in range(50):
+                conn.execute(text("INSERT INTO documents (content) VALUES (:content)"), {"content": f"{i} {CONTENT}"})
+        
+        dict_path = str(tmp_path / "content.zdict")
+        compression.train_zstd_dictionary(engine, dict_path, dict_size=4096)
+        compression.use_zstd_dictionary(dict_path)
+        try:
+            stored = compress_text(CONTENT, "zstd")
+            assert decompress_text(stored) == CONTENT
+        finally:
+            compression.use_zstd_dictionary(None)
+    
+    def test_column_is_transparent_and_deferred(self, engine):
+        db = sessionmaker(bind=engine)()
+        db.add(Document(filename="a.pdf", content=CONTENT))
+        db.commit()
+        
+        raw = db.execute(text("SELECT content FROM documents")).scalar()
+        assert isinstance(raw, bytes) and len(raw) < len(CONTENT)
+        
+        db.expunge_all()
+        document = db.query(Document).first()
+        assert "content" in inspect(document).unloaded
+        assert document.content == CONTENT
+    
+    def test_migrates_plain_text_rows(self, engine):
+        with engine.begin() as conn:
+            conn.execute(text("INSERT INTO documents (filename, content) VALUES ('old.pdf', :content)"), {"content": CONTENT})
+        
+        assert compress_existing_content(engine, codec="zlib") == 1
+        assert compress_existing_content(engine, codec="zlib") == 0
+        
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT typeof(content) FROM documents")).scalar() == "blob"
+        assert sessionmaker(bind=engine)().query(Document).first().content == CONTENT
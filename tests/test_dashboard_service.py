@@ -0,0 +1,89 @@
+from app.models.document import Document
+from app.services.dashboard_service import DashboardService
+
+class TestDashboardService:
+    def test_aggregates_facets(self, cache, db):
+        db.add_all([
+            Document(filename="a.pdf", agreement_type="NDA", governing_law="UAE", industry="Technology", geography="Middle East"),
+            Document(filename="b.pdf", agreement_type="NDA", governing_law="UK", industry=None, geography="Europe"),
+            Document(filename="c.pdf", agreement_type="MSA", governing_law="UK", industry="Oil & Gas", geography=None),
+        ])
+        db.commit()
+        
+        _, data = DashboardService(cache).get_dashboard(db)
+        
+        assert data["agreement_types"] == {"NDA": 2, "MSA": 1}
+        assert data["governing_laws"] == {"UAE": 1, "UK": 2}
+        assert data["industries"] == {"Technology": 1, "Oil & Gas": 1}
+        assert data["geographies"] == {"Middle East": 1, "Europe": 1}
+    
+    def test_commit_bumps_version_and_refreshes_counts(self, cache, db):
+        service = DashboardService(cache)
+        version, data = service.get_dashboard(db)
+        assert data["agreement_types"] == {}
+        
+        db.add(Document(filename="a.pdf", agreement_type="NDA"))
+        db.commit()
+        
+        new_version, data = service.get_dashboard(db)
+        assert new_version == version + 1
+        assert data["agreement_types"] == {"NDA": 1}
+    
+    def test_cached_between_commits(self, cache, db):
+        service = DashboardService(cache)
+        service.get_dashboard(db)
+        
+        # Bypasses the session events, so the cached counts are still served
+        db.execute(Document.__table__.insert().values(filename="x.pdf", agreement_type="NDA"))
+        
+        _, data = service.get_dashboard(db)
+        assert data["agreement_types"] == {}
+    
+    def test_rollback_does_not_bump_version(self, cache, db):
+        service = DashboardService(cache)
+        version = service.get_version()
+        
+        db.add(Document(filename="a.pdf", agreement_type="NDA"))
+        db.flush()
+        db.rollback()
+        
+        assert service.get_version() == version
+    
+    def test_tenants_counted_and_invalidated_separately(self, cache, db):
+        service = DashboardService(cache)
+        db.add_all([
+            Document(tenant_id="acme", filename="a.pdf", agreement_type="NDA"),
+            Document(tenant_id="globex", filename="b.pdf", agreement_type="MSA"),
+        ])
+        db.commit()
+        acme_version, data = service.get_dashboard(db, "acme")
+        assert data["agreement_types"] == {"NDA": 1}
+        
+        db.add(Document(tenant_id="globex", filename="c.pdf", agreement_type="MSA"))
+        db.commit()
+        
+        assert service.get_dashboard(db, "acme") == (acme_version, data)
+        assert service.get_dashboard(db, "globex")[1]["agreement_types"] == {"MSA": 2}
+        assert service.get_dashboard(db)[1]["agreement_types"] == {}
+    
+    def test_version_matches_data_across_concurrent_commit(self, cache, db):
+        service = DashboardService(cache)
+        service.get_dashboard(db)
+        db.add(Document(filename="a.pdf", agreement_type="NDA"))
+        db.commit()
+        aggregate = service._aggregate
+        
+        def aggregate_then_commit(db, tenant_id):
+            data = aggregate(db, tenant_id)
+            # Lands after the counts were read, before they are cached
+            db.add(Document(filename="b.pdf", agreement_type="MSA"))
+            db.commit()
+            return data
+        
+        service._aggregate = aggregate_then_commit
+        version, data = service.get_dashboard(db)
+        service._aggregate = aggregate
+        
+        assert data["agreement_types"] == {"NDA": 1}
+        assert version != service.get_version()
+        assert service.get_dashboard(db) == (service.get_version(), {**data, "agreement_types": {"NDA": 1, "MSA": 1}})
@@ -0,0 +1,100 @@
+import pytest
+from sqlalchemy import create_engine, func, inspect, text
+from app.models import database
+from app.models.database import SessionLocal, get_engine, init_db, tenant_session, validate_tenant_id
+from app.models.derived import DerivedBuild
+from app.models.document import Document
+from app.models.rollup import DocumentRollup
+from app.services.search_service import SearchService
+
+class TestDatabase:
+    def test_validate_tenant_id(self):
+        assert validate_tenant_id("acme-legal_2") == "acme-legal_2"
+        for tenant_id in ["", "../etc", "a b", "x" * 65]:
+            with pytest.raises(ValueError):
+                validate_tenant_id(tenant_id)
+    
+    def test_dedicated_tenant_gets_own_file(self, dedicated):
+        assert get_engine("globex") is database.engine
+        assert get_engine(None) is database.engine
+        
+        with tenant_session("acme") as db:
+            db.add(Document(tenant_id="acme", filename="a.pdf", content="Confidential terms."))
+            db.commit()
+        
+        assert get_engine("acme") is get_engine("acme")
+        assert (dedicated / "acme.db").exists()
+        with get_engine("acme").connect() as conn:
+            assert conn.execute(text("SELECT tenant_id, filename FROM documents")).all() == [("acme", "a.pdf")]
+    
+    def test_migrates_databases_without_tenants(self, tmp_path, cache):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE documents (id INTEGER PRIMARY KEY, filename VARCHAR, agreement_type VARCHAR)"))
+            conn.execute(text("CREATE INDEX ix_documents_agreement_type ON documents (agreement_type)"))
+            conn.execute(text("CREATE INDEX reporting_filename ON documents (filename)"))
+            conn.execute(text("INSERT INTO documents (filename, agreement_type) VALUES ('a.pdf', 'NDA')"))
+            conn.execute(text("CREATE VIRTUAL TABLE documents_fts USING fts5(content, content='')"))
+            conn.execute(text("INSERT INTO documents_fts (rowid, content) VALUES (1, 'Confidential terms.')"))
+            conn.execute(text(
+                "CREATE TABLE document_rollups (granularity VARCHAR, facet VARCHAR, bucket DATE, value VARCHAR, "
+                "count INTEGER, PRIMARY KEY (granularity, facet, bucket, value))"
+            ))
+        
+        init_db(engine)
+        
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT tenant_id FROM documents")).scalar() == "default"
+        inspector = inspect(engine)
+        assert inspector.get_pk_constraint("document_rollups")["constrained_columns"][0] == "tenant_id"
+        indexes = {index["name"] for index in inspector.get_indexes("documents")}
+        assert "ix_documents_tenant_agreement_type" in indexes
+        # Superseded model indexes are dropped, others kept
+        assert "ix_documents_agreement_type" not in indexes
+        assert "reporting_filename" in indexes
+        # The search index is recreated with its tenant column; the old row had no content to index
+        assert [column["name"] for column in inspector.get_columns("documents_fts")] == ["content", "tenant"]
+        with engine.connect() as conn:
+            assert conn.execute(text("SELECT COUNT(*) FROM documents_fts")).scalar() == 0
+        engine.dispose()
+    
+    def test_derived_tables_built_by_whichever_entry_point_runs_first(self, tmp_path, cache):
+        engine = create_engine(f"sqlite:///{tmp_path / 'old.db'}")
+        with engine.begin() as conn:
+            conn.execute(text("CREATE TABLE documents (id INTEGER PRIMARY KEY, filename VARCHAR, content TEXT)"))
+            for name in ["a.pdf", "b.pdf", "c.pdf"]:
+                conn.execute(text("INSERT INTO documents (filename, content) VALUES (:name, 'Confidential terms.')"), {"name": name})
+        
+        # A CLI opens the database and adds a document before the server ever starts
+        init_db(engine)
+        with SessionLocal(bind=engine) as db:
+            db.add(Document(filename="d.pdf", content="Confidential terms."))
+            db.commit()
+        init_db(engine)
+        
+        with SessionLocal(bind=engine) as db:
+            total = db.query(func.sum(DocumentRollup.count)).filter_by(granularity="month", facet="total").scalar()
+            found = SearchService().search(db, ["confidential"])
+            built = {build.name for build in db.query(DerivedBuild)}
+        assert total == 4
+        assert sorted(r["filename"] for r in found) == ["a.pdf", "b.pdf", "c.pdf", "d.pdf"]
+        assert built == {"document_rollups", "documents_fts", "document_sections"}
+        engine.dispose()
+    
+    def test_recreated_derived_table_is_rebuilt(self, tmp_path, cache):
+        engine = create_engine(f"sqlite:///{tmp_path / 'db.db'}")
+        init_db(engine)
+        with SessionLocal(bind=engine) as db:
+            db.add(Document(filename="a.pdf", content="Confidential terms."))
+            db.commit()
+        # An index from an older release, holding other documents' text
+        with engine.begin() as conn:
+            conn.execute(text("DROP TABLE documents_fts"))
+            conn.execute(text("CREATE VIRTUAL TABLE documents_fts USING fts5(content, content='')"))
+            conn.execute(text("INSERT INTO documents_fts (rowid, content) VALUES (99, 'Stale text.')"))
+        
+        init_db(engine)
+        
+        with SessionLocal(bind=engine) as db:
+            assert [r["filename"] for r in SearchService().search(db, ["confidential"])] == ["a.pdf"]
+        engine.dispose()
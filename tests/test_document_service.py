@@ -0,0 +1,167 @@
+from datetime import datetime, timezone
+import io
+import os
+import pytest
+from fastapi import UploadFile
+from app.models.document import Document
+from app.models.rollup import DocumentRollup
+from app.models.section import DocumentSection
+from app.services.cache import DOCUMENTS_NAMESPACE, documents_namespace
+from app.services.change_tracker import document_id, on_flush, flush_handlers
+from app.services.document_service import DocumentService
+from app.services.rollup_service import RollupService
+from app.services.search_service import SearchService
+
+CONTENT = "1. Term\nThis Agreement lasts two years.\n2. Confidentiality\nConfidential information must be protected."
+UPLOADED = datetime(2024, 1, 5, 12, 0, tzinfo=timezone.utc)
+
+def add_document(db, filename, agreement_type="NDA", content=CONTENT, tenant_id="default"):
+    document = Document(
+        tenant_id=tenant_id, filename=filename, agreement_type=agreement_type, content=content, uploaded_at=UPLOADED
+    )
+    db.add(document)
+    db.commit()
+    return document
+
+class TestDocumentService:
+    @pytest.fixture(autouse=True)
+    def setup_service(self, cache, monkeypatch):
+        monkeypatch.setenv("OPENROUTER_API_KEY", "test-key")
+        monkeypatch.setattr("app.services.metadata_extractor.get_cache", lambda: cache)
+        self.service = DocumentService()
+        self.rollups = RollupService()
+        self.search = SearchService()
+    
+    def test_delete_retracts_derived_data(self, db):
+        first = add_document(db, "a.pdf")
+        add_document(db, "b.pdf", content="Termination for convenience on notice.")
+        
+        assert self.service.delete_document(first.id, db)
+        
+        assert self.rollups.get_timeseries(db, "month", "agreement_type")["series"] == {"NDA": [1]}
+        assert self.search.search(db, ["confidential"]) == []
+        assert db.query(DocumentSection).filter(DocumentSection.document_id == first.id).count() == 0
+        assert not self.service.delete_document(first.id, db)
+    
+    def test_update_moves_rollup_counts(self, db):
+        document = add_document(db, "a.pdf")
+        
+        updated = self.service.update_document(document.id, {"agreement_type": "MSA", "filename": "b.pdf"}, db)
+        
+        assert updated.filename == "b.pdf"
+        series = self.rollups.get_timeseries(db, "month", "agreement_type")["series"]
+        assert series == {"MSA": [1]}
+        assert [r["agreement_type"] for r in self.search.search(db, ["confidential"])] == ["MSA"]
+    
+    def test_content_edit_reindexes_and_resegments(self, db):
+        document = add_document(db, "a.pdf")
+        
+        document.content = "1. Payment\nInvoices are due in thirty days."
+        db.commit()
+        
+        assert self.search.search(db, ["confidential"]) == []
+        assert [r["id"] for r in self.search.search(db, ["invoices"])] == [document.id]
+        titles = [s.title for s in db.query(DocumentSection).filter(DocumentSection.document_id == document.id)]
+        assert titles == ["Payment"]
+    
+    def test_update_rejects_other_fields(self, db):
+        document = add_document(db, "a.pdf")
+        
+        with pytest.raises(ValueError):
+            self.service.update_document(document.id, {"content": "replaced"}, db)
+        assert self.service.update_document(document.id + 1, {"filename": "b.pdf"}, db) is None
+    
+    def test_bulk_delete_by_filter(self, db, monkeypatch):
+        monkeypatch.setattr("app.models.database.SQL_BATCH_SIZE", 2)
+        for i in range(5):
+            add_document(db, f"nda-{i}.pdf")
+        add_document(db, "msa.pdf", agreement_type="MSA")
+        
+        assert self.service.delete_documents({"agreement_type": "NDA"}, db) == 5
+        
+        assert [d.filename for d in db.query(Document)] == ["msa.pdf"]
+        assert self.rollups.get_timeseries(db, "month", "agreement_type")["series"] == {"MSA": [1]}
+        assert {r["filename"] for r in self.search.search(db, ["confidential"])} == {"msa.pdf"}
+        assert db.query(DocumentSection.document_id).distinct().count() == 1
+    
+    def test_bulk_delete_requires_known_filter(self, db):
+        add_document(db, "a.pdf")
+        
+        with pytest.raises(ValueError):
+            self.service.delete_documents({}, db)
+        with pytest.raises(ValueError):
+            self.service.delete_documents({"filename": "a.pdf"}, db)
+        assert db.query(Document).count() == 1
+    
+    def test_changes_carry_old_values(self, db):
+        seen = []
+        handler = on_flush(lambda session, changes: seen.append(
+            {document_id(doc): changes.old_values[document_id(doc)] for doc in changes.updated + changes.deleted}
+        ))
+        try:
+            document = add_document(db, "a.pdf")
+            key = document.id
+            document.governing_law = "UAE"
+            db.commit()
+            db.delete(document)
+            db.commit()
+        finally:
+            flush_handlers.remove(handler)
+        
+        assert seen[1] == {key: {"governing_law": None}}
+        assert seen[2][key]["agreement_type"] == "NDA"
+        assert seen[2][key]["governing_law"] == "UAE"
+        assert seen[2][key]["content"] == CONTENT
+    
+    def test_delete_invalidates_cache(self, db, cache):
+        document = add_document(db, "a.pdf")
+        version = cache.version(DOCUMENTS_NAMESPACE)
+        
+        self.service.delete_document(document.id, db)
+        
+        assert cache.version(DOCUMENTS_NAMESPACE) != version
+    
+    def test_rollback_keeps_derived_data(self, db):
+        document = add_document(db, "a.pdf")
+        
+        db.delete(document)
+        db.flush()
+        db.rollback()
+        
+        assert db.query(DocumentRollup).filter(DocumentRollup.count > 0).count() > 0
+        assert [r["filename"] for r in self.search.search(db, ["confidential"])] == ["a.pdf"]
+    
+    def test_documents_scoped_to_tenant(self, db, cache):
+        acme = add_document(db, "a.pdf", tenant_id="acme")
+        add_document(db, "b.pdf", tenant_id="globex")
+        globex_version = cache.version(documents_namespace("globex"))
+        
+        assert self.service.get_document_by_id(acme.id, db, "globex") is None
+        assert not self.service.delete_document(acme.id, db, "globex")
+        assert self.service.update_document(acme.id, {"filename": "x.pdf"}, db, "globex") is None
+        assert [d.filename for d in self.service.get_all_documents(db, "globex")] == ["b.pdf"]
+        
+        assert self.service.delete_documents({"agreement_type": "NDA"}, db, "acme") == 1
+        
+        assert [d.filename for d in db.query(Document)] == ["b.pdf"]
+        assert cache.version(documents_namespace("globex")) == globex_version
+    
+    @pytest.mark.asyncio
+    async def test_spooled_uploads_processed_after_files_close(self, db, monkeypatch):
+        monkeypatch.setattr(self.service, "extract_text", lambda stream, file_type: CONTENT)
+        monkeypatch.setattr(self.service.metadata_extractor, "extract_metadata", lambda text, filename: {})
+        files = [
+            UploadFile(file=io.BytesIO(b"%PDF-1.4\n" + b"x" * 100), filename="a.pdf"),
+            UploadFile(file=io.BytesIO(b"MZ\x90\x00"), filename="b.exe"),
+        ]
+        
+        spooled = await self.service.spool_uploads(files)
+        for file in files:
+            await file.close()
+        events = []
+        result = await self.service.process_spooled(spooled, db, lambda event, data: events.append(event))
+        
+        assert result == {"processed": 1, "failed": 1}
+        assert [d.filename for d in db.query(Document)] == ["a.pdf"]
+        assert events == ["received", "extracted", "metadata", "committed", "failed"]
+        assert not os.path.exists(spooled[0][1].path)
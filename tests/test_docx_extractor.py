@@ -0,0 +1,68 @@
+import io
+from docx import Document as DocxDocument
+from docx.shared import Inches
+from app.services.docx_extractor import extract_docx_text
+
+def save(doc):
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    buffer.seek(0)
+    return buffer
+
+class TestDocxExtractor:
+    def test_paragraphs_match_python_docx(self):
+        doc = DocxDocument()
+        doc.add_paragraph("This Non-Disclosure Agreement is made between the parties.")
+        doc.add_paragraph("It is governed by UAE law.")
+        
+        text = extract_docx_text(save(doc))
+        
+        assert text == "This Non-Disclosure Agreement is made between the parties.\nIt is governed by UAE law."
+    
+    def test_tables_in_reading_order(self):
+        doc = DocxDocument()
+        doc.add_paragraph("Parties")
+        table = doc.add_table(rows=2, cols=2)
+        table.cell(0, 0).text = "Supplier"
+        table.cell(0, 1).text = "Acme Ltd"
+        table.cell(1, 0).text = "Governing law"
+        table.cell(1, 1).text = "England and Wales"
+        doc.add_paragraph("Signatures")
+        
+        lines = extract_docx_text(save(doc)).split("\n")
+        
+        assert lines == ["Parties", "Supplier | Acme Ltd", "Governing law | England and Wales", "Signatures"]
+    
+    def test_headers_and_footers(self):
+        doc = DocxDocument()
+        doc.sections[0].header.paragraphs[0].text = "CONFIDENTIAL"
+        doc.sections[0].footer.paragraphs[0].text = "Governed by Qatar law"
+        doc.add_paragraph("Body text")
+        
+        text = extract_docx_text(save(doc))
+        
+        assert text == "CONFIDENTIAL\nBody text\nGoverned by Qatar law"
+    
+    def test_page_break_is_form_feed(self):
+        doc = DocxDocument()
+        doc.add_paragraph("Page one")
+        doc.add_page_break()
+        doc.add_paragraph("Page two")
+        
+        text = extract_docx_text(save(doc))
+        
+        assert "\f" in text
+        assert text.index("Page one") < text.index("\f") < text.index("Page two")
+    
+    def test_tab_stop_definitions_are_not_text(self):
+        doc = DocxDocument()
+        doc.add_paragraph("Intro")
+        paragraph = doc.add_paragraph()
+        paragraph.paragraph_format.tab_stops.add_tab_stop(Inches(1))
+        paragraph.paragraph_format.tab_stops.add_tab_stop(Inches(2))
+        paragraph.add_run("Clause\tone")
+        doc.add_paragraph("End")
+        
+        text = extract_docx_text(save(doc))
+        
+        assert text == "Intro\nClause\tone\nEnd"
@@ -0,0 +1,88 @@
+import csv
+import gzip
+import io
+import json
+from datetime import datetime, timezone
+import pytest
+from app.models.document import Document
+from app.services.export_service import ExportService
+
+@pytest.fixture
+def db(db):
+    for i in range(7):
+        db.add(Document(
+            filename=f"contract{i}.pdf",
+            file_type="pdf",
+            content=f"Agreement text {i}",
+            agreement_type="NDA" if i % 2 else "MSA",
+            geography="Europe",
+            uploaded_at=datetime(2024, 1, i + 1, tzinfo=timezone.utc)
+        ))
+    db.commit()
+    return db
+
+def export(db, **kwargs):
+    return b"".join(ExportService().iter_export(db, batch_size=3, **kwargs))
+
+class TestExportService:
+    def test_jsonl_excludes_content_by_default(self, db):
+        rows = [json.loads(line) for line in export(db, format="jsonl").decode().splitlines()]
+        
+        assert len(rows) == 7
+        assert rows[0]["filename"] == "contract0.pdf"
+        assert rows[0]["geography"] == "Europe"
+        assert "content" not in rows[0]
+    
+    def test_csv_with_field_selection_and_content(self, db):
+        data = export(db, format="csv", fields=["filename", "agreement_type"], include_content=True)
+        rows = list(csv.reader(io.StringIO(data.decode())))
+        
+        assert rows[0] == ["filename", "agreement_type", "content"]
+        assert rows[1] == ["contract0.pdf", "MSA", "Agreement text 0"]
+        assert len(rows) == 8
+    
+    def test_gzip_compression(self, db):
+        data = export(db, format="jsonl", compression="gzip")
+        
+        assert len(gzip.decompress(data).decode().splitlines()) == 7
+    
+    def test_streams_one_chunk_per_batch(self, db):
+        chunks = list(ExportService().iter_export(db, format="jsonl", batch_size=3))
+        
+        assert len(chunks) == 3
+    
+    def test_rejects_unknown_fields(self, db):
+        with pytest.raises(ValueError):
+            export(db, format="csv", fields=["filename", "password"])
+    
+    def test_rejects_content_only_without_include_content(self, db):
+        with pytest.raises(ValueError):
+            ExportService().resolve_fields(["content"], include_content=False)
+        assert ExportService().resolve_fields(["content"], include_content=True) == ["content"]
+    
+    def test_arrow_formats_need_pyarrow(self, monkeypatch):
+        monkeypatch.setattr("importlib.util.find_spec", lambda name: None)
+        
+        with pytest.raises(ValueError):
+            ExportService().validate("parquet")
+        ExportService().validate("csv")
+    
+    def test_rejects_unsupported_compression(self, db):
+        with pytest.raises(ValueError):
+            export(db, format="csv", compression="zstd")
+    
+    def test_parquet(self, db):
+        pq = pytest.importorskip("pyarrow.parquet")
+        
+        table = pq.read_table(io.BytesIO(export(db, format="parquet", fields=["id", "filename", "uploaded_at"])))
+        
+        assert table.num_rows == 7
+        assert table.column_names == ["id", "filename", "uploaded_at"]
+    
+    def test_arrow_stream(self, db):
+        pa = pytest.importorskip("pyarrow")
+        
+        table = pa.ipc.open_stream(export(db, format="arrow", compression="zstd")).read_all()
+        
+        assert table.num_rows == 7
+        assert table.column("agreement_type").to_pylist()[:2] == ["MSA", "NDA"]
@@ -0,0 +1,145 @@
+import io
+import zipfile
+import pytest
+from docx import Document as DocxDocument
+from app.models.document import Document
+from app.services.change_tracker import flush_handlers, on_flush
+from app.services.import_service import BulkImporter
+
+def docx_bytes(text):
+    doc = DocxDocument()
+    doc.add_paragraph(text)
+    buffer = io.BytesIO()
+    doc.save(buffer)
+    return buffer.getvalue()
+
+@pytest.fixture
+def session_factory(session_factory, cache, monkeypatch):
+    # Pool workers are forked, so these patches apply to them too
+    monkeypatch.setenv("OPENROUTER_API_KEY", "test")
+    monkeypatch.setattr("app.services.metadata_extractor.get_cache", lambda: cache)
+    monkeypatch.setattr(
+        "app.services.metadata_extractor.MetadataExtractor._request_metadata",
+        lambda self, content: {"agreement_type": "NDA" if "Non-Disclosure" in content else "MSA",
+                               "governing_law": None, "geography": None, "industry": None}
+    )
+    return session_factory
+
+@pytest.fixture
+def folder(tmp_path):
+    source = tmp_path / "archive"
+    (source / "2019").mkdir(parents=True)
+    (source / "nda.docx").write_bytes(docx_bytes("Non-Disclosure Agreement"))
+    (source / "2019" / "msa.docx").write_bytes(docx_bytes("Master Services Agreement"))
+    (source / "2019" / "nda_signed.docx").write_bytes(docx_bytes("Signed Non-Disclosure Agreement"))
+    (source / "notes.txt").write_text("not a contract")
+    return source
+
+class TestBulkImporter:
+    def test_imports_folder(self, session_factory, folder):
+        stats = BulkImporter(str(folder), workers=1, batch_size=2).run(session_factory)
+        
+        assert stats["imported"] == 3
+        assert stats["unsupported"] == 1
+        db = session_factory()
+        assert sorted(doc.agreement_type for doc in db.query(Document)) == ["MSA", "NDA", "NDA"]
+    
+    def test_resume_skips_finished_files(self, session_factory, folder):
+        importer = BulkImporter(str(folder), workers=1)
+        importer.run(session_factory)
+        
+        stats = importer.run(session_factory)
+        
+        assert stats["resumed"] == 4
+        assert stats["imported"] == 0
+        assert session_factory().query(Document).count() == 3
+    
+    def test_skips_already_ingested_digests(self, session_factory, folder, tmp_path):
+        BulkImporter(str(folder), workers=1).run(session_factory)
+        
+        # Same files under a new name and manifest
+        copy = tmp_path / "copy.zip"
+        with zipfile.ZipFile(copy, "w") as archive:
+            archive.write(folder / "nda.docx", "renamed.docx")
+        stats = BulkImporter(str(copy), workers=1).run(session_factory)
+        
+        assert stats["duplicate"] == 1
+        assert session_factory().query(Document).count() == 3
+    
+    def test_manifest_records_document_ids(self, session_factory, folder):
+        importer = BulkImporter(str(folder), workers=1)
+        importer.run(session_factory)
+        
+        records = importer.load_manifest()
+        
+        assert records["nda.docx"]["status"] == "imported"
+        assert isinstance(records["nda.docx"]["document_id"], int)
+        assert records["notes.txt"]["status"] == "unsupported"
+    
+    def test_duplicates_within_one_run(self, session_factory, folder):
+        (folder / "nda_again.docx").write_bytes((folder / "nda.docx").read_bytes())
+        
+        stats = BulkImporter(str(folder), workers=2).run(session_factory)
+        
+        assert stats["imported"] == 3
+        assert stats["duplicate"] == 1
+    
+    def test_extra_and_nested_metadata_is_cleaned(self, session_factory, folder, monkeypatch):
+        monkeypatch.setattr(
+            "app.services.metadata_extractor.MetadataExtractor._request_metadata",
+            lambda self, content: {"agreement_type": "NDA", "governing_law": ["UAE", "Qatar"],
+                                   "geography": {"region": "GCC"}, "industry": 7, "parties": ["Acme", "Globex"]}
+        )
+        
+        stats = BulkImporter(str(folder), workers=1).run(session_factory)
+        
+        assert stats["imported"] == 3 and stats["failed"] == 0
+        document = session_factory().query(Document).first()
+        assert (document.governing_law, document.geography, document.industry) == ("UAE, Qatar", '{"region": "GCC"}', "7")
+    
+    def test_document_that_cannot_be_stored_fails_alone(self, session_factory, folder):
+        def reject_msa(session, changes):
+            if any(doc.filename == "msa.docx" for doc in changes.inserted):
+                raise ValueError("rejected")
+        handler = on_flush(reject_msa)
+        try:
+            importer = BulkImporter(str(folder), workers=1, batch_size=10)
+            stats = importer.run(session_factory)
+        finally:
+            flush_handlers.remove(handler)
+        
+        assert stats["imported"] == 2 and stats["failed"] == 1
+        assert importer.load_manifest()["2019/msa.docx"]["status"] == "failed"
+        assert sorted(doc.filename for doc in session_factory().query(Document)) == ["nda.docx", "nda_signed.docx"]
+        
+        # The next run retries only the failed file
+        stats = importer.run(session_factory)
+        assert stats["imported"] == 1 and stats["resumed"] == 3
+    
+    def test_oversized_archive_member_not_extracted(self, session_factory, folder, tmp_path, monkeypatch):
+        monkeypatch.setattr("app.services.import_service.MAX_UPLOAD_SIZE", 1024)
+        monkeypatch.setattr("app.services.import_service._entry_path", None)
+        archive_path = tmp_path / "big.zip"
+        with zipfile.ZipFile(archive_path, "w", zipfile.ZIP_DEFLATED) as archive:
+            archive.writestr("huge.pdf", b"%PDF-1.4\n" + b"0" * 100000)
+        
+        importer = BulkImporter(str(archive_path), workers=1)
+        stats = importer.run(session_factory)
+        
+        assert stats["unsupported"] == 1
+        assert "outside upload limits" in importer.load_manifest()["huge.pdf"]["error"]
+    
+    def test_duplicates_within_one_run_extracted_once(self, session_factory, folder, tmp_path, monkeypatch):
+        calls = tmp_path / "calls.txt"
+        def request_metadata(self, content):
+            with open(calls, "a") as f:
+                f.write(content + "\n")
+            return {"agreement_type": "NDA"}
+        monkeypatch.setattr("app.services.metadata_extractor.MetadataExtractor._request_metadata", request_metadata)
+        for i in range(3):
+            (folder / f"nda_copy_{i}.docx").write_bytes((folder / "nda.docx").read_bytes())
+        
+        stats = BulkImporter(str(folder), workers=4).run(session_factory)
+        
+        assert stats["imported"] == 3 and stats["duplicate"] == 3
+        assert calls.read_text().splitlines().count("Non-Disclosure Agreement") == 1
@@ -0,0 +1,41 @@
+import json
+import pytest
+from app.services import llm_client
+from app.services.llm_client import FakeLLMClient, create_llm_client
+
+def ask(client, prompt):
+    response = client.chat.completions.create(model="any", messages=[{"role": "user", "content": prompt}])
+    return json.loads(response.choices[0].message.content)
+
+class TestLLMClient:
+    def setup_method(self):
+        self.client = FakeLLMClient(latency_ms=0, jitter_ms=0)
+    
+    def test_factory_selects_backend(self, monkeypatch):
+        monkeypatch.setattr(llm_client, "LLM_BACKEND", "fake")
+        assert isinstance(create_llm_client(), FakeLLMClient)
+        
+        monkeypatch.setattr(llm_client, "LLM_BACKEND", "openrouter")
+        monkeypatch.delenv("OPENROUTER_API_KEY", raising=False)
+        with pytest.raises(ValueError):
+            create_llm_client()
+    
+    def test_fake_metadata_is_deterministic(self):
+        prompt = "Extract metadata.\n\nDocument content:\nThis NDA is governed by the laws of the UAE."
+        
+        metadata = ask(self.client, prompt)
+        
+        assert metadata["agreement_type"] == "NDA"
+        assert metadata["governing_law"] == "UAE"
+        assert set(metadata) == {"agreement_type", "governing_law", "geography", "industry"}
+        assert ask(self.client, prompt) == metadata
+        assert self.client.calls == 2
+    
+    def test_fake_query_plan(self):
+        plan = ask(self.client, "Build a plan.\n\nUser question: Show me all MSA contracts in Europe")
+        
+        assert plan["filters"] == [
+            {"field": "agreement_type", "value": "MSA"},
+            {"field": "geography", "value": "Europe"},
+        ]
+        assert ask(self.client, "User question: What do we have?") == {"filters": [], "search": [], "all": True}
@@ -0,0 +1,158 @@
+import threading
+import time
+import pytest
+from app.services.llm_scheduler import BATCH, INTERACTIVE, LLMScheduler, PriorityClass, SchedulerTimeout
+
+@pytest.fixture
+def store(tmp_path):
+    return str(tmp_path / "llm_scheduler.db")
+
+def start(scheduler, priority, fn, results):
+    thread = threading.Thread(target=lambda: results.append(scheduler.run(priority, fn)))
+    thread.start()
+    return thread
+
+def wait_for(condition, timeout=2.0):
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, "condition not reached"
+        time.sleep(0.005)
+
+class TestLLMScheduler:
+    def test_runs_call_and_records_metrics(self, store):
+        scheduler = LLMScheduler(max_concurrency=2, path=store)
+        
+        assert scheduler.run(INTERACTIVE, lambda x: x * 2, 21) == 42
+        
+        metrics = scheduler.metrics()
+        assert metrics["classes"][INTERACTIVE]["completed"] == 1
+        assert metrics["running"] == 0 and metrics["queued"] == 0
+    
+    def test_unknown_class(self, store):
+        with pytest.raises(ValueError):
+            LLMScheduler(path=store).run("urgent", lambda: None)
+    
+    def test_failure_releases_slot(self, store):
+        scheduler = LLMScheduler(max_concurrency=1, path=store)
+        
+        with pytest.raises(RuntimeError):
+            scheduler.run(BATCH, lambda: (_ for _ in ()).throw(RuntimeError("boom")))
+        
+        assert scheduler.run(BATCH, lambda: "ok") == "ok"
+        assert scheduler.metrics()["classes"][BATCH]["failed"] == 1
+    
+    def test_batch_cap_leaves_slot_for_interactive(self, store):
+        scheduler = LLMScheduler(max_concurrency=2, path=store, classes={
+            INTERACTIVE: PriorityClass(weight=8, max_concurrency=2),
+            BATCH: PriorityClass(weight=1, max_concurrency=1),
+        })
+        gate = threading.Event()
+        results = []
+        threads = [start(scheduler, BATCH, gate.wait, results) for _ in range(3)]
+        wait_for(lambda: scheduler.queue_depth(BATCH) == 2)
+        
+        # Batch holds one slot and has work queued, yet interactive runs at once
+        assert scheduler.run(INTERACTIVE, lambda: "answer") == "answer"
+        assert scheduler.metrics()["classes"][BATCH]["running"] == 1
+        
+        gate.set()
+        for thread in threads:
+            thread.join()
+        assert scheduler.metrics()["classes"][BATCH]["completed"] == 3
+    
+    def test_weighted_fair_order(self, store):
+        scheduler = LLMScheduler(max_concurrency=1, path=store, classes={
+            INTERACTIVE: PriorityClass(weight=4, max_concurrency=1),
+            BATCH: PriorityClass(weight=1, max_concurrency=1),
+        })
+        gate = threading.Event()
+        order = []
+        results = []
+        blocker = start(scheduler, BATCH, gate.wait, results)
+        wait_for(lambda: scheduler.metrics()["running"] == 1)
+        
+        threads = []
+        for priority in [BATCH] * 4 + [INTERACTIVE] * 12:
+            threads.append(start(scheduler, priority, lambda p=priority: order.append(p), results))
+            wait_for(lambda n=len(threads): scheduler.queue_depth() == n)
+        
+        gate.set()
+        for thread in [blocker] + threads:
+            thread.join()
+        
+        # Four interactive dispatches per batch dispatch while both are backlogged; batch
+        # was already charged for the blocking call, so interactive catches up first
+        assert order == [INTERACTIVE] * 8 + [BATCH] + [INTERACTIVE] * 4 + [BATCH] * 3
+    
+    def test_queue_timeout(self, store):
+        scheduler = LLMScheduler(max_concurrency=1, path=store, classes={
+            INTERACTIVE: PriorityClass(weight=1, max_concurrency=1, queue_timeout=0.05),
+        })
+        gate = threading.Event()
+        results = []
+        blocker = start(scheduler, INTERACTIVE, gate.wait, results)
+        wait_for(lambda: scheduler.metrics()["running"] == 1)
+        
+        with pytest.raises(SchedulerTimeout):
+            scheduler.run(INTERACTIVE, lambda: None)
+        
+        gate.set()
+        blocker.join()
+        metrics = scheduler.metrics()["classes"][INTERACTIVE]
+        assert metrics["timed_out"] == 1 and metrics["queued"] == 0
+    
+    def test_interactive_overtakes_batch_backlog_of_another_process(self, store):
+        classes = {
+            INTERACTIVE: PriorityClass(weight=8, max_concurrency=1),
+            BATCH: PriorityClass(weight=1, max_concurrency=1),
+        }
+        # e.g. a bulk-import worker and an API worker sharing one store
+        importer = LLMScheduler(max_concurrency=1, path=store, classes=classes)
+        api = LLMScheduler(max_concurrency=1, path=store, classes=classes)
+        gate = threading.Event()
+        order = []
+        results = []
+        blocker = start(importer, BATCH, gate.wait, results)
+        wait_for(lambda: api.metrics()["running"] == 1)
+        backlog = []
+        for _ in range(3):
+            backlog.append(start(importer, BATCH, lambda: order.append(BATCH), results))
+            wait_for(lambda n=len(backlog): api.queue_depth(BATCH) == n)
+        
+        query = start(api, INTERACTIVE, lambda: order.append(INTERACTIVE), results)
+        wait_for(lambda: importer.queue_depth(INTERACTIVE) == 1)
+        gate.set()
+        for thread in [blocker, query] + backlog:
+            thread.join()
+        
+        assert order == [INTERACTIVE] + [BATCH] * 3
+    
+    def test_concurrency_limit_shared_between_schedulers(self, store):
+        first = LLMScheduler(max_concurrency=1, path=store)
+        second = LLMScheduler(max_concurrency=1, path=store)
+        gate = threading.Event()
+        results = []
+        blocker = start(first, BATCH, gate.wait, results)
+        wait_for(lambda: second.metrics()["running"] == 1)
+        
+        waiting = start(second, BATCH, lambda: "done", results)
+        wait_for(lambda: second.queue_depth() == 1)
+        assert first.metrics()["running"] == 1
+        
+        gate.set()
+        for thread in [blocker, waiting]:
+            thread.join()
+        assert "done" in results
+        assert first.metrics()["running"] == 0 and first.metrics()["queued"] == 0
+    
+    def test_rate_limit_shared_between_schedulers(self, store):
+        first = LLMScheduler(max_concurrency=2, path=store, rate_per_minute=600, burst=1)
+        second = LLMScheduler(max_concurrency=2, path=store, rate_per_minute=600, burst=1)
+        
+        first.run(INTERACTIVE, lambda: None)
+        started = time.monotonic()
+        second.run(INTERACTIVE, lambda: None)
+        
+        # The burst was spent by the other scheduler, so this call waits for a refill
+        assert time.monotonic() - started >= 0.05
+        assert first.metrics()["rate_limit_per_minute"] == 600
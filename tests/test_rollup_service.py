@@ -0,0 +1,89 @@
+from datetime import date, datetime, timezone
+import pytest
+from app.models.document import Document
+from app.models.rollup import DocumentRollup
+from app.services.rollup_service import RollupService, bucket_start
+
+def uploaded(year, month, day):
+    return datetime(year, month, day, 12, 0, tzinfo=timezone.utc)
+
+class TestRollupService:
+    def setup_method(self):
+        self.service = RollupService()
+    
+    def test_bucket_start(self):
+        # 2024-03-14 is a Thursday
+        assert bucket_start(uploaded(2024, 3, 14), "week") == date(2024, 3, 11)
+        assert bucket_start(uploaded(2024, 3, 14), "month") == date(2024, 3, 1)
+    
+    def test_rollups_maintained_on_insert(self, db):
+        db.add_all([
+            Document(filename="a.pdf", agreement_type="NDA", uploaded_at=uploaded(2024, 1, 5)),
+            Document(filename="b.pdf", agreement_type="NDA", uploaded_at=uploaded(2024, 1, 20)),
+        ])
+        db.commit()
+        db.add(Document(filename="c.pdf", agreement_type="MSA", uploaded_at=uploaded(2024, 3, 2)))
+        db.commit()
+        
+        result = self.service.get_timeseries(db, "month", "agreement_type")
+        
+        assert result["buckets"] == ["2024-01-01", "2024-02-01", "2024-03-01"]
+        assert result["series"] == {"NDA": [2, 0, 0], "MSA": [0, 0, 1]}
+    
+    def test_total_and_range(self, db):
+        for month in range(1, 7):
+            db.add(Document(filename=f"{month}.pdf", uploaded_at=uploaded(2024, month, 10)))
+        db.commit()
+        
+        result = self.service.get_timeseries(db, "month", "total", start=date(2024, 2, 15), end=date(2024, 4, 30))
+        
+        assert result["buckets"] == ["2024-02-01", "2024-03-01", "2024-04-01"]
+        assert result["series"] == {"": [1, 1, 1]}
+    
+    def test_rollback_discards_rollup_changes(self, db):
+        db.add(Document(filename="a.pdf", agreement_type="NDA", uploaded_at=uploaded(2024, 1, 5)))
+        db.flush()
+        db.rollback()
+        
+        assert db.query(DocumentRollup).count() == 0
+    
+    def test_rebuild_matches_incremental(self, db):
+        db.add_all([
+            Document(filename="a.pdf", industry="Technology", uploaded_at=uploaded(2024, 1, 5)),
+            Document(filename="b.pdf", industry="Technology", uploaded_at=uploaded(2024, 1, 6)),
+        ])
+        db.commit()
+        incremental = self.service.get_timeseries(db, "week", "industry")
+        
+        self.service.rebuild(db)
+        
+        assert self.service.get_timeseries(db, "week", "industry") == incremental
+    
+    def test_rollups_per_tenant(self, db):
+        db.add_all([
+            Document(tenant_id="acme", filename="a.pdf", agreement_type="NDA", uploaded_at=uploaded(2024, 1, 5)),
+            Document(tenant_id="globex", filename="b.pdf", agreement_type="NDA", uploaded_at=uploaded(2024, 1, 6)),
+            Document(tenant_id="globex", filename="c.pdf", agreement_type="MSA", uploaded_at=uploaded(2024, 2, 6)),
+        ])
+        db.commit()
+        
+        acme = self.service.get_timeseries(db, "month", "agreement_type", tenant_id="acme")
+        globex = self.service.get_timeseries(db, "month", "agreement_type", tenant_id="globex")
+        
+        assert acme["series"] == {"NDA": [1]}
+        assert globex["series"] == {"NDA": [1, 0], "MSA": [0, 1]}
+        self.service.rebuild(db)
+        assert self.service.get_timeseries(db, "month", "agreement_type", tenant_id="globex") == globex
+    
+    def test_rejects_ranges_over_max_buckets(self, db):
+        db.add_all([
+            Document(filename="a.pdf", uploaded_at=uploaded(2000, 1, 5)),
+            Document(filename="b.pdf", uploaded_at=uploaded(2024, 1, 5)),
+        ])
+        db.commit()
+        
+        with pytest.raises(ValueError):
+            self.service.get_timeseries(db, "week", "total")
+        with pytest.raises(ValueError):
+            self.service.get_timeseries(db, "week", "total", start=date(1990, 1, 1), end=date(2024, 1, 1))
+        assert len(self.service.get_timeseries(db, "month", "total")["buckets"]) == 289
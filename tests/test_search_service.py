@@ -0,0 +1,102 @@
+import pytest
+from sqlalchemy import text
+from app.models.document import Document
+from app.models.search_index import search_tenant_key
+from app.services.search_service import SearchService, build_match_query
+
+class TestSearchService:
+    def setup_method(self):
+        self.service = SearchService()
+    
+    def test_build_match_query_quotes_phrases(self):
+        assert build_match_query(["limitation of liability", "cap"]) == '"limitation of liability" AND "cap"'
+        assert build_match_query(['NEAR("a" b) OR'], require_all=False) == '"NEAR a b OR"'
+        assert build_match_query(["  ", "!"]) is None
+    
+    def test_documents_indexed_on_insert(self, db):
+        db.add_all([
+            Document(filename="a.pdf", agreement_type="NDA", content="Confidential information must be protected."),
+            Document(filename="b.pdf", agreement_type="MSA", content="Termination for convenience on notice."),
+        ])
+        db.commit()
+        
+        results = self.service.search(db, ["confidential"])
+        
+        assert [r["filename"] for r in results] == ["a.pdf"]
+    
+    def test_stemming_and_filters(self, db):
+        db.add_all([
+            Document(filename="a.pdf", agreement_type="NDA", content="Either party may terminate this agreement."),
+            Document(filename="b.pdf", agreement_type="MSA", content="The customer may terminate on notice."),
+        ])
+        db.commit()
+        
+        results = self.service.search(db, ["termination"], [("agreement_type", "MSA")])
+        
+        assert [r["filename"] for r in results] == ["b.pdf"]
+    
+    def test_requires_every_phrase(self, db):
+        db.add_all([
+            Document(filename="a.pdf", content="Governing law is England. Liability is capped."),
+            Document(filename="b.pdf", content="Governing law is Dubai."),
+        ])
+        db.commit()
+        
+        # Neither has all phrases: a miss, not a looser search
+        assert self.service.search(db, ["governing law", "liability", "indemnity"]) == []
+        
+        results = self.service.search(db, ["governing law", "liability", "indemnity"], require_all=False)
+        # The one matching more phrases ranks first
+        assert [r["filename"] for r in results] == ["a.pdf", "b.pdf"]
+    
+    def test_rejects_unknown_filter(self, db):
+        db.add(Document(filename="a.pdf", content="Some text"))
+        db.commit()
+        
+        with pytest.raises(ValueError):
+            self.service.search(db, ["text"], [("content", "x")])
+    
+    def test_rebuild_indexes_existing_documents(self, db):
+        db.add(Document(filename="a.pdf", content="Force majeure events excuse performance."))
+        db.commit()
+        # Simulate a database created before the index existed
+        db.execute(text("INSERT INTO documents_fts (documents_fts) VALUES ('delete-all')"))
+        db.commit()
+        assert self.service.search(db, ["force majeure"]) == []
+        
+        self.service.rebuild(db)
+        
+        assert [r["filename"] for r in self.service.search(db, ["force majeure"])] == ["a.pdf"]
+    
+    def test_search_scoped_to_tenant(self, db):
+        db.add_all([
+            Document(tenant_id="acme", filename="a.pdf", content="Confidential information must be protected."),
+            Document(tenant_id="globex", filename="b.pdf", content="Confidential information may be shared."),
+        ])
+        db.commit()
+        
+        assert [r["filename"] for r in self.service.search(db, ["confidential"], tenant_id="globex")] == ["b.pdf"]
+        assert self.service.search(db, ["confidential"]) == []
+    
+    def test_tenant_move_reindexes(self, db):
+        document = Document(tenant_id="acme", filename="a.pdf", content="Confidential information must be protected.")
+        db.add(document)
+        db.commit()
+        
+        document.tenant_id = "acme-legal"
+        db.commit()
+        
+        assert self.service.search(db, ["confidential"], tenant_id="acme") == []
+        assert [r["filename"] for r in self.service.search(db, ["confidential"], tenant_id="acme-legal")] == ["a.pdf"]
+    
+    def test_match_restricted_to_tenant_token(self, db):
+        db.add_all([
+            Document(tenant_id="acme_legal", filename="a.pdf", content="Confidential information."),
+            Document(tenant_id="acme-legal", filename="b.pdf", content="Confidential information."),
+        ])
+        db.commit()
+        
+        # The tenant's own postings are matched in the index, before any join
+        match = f'content : ("confidential") AND tenant : "{search_tenant_key("acme-legal")}"'
+        assert db.execute(text("SELECT rowid FROM documents_fts WHERE documents_fts MATCH :m"), {"m": match}).all() == [(2,)]
+        assert search_tenant_key("acme").isdigit()
@@ -0,0 +1,59 @@
+from app.models.document import Document
+from app.models.section import DocumentSection
+from app.services.section_service import SectionService
+
+CONTENT = "1. Term\nThis Agreement lasts two years.\n2. Governing Law\nThe laws of the UAE apply."
+
+class TestSectionService:
+    def setup_method(self):
+        self.service = SectionService()
+    
+    def test_sections_written_on_insert(self, db):
+        document = Document(filename="a.pdf", content=CONTENT)
+        db.add(document)
+        db.commit()
+        
+        sections = self.service.list_sections(db, document.id)
+        
+        assert [(s.number, s.title) for s in sections] == [("1", "Term"), ("2", "Governing Law")]
+        assert CONTENT[sections[1].start_offset:sections[1].end_offset] == sections[1].text
+    
+    def test_title_filter_matches_wildcards_literally(self, db):
+        document = Document(filename="a.pdf", content=CONTENT + "\n3. Fees_100%\nFees are fixed.")
+        db.add(document)
+        db.commit()
+        
+        assert [s.title for s in self.service.list_sections(db, document.id, "governing")] == ["Governing Law"]
+        assert [s.title for s in self.service.list_sections(db, document.id, "_100%")] == ["Fees_100%"]
+        assert self.service.list_sections(db, document.id, "Gov%Law") == []
+        assert self.service.list_sections(db, document.id, "G_verning") == []
+    
+    def test_get_section_checks_document(self, db):
+        first = Document(filename="a.pdf", content=CONTENT)
+        second = Document(filename="b.pdf", content=CONTENT)
+        db.add_all([first, second])
+        db.commit()
+        section = self.service.list_sections(db, first.id)[0]
+        
+        assert self.service.get_section(db, first.id, section.id).text.startswith("1. Term")
+        assert self.service.get_section(db, second.id, section.id) is None
+    
+    def test_rebuild_backfills(self, db):
+        db.add(Document(filename="a.pdf", content=CONTENT))
+        db.commit()
+        db.query(DocumentSection).delete()
+        db.commit()
+        
+        self.service.rebuild(db)
+        
+        assert db.query(DocumentSection).count() == 2
+    
+    def test_deleting_document_deletes_sections(self, db):
+        document = Document(filename="a.pdf", content=CONTENT)
+        db.add(document)
+        db.commit()
+        
+        db.delete(document)
+        db.commit()
+        
+        assert db.query(DocumentSection).count() == 0
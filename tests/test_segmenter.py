@@ -0,0 +1,75 @@
+from app.services.segmenter import CLAUSE, HEADING, PREAMBLE, segment_text
+
+AGREEMENT = """This Master Services Agreement is made between Acme Ltd and Beta LLC.
+
+1. Definitions
+1.1 "Services" means the services described in Schedule 1.
+1.2 Charges are payable within
+30 days of invoice.
+2. Services. The Supplier shall perform the Services.
+2.1 The Supplier shall use reasonable care.
+2.1.1 Records shall be kept.
+2.1.1.1 including electronic records.
+\fArticle 3 - Payment
+The Customer shall pay each invoice.
+4 Governing Law
+This Agreement is governed by the laws of England.
+GENERAL
+Name | Title | Date
+Schedule 1
+1. Description of the services.
+"""
+
+class TestSegmenter:
+    def setup_method(self):
+        self.segments = segment_text(AGREEMENT)
+    
+    def headings(self):
+        return [(s.kind, s.number, s.title) for s in self.segments]
+    
+    def test_preamble_and_clauses(self):
+        assert self.headings() == [
+            (PREAMBLE, None, None),
+            (CLAUSE, "1", "Definitions"),
+            (CLAUSE, "1.1", None),
+            (CLAUSE, "1.2", None),
+            (CLAUSE, "2", "Services"),
+            (CLAUSE, "2.1", None),
+            (CLAUSE, "2.1.1", None),
+            (CLAUSE, "3", "Payment"),
+            (CLAUSE, "4", "Governing Law"),
+            (HEADING, None, "GENERAL"),
+            (HEADING, "1", "Schedule 1"),
+            (CLAUSE, "1", None),
+        ]
+    
+    def test_levels_and_pages(self):
+        by_number = {s.number: s for s in self.segments if s.kind == CLAUSE}
+        
+        assert [by_number[n].level for n in ("2", "2.1", "2.1.1")] == [1, 2, 3]
+        assert by_number["2.1.1"].page == 1
+        assert by_number["3"].page == 2
+    
+    def test_offsets_slice_the_text(self):
+        governing_law = next(s for s in self.segments if s.title == "Governing Law")
+        
+        assert AGREEMENT[governing_law.start:governing_law.end] == (
+            "4 Governing Law\nThis Agreement is governed by the laws of England."
+        )
+        # Running text and deep numbering stay inside their clause
+        clause_1_2 = next(s for s in self.segments if s.number == "1.2")
+        assert AGREEMENT[clause_1_2.start:clause_1_2.end].endswith("30 days of invoice.")
+        clause_2_1_1 = next(s for s in self.segments if s.number == "2.1.1")
+        assert "2.1.1.1 including" in AGREEMENT[clause_2_1_1.start:clause_2_1_1.end]
+    
+    def test_segments_are_ordered_and_disjoint(self):
+        assert [s.position for s in self.segments] == list(range(len(self.segments)))
+        for previous, segment in zip(self.segments, self.segments[1:]):
+            assert previous.end <= segment.start
+    
+    def test_text_without_headings(self):
+        segments = segment_text("Just a letter.\nWith two lines.")
+        
+        assert len(segments) == 1
+        assert segments[0].kind == PREAMBLE
+        assert segment_text("  \n\f ") == []
@@ -0,0 +1,80 @@
+import asyncio
+import json
+import pytest
+from app.services.sse import event_stream, format_event
+
+def parse(chunks):
+    events = []
+    for block in "".join(chunks).split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if fields:
+            events.append((fields["event"], json.loads(fields["data"])))
+    return events
+
+async def collect(stream):
+    return [chunk async for chunk in stream]
+
+class TestEventStream:
+    def test_format_event(self):
+        assert format_event("committed", {"document_id": 3}, 7) == 'id: 7\nevent: committed\ndata: {"document_id": 3}\n\n'
+    
+    @pytest.mark.asyncio
+    async def test_burst_is_flushed_in_one_chunk(self):
+        async def produce(emit):
+            for i in range(5):
+                emit("received", {"index": i})
+            await asyncio.sleep(0.1)
+            emit("done", {"processed": 5})
+        
+        chunks = await collect(event_stream(produce, flush_interval=0.02))
+        
+        assert len(chunks) == 2
+        assert parse(chunks) == [("received", {"index": i}) for i in range(5)] + [("done", {"processed": 5})]
+    
+    @pytest.mark.asyncio
+    async def test_batch_size_limit(self):
+        async def produce(emit):
+            for i in range(5):
+                emit("received", {"index": i})
+        
+        chunks = await collect(event_stream(produce, max_batch=2))
+        
+        assert len(chunks) == 3
+    
+    @pytest.mark.asyncio
+    async def test_producer_error_ends_stream(self):
+        async def produce(emit):
+            emit("received", {"index": 0})
+            raise RuntimeError("disk full")
+        
+        events = parse(await collect(event_stream(produce)))
+        
+        assert events == [("received", {"index": 0}), ("error", {"error": "disk full"})]
+    
+    @pytest.mark.asyncio
+    async def test_heartbeat_while_idle(self):
+        async def produce(emit):
+            await asyncio.sleep(0.05)
+            emit("done", {})
+        
+        chunks = await collect(event_stream(produce, heartbeat_interval=0.01))
+        
+        assert chunks[0] == ": keep-alive\n\n"
+        assert parse(chunks) == [("done", {})]
+    
+    @pytest.mark.asyncio
+    async def test_disconnect_cancels_producer(self):
+        cancelled = asyncio.Event()
+        
+        async def produce(emit):
+            emit("received", {"index": 0})
+            try:
+                await asyncio.sleep(10)
+            except asyncio.CancelledError:
+                cancelled.set()
+                raise
+        
+        stream = event_stream(produce, flush_interval=0)
+        await stream.__anext__()
+        await stream.aclose()
+        await asyncio.wait_for(cancelled.wait(), 1)
@@ -0,0 +1,64 @@
+import pytest
+from sqlalchemy import func
+from app.models.database import get_engine, tenant_session
+from app.models.document import Document
+from app.models.rollup import DocumentRollup
+from app.services.search_service import SearchService
+from app.services.tenant_move import move_to_dedicated, stranded_documents
+
+@pytest.fixture
+def shared(dedicated, engine, session_factory, monkeypatch):
+    # Documents written while acme was still served from the shared database
+    monkeypatch.setattr("app.services.tenant_move.engine", engine)
+    monkeypatch.setattr("app.services.tenant_move.DEDICATED_TENANTS", frozenset({"acme"}))
+    db = session_factory()
+    db.add_all([
+        Document(tenant_id="acme", filename="a.pdf", content_hash="a", content="Confidential terms."),
+        Document(tenant_id="acme", filename="b.pdf", content_hash="b", content="Confidential pricing."),
+        Document(tenant_id="globex", filename="c.pdf", content_hash="c", content="Confidential terms."),
+    ])
+    db.commit()
+    yield db
+    db.close()
+
+def total(db, tenant_id):
+    return db.query(func.sum(DocumentRollup.count)).filter_by(
+        tenant_id=tenant_id, granularity="month", facet="total"
+    ).scalar()
+
+class TestTenantMove:
+    def test_moves_documents_and_derived_data(self, shared):
+        assert stranded_documents("acme") == 2
+        
+        stats = move_to_dedicated("acme")
+        
+        assert stats == {"moved": 2, "skipped": 0}
+        assert stranded_documents("acme") == 0
+        assert [d.tenant_id for d in shared.query(Document)] == ["globex"]
+        assert not total(shared, "acme")
+        with tenant_session("acme") as db:
+            assert sorted((d.id, d.filename) for d in db.query(Document)) == [(1, "a.pdf"), (2, "b.pdf")]
+            assert total(db, "acme") == 2
+            found = SearchService().search(db, ["confidential"], tenant_id="acme")
+            assert sorted(r["filename"] for r in found) == ["a.pdf", "b.pdf"]
+    
+    def test_taken_ids_and_documents_already_moved(self, shared):
+        with tenant_session("acme") as db:
+            db.add_all([
+                Document(tenant_id="acme", filename="new.pdf", content_hash="new", content="Uploaded after the switch."),
+                Document(tenant_id="acme", filename="b.pdf", content_hash="b", content="Confidential pricing."),
+            ])
+            db.commit()
+        
+        stats = move_to_dedicated("acme", batch_size=1)
+        
+        assert stats == {"moved": 1, "skipped": 1}
+        with tenant_session("acme") as db:
+            assert sorted((d.id, d.filename) for d in db.query(Document)) == [(1, "new.pdf"), (2, "b.pdf"), (3, "a.pdf")]
+        assert move_to_dedicated("acme") == {"moved": 0, "skipped": 0}
+    
+    def test_only_dedicated_tenants(self, shared):
+        with pytest.raises(ValueError):
+            move_to_dedicated("globex")
+        assert stranded_documents("globex") == 0
+        assert get_engine("globex") is not get_engine("acme")
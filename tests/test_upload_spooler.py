@@ -0,0 +1,84 @@
+import hashlib
+import io
+import os
+import zipfile
+import pytest
+from fastapi import UploadFile
+from app.services.upload_spooler import UploadRejected, sniff_file_type, spool_upload
+
+def make_docx_bytes():
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, "w") as archive:
+        archive.writestr("word/document.xml", "<w:document/>")
+    return buffer.getvalue()
+
+def make_upload(data, filename):
+    return UploadFile(file=io.BytesIO(data), filename=filename)
+
+class TestUploadSpooler:
+    def test_sniff_file_type(self):
+        assert sniff_file_type(b"%PDF-1.7") == "pdf"
+        assert sniff_file_type(b"PK\x03\x04") == "docx"
+        assert sniff_file_type(b"MZ\x90\x00") is None
+    
+    @pytest.mark.asyncio
+    async def test_spools_pdf_with_hash_and_size(self):
+        data = b"%PDF-1.4\n" + b"x" * 5000
+        
+        upload = await spool_upload(make_upload(data, "contract.bin"), chunk_size=1024)
+        
+        try:
+            assert upload.file_type == "pdf"
+            assert upload.size == len(data)
+            assert upload.sha256 == hashlib.sha256(data).hexdigest()
+            with upload.open() as stream:
+                assert stream.read() == data
+        finally:
+            upload.cleanup()
+        
+        assert not os.path.exists(upload.path)
+    
+    @pytest.mark.asyncio
+    async def test_spools_docx_archive(self):
+        upload = await spool_upload(make_upload(make_docx_bytes(), "contract.docx"))
+        
+        with upload:
+            assert upload.file_type == "docx"
+    
+    @pytest.mark.asyncio
+    async def test_rejects_non_docx_zip(self):
+        buffer = io.BytesIO()
+        with zipfile.ZipFile(buffer, "w") as archive:
+            archive.writestr("xl/workbook.xml", "<workbook/>")
+        
+        with pytest.raises(UploadRejected):
+            await spool_upload(make_upload(buffer.getvalue(), "sheet.docx"))
+    
+    @pytest.mark.asyncio
+    async def test_rejects_unknown_type_from_first_chunk(self):
+        file = make_upload(b"MZ" + b"\x00" * 10000, "contract.pdf")
+        
+        with pytest.raises(UploadRejected):
+            await spool_upload(file, chunk_size=1024)
+        
+        # Only the first chunk was consumed
+        assert file.file.tell() == 1024
+    
+    @pytest.mark.asyncio
+    async def test_rejects_oversized_upload_while_streaming(self):
+        file = make_upload(b"%PDF-" + b"x" * 10000, "big.pdf")
+        
+        with pytest.raises(UploadRejected) as exc_info:
+            await spool_upload(file, max_size=4096, chunk_size=1024)
+        
+        assert exc_info.value.status_code == 413
+        assert file.file.tell() <= 5 * 1024
+    
+    @pytest.mark.asyncio
+    async def test_rejects_declared_size_before_reading(self):
+        file = UploadFile(file=io.BytesIO(b"%PDF-" + b"x" * 100), filename="big.pdf", size=10 ** 9)
+        
+        with pytest.raises(UploadRejected):
+            await spool_upload(file)
+        
+        assert file.file.tell() == 0